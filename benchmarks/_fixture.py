@@ -0,0 +1,59 @@
+"""Shared setup for the benchmarks
+
+Each benchmark runs against a throwaway Kerberos realm, set up with the
+k5test helpers from the test suite (so the MIT krb5 server programs must
+be installed), instead of against a real KDC.  The realm's environment
+(config files, keytab, and credentials cache) is exported into the
+process environment, so that the default credentials used by the
+benchmarks come from the realm.
+
+The benchmarks should be run from the root of the source tree, after
+building the extensions (e.g. with ``python setup.py build_ext
+--inplace``), as ``python benchmarks/<name>.py``.
+"""
+
+import os
+import socket
+
+import gssapi.raw as gb
+from gssapi.tests import k5test as kt
+
+
+TARGET_SERVICE_NAME = b'host'
+FQDN = socket.getfqdn().encode('utf-8')
+
+
+class Fixture(object):
+    """A throwaway realm, plus credentials and contexts for benchmarking"""
+
+    def __init__(self):
+        self.realm = kt.K5Realm()
+        for k, v in self.realm.env.items():
+            os.environ[k] = v
+
+        self.target_name = gb.import_name(TARGET_SERVICE_NAME + b'@' + FQDN,
+                                          gb.NameType.hostbased_service)
+        self.client_creds = gb.acquire_cred(None, usage='initiate').creds
+        self.server_creds = gb.acquire_cred(None, usage='accept').creds
+
+        (self.client_ctx, self.server_ctx) = self.establish()
+
+    def establish(self):
+        """Establish a new pair of raw security contexts
+
+        Returns:
+            (SecurityContext, SecurityContext): the initiator and acceptor
+                contexts
+        """
+
+        client_res = gb.init_sec_context(self.target_name,
+                                         self.client_creds)
+        server_res = gb.accept_sec_context(client_res.token,
+                                           self.server_creds)
+        gb.init_sec_context(self.target_name, self.client_creds,
+                            client_res.context, input_token=server_res.token)
+
+        return (client_res.context, server_res.context)
+
+    def stop(self):
+        self.realm.stop()
@@ -0,0 +1,79 @@
+"""Measure the memory used by each established security context
+
+Many high-level security contexts are established, and the accepting
+side of each one is kept alive (as a server holding idle connections
+would).  Both the memory allocated by Python objects (according to
+:mod:`tracemalloc`) and the growth of the resident set size (which also
+includes the memory allocated by the GSSAPI implementation) are reported
+per context.
+
+.. code-block:: sh
+
+    python benchmarks/context_memory.py --contexts 10000
+"""
+
+import argparse
+import gc
+import os
+import tracemalloc
+
+from gssapi.raw import NameType
+from gssapi import creds as gsscreds
+from gssapi import names as gssnames
+from gssapi import sec_contexts as gssctx
+
+from _fixture import Fixture, FQDN, TARGET_SERVICE_NAME
+
+
+def _rss():
+    # the resident set size, in bytes (Linux only)
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--contexts', type=int, default=10000,
+                        help="the number of contexts to establish")
+    args = parser.parse_args()
+
+    fixture = Fixture()
+    try:
+        target_name = gssnames.Name(TARGET_SERVICE_NAME + b'@' + FQDN,
+                                    NameType.hostbased_service)
+        client_creds = gsscreds.Credentials(usage='initiate')
+        server_creds = gsscreds.Credentials(usage='accept')
+
+        def establish():
+            client_ctx = gssctx.SecurityContext(name=target_name,
+                                                creds=client_creds)
+            server_ctx = gssctx.SecurityContext(creds=server_creds)
+            client_ctx.step(server_ctx.step(client_ctx.step()))
+            return server_ctx
+
+        # warm up the credentials cache and any lazily allocated state
+        establish()
+
+        gc.collect()
+        tracemalloc.start()
+        start_rss = _rss()
+        start_traced = tracemalloc.get_traced_memory()[0]
+
+        contexts = [establish() for _ in range(args.contexts)]
+
+        gc.collect()
+        traced = tracemalloc.get_traced_memory()[0] - start_traced
+        rss = _rss() - start_rss
+        tracemalloc.stop()
+
+        print("{0} contexts".format(len(contexts)))
+        print("python objects: {0:.0f} bytes per context".format(
+            traced / len(contexts)))
+        print("resident set:   {0:.0f} bytes per context".format(
+            rss / len(contexts)))
+    finally:
+        fixture.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Measure the overhead of the high-level API over the raw API
+
+Equivalent calls are timed through the raw API and through a
+high-level :class:`~gssapi.sec_contexts.SecurityContext`, and the cost
+of each call is reported along with the ratio between the two, which
+shows how much the high-level wrappers add on top of GSSAPI itself.
+
+.. code-block:: sh
+
+    python benchmarks/high_level_overhead.py --calls 100000
+"""
+
+import argparse
+import time
+
+import gssapi.raw as gb
+from gssapi import sec_contexts as gssctx
+
+from _fixture import Fixture
+
+
+MESSAGE = b'x' * 64
+
+
+def benchmarks(fixture):
+    """Get the pairs of equivalent raw and high-level calls to time"""
+
+    raw_ctx = fixture.client_ctx
+    ctx = gssctx.SecurityContext(base=fixture.establish()[0])
+
+    return [
+        ('wrap',
+         lambda: gb.wrap(raw_ctx, MESSAGE),
+         lambda: ctx.wrap(MESSAGE, True)),
+        ('get_mic',
+         lambda: gb.get_mic(raw_ctx, MESSAGE),
+         lambda: ctx.get_signature(MESSAGE)),
+        ('lifetime',
+         lambda: gb.context_time(raw_ctx),
+         lambda: ctx.lifetime),
+        ('complete',
+         lambda: gb.inquire_context(raw_ctx, initiator_name=False,
+                                    target_name=False, lifetime=False,
+                                    mech=False, flags=False,
+                                    locally_init=False,
+                                    complete=True).complete,
+         lambda: ctx.complete),
+    ]
+
+
+def time_calls(func, calls):
+    """Time a function, returning the cost of each call in nanoseconds"""
+
+    start = time.time()
+    for _ in range(calls):
+        func()
+
+    return (time.time() - start) * 1e9 / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--calls', type=int, default=100000,
+                        help="the number of calls to time for each API")
+    args = parser.parse_args()
+
+    fixture = Fixture()
+    try:
+        print("{0:<10} {1:>12} {2:>12} {3:>8}".format(
+            'call', 'raw (ns)', 'high (ns)', 'ratio'))
+        for name, raw_func, high_func in benchmarks(fixture):
+            # warm up any caches before timing
+            raw_func()
+            high_func()
+
+            raw_cost = time_calls(raw_func, args.calls)
+            high_cost = time_calls(high_func, args.calls)
+
+            print("{0:<10} {1:>12.0f} {2:>12.0f} {3:>7.2f}x".format(
+                name, raw_cost, high_cost, high_cost / raw_cost))
+    finally:
+        fixture.stop()
+
+
+if __name__ == '__main__':
+    main()
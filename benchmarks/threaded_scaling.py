@@ -0,0 +1,120 @@
+"""Measure how GSSAPI calls scale across threads
+
+A fixed number of calls of each kind of operation (handshakes,
+wrap/unwrap, and context, credential and name inquiries) are spread
+across an increasing number of threads, and the throughput of each is
+reported.  Since the raw API releases the GIL around each GSSAPI call,
+the throughput should grow with the number of threads (up to the number
+of available cores), instead of staying flat.
+
+.. code-block:: sh
+
+    python benchmarks/threaded_scaling.py --threads 1 2 4 8
+"""
+
+import argparse
+import threading
+import time
+
+import gssapi.raw as gb
+
+from _fixture import Fixture
+
+
+def op_handshake(fixture):
+    fixture.establish()
+
+
+def op_wrap_unwrap(fixture):
+    # each thread needs its own contexts, since the sequence numbers are shared
+    # state
+    ctxs = getattr(fixture.local, 'ctxs', None)
+    if ctxs is None:
+        ctxs = fixture.local.ctxs = fixture.establish()
+
+    token = gb.wrap_bytes(ctxs[0], b'x' * 4096)
+    gb.unwrap_bytes(ctxs[1], token)
+
+
+def op_inquire_context(fixture):
+    gb.inquire_context(fixture.server_ctx)
+
+
+def op_inquire_cred(fixture):
+    gb.inquire_cred(fixture.client_creds)
+
+
+def op_display_name(fixture):
+    gb.display_name(fixture.target_name)
+
+
+OPERATIONS = {
+    'handshake': op_handshake,
+    'wrap_unwrap': op_wrap_unwrap,
+    'inquire_context': op_inquire_context,
+    'inquire_cred': op_inquire_cred,
+    'display_name': op_display_name,
+}
+
+
+def run(fixture, op, num_threads, total_ops):
+    """Run the given operation across threads, returning the ops/s"""
+
+    fixture.local = threading.local()
+    per_thread = total_ops // num_threads
+    start_barrier = threading.Barrier(num_threads + 1)
+
+    def worker():
+        start_barrier.wait()
+        for _ in range(per_thread):
+            op(fixture)
+
+    threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+    for thread in threads:
+        thread.start()
+
+    start_barrier.wait()
+    start = time.time()
+    for thread in threads:
+        thread.join()
+
+    return (per_thread * num_threads) / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=[1, 2, 4, 8])
+    parser.add_argument('--ops', type=int, default=2000,
+                        help="the total number of calls per run")
+    parser.add_argument('operations', nargs='*', metavar='operation',
+                        help="the operations to run (default: all of {0})"
+                             .format(', '.join(sorted(OPERATIONS))))
+    args = parser.parse_args()
+
+    unknown = set(args.operations) - set(OPERATIONS)
+    if unknown:
+        parser.error("unknown operations: {0}".format(
+            ', '.join(sorted(unknown))))
+
+    operations = args.operations or sorted(OPERATIONS)
+
+    fixture = Fixture()
+    try:
+        print("{0:<16} {1:>8} {2:>12} {3:>8}".format('operation', 'threads',
+                                                     'ops/s', 'scaling'))
+        for name in operations:
+            base_rate = None
+            for num_threads in args.threads:
+                rate = run(fixture, OPERATIONS[name], num_threads, args.ops)
+                if base_rate is None:
+                    base_rate = rate
+
+                print("{0:<16} {1:>8} {2:>12.0f} {3:>7.2f}x".format(
+                    name, num_threads, rate, rate / base_rate))
+    finally:
+        fixture.stop()
+
+
+if __name__ == '__main__':
+    main()
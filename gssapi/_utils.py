@@ -1,8 +1,9 @@
+import functools
+import struct
 import sys
 import types
 
 import six
-import decorator as deco
 
 from gssapi.raw.misc import GSSError
 
@@ -68,6 +69,168 @@ def inquire_property(name, doc=None):
     return property(inquire_property, doc=doc)
 
 
+# the length prefix used to frame wrapped tokens in a stream
+FRAME_HEADER = struct.Struct('!I')
+
+# the default maximum size of a single frame read from a stream
+DEFAULT_MAX_FRAME_SIZE = 1024 * 1024
+
+
+def _read_into(source, view):
+    """Fill a buffer from a file-like object
+
+    This method calls :python:`readinto` on the source until the
+    given buffer is full, or the end of the file has been reached.
+
+    Args:
+        source: a file-like object with a :python:`readinto` method
+        view (memoryview): the buffer to fill
+
+    Returns:
+        int: the number of bytes read (less than the size of the buffer
+            only at the end of the file)
+    """
+
+    pos = 0
+    total = len(view)
+    while pos < total:
+        amt = source.readinto(view[pos:])
+        if not amt:
+            break
+        pos += amt
+
+    return pos
+
+
+def iter_chunks(source, chunk_size):
+    """Split a stream of bytes into fixed-size chunks
+
+    This method reads the given file-like object (anything with a
+    :python:`readinto` method) or iterable of byte strings, and yields
+    chunks of exactly `chunk_size` bytes (except for the last chunk,
+    which may be shorter).
+
+    The chunks are :python:`memoryview` slices of a single reused buffer,
+    so each chunk is only valid until the next one is requested.
+
+    Args:
+        source: a file-like object, or an iterable of byte strings
+        chunk_size (int): the size of each chunk
+
+    Yields:
+        memoryview: each chunk
+    """
+
+    buff = memoryview(bytearray(chunk_size))
+
+    if hasattr(source, 'readinto'):
+        while True:
+            amt = _read_into(source, buff)
+            if amt:
+                yield buff[:amt]
+
+            if amt < chunk_size:
+                return
+
+    pos = 0
+    for piece in source:
+        piece = memoryview(piece)
+        while len(piece):
+            amt = min(chunk_size - pos, len(piece))
+            buff[pos:pos + amt] = piece[:amt]
+            piece = piece[amt:]
+            pos += amt
+
+            if pos == chunk_size:
+                yield buff
+                pos = 0
+
+    if pos:
+        yield buff[:pos]
+
+
+def _check_frame_size(length, max_size):
+    if length > max_size:
+        raise ValueError("The frame ({0} bytes) is larger than the maximum "
+                         "frame size ({1} bytes)".format(length, max_size))
+
+
+def iter_frames(source, max_size=DEFAULT_MAX_FRAME_SIZE):
+    """Split a stream of bytes into length-prefixed frames
+
+    This method reads the given file-like object (anything with a
+    :python:`readinto` method) or iterable of byte strings, and yields
+    the contents of each frame, where each frame is prefixed by its
+    length as a 4-byte big-endian integer (see :data:`FRAME_HEADER`).
+
+    When reading from a file-like object, the frames are
+    :python:`memoryview` slices of a reused buffer, so each frame is only
+    valid until the next one is requested.
+
+    Since the length prefixes come from the stream, frames larger than
+    `max_size` are rejected before any memory is allocated for them.
+
+    Args:
+        source: a file-like object, or an iterable of byte strings
+        max_size (int): the maximum size of a single frame
+
+    Yields:
+        memoryview: the contents of each frame
+
+    Raises:
+        ValueError: the stream ended partway through a frame, or a frame
+            was larger than `max_size`
+    """
+
+    header_size = FRAME_HEADER.size
+
+    if hasattr(source, 'readinto'):
+        header = bytearray(header_size)
+        header_view = memoryview(header)
+        buff = bytearray()
+
+        while True:
+            amt = _read_into(source, header_view)
+            if not amt:
+                return
+            elif amt < header_size:
+                raise ValueError("The stream ended partway through a "
+                                 "frame header")
+
+            length = FRAME_HEADER.unpack_from(header)[0]
+            _check_frame_size(length, max_size)
+            if len(buff) < length:
+                # the previous frame may still be in use, so replace the buffer
+                # rather than resize it
+                buff = bytearray(length)
+
+            frame = memoryview(buff)[:length]
+            if _read_into(source, frame) < length:
+                raise ValueError("The stream ended partway through a frame")
+
+            yield frame
+
+    pending = bytearray()
+    for piece in source:
+        pending += piece
+
+        pos = 0
+        while len(pending) - pos >= header_size:
+            length = FRAME_HEADER.unpack_from(pending, pos)[0]
+            _check_frame_size(length, max_size)
+            end = pos + header_size + length
+            if len(pending) < end:
+                break
+
+            yield memoryview(bytes(pending[pos + header_size:end]))
+            pos = end
+
+        del pending[:pos]
+
+    if pending:
+        raise ValueError("The stream ended partway through a frame")
+
+
 # use UTF-8 as the default encoding, like Python 3
 _ENCODING = 'UTF-8'
 
@@ -109,9 +272,29 @@ def _encode_dict(d):
     return dict((enc(k), enc(v)) for k, v in six.iteritems(d))
 
 
-# in case of Python 3, just use exception chaining
-@deco.decorator
-def catch_and_return_token(func, self, *args, **kwargs):
+def _raise_last_err(self):
+    """Raise (and clear) the deferred error stored on an object
+
+    This method also switches the object back to its original class
+    (see :class:`CheckLastError`).
+    """
+
+    err = self._last_err
+    self._last_err = None
+    self.__class__ = type(self)._checked_class
+
+    if six.PY2:
+        tb = self._last_tb
+        del self._last_tb  # in case of cycles, break glass
+        six.reraise(type(err), err, tb)
+    else:
+        # NB(directxman12): not using six.reraise in Python 3 leads
+        #                   to cleaner tracebacks, and raise x is valid
+        #                   syntax in Python 3 (unlike raise x, y, z)
+        raise err
+
+
+def catch_and_return_token(func):
     """Optionally defer exceptions and return a token instead
 
     When `__DEFER_STEP_ERRORS__` is set on the implementing class
@@ -120,68 +303,67 @@ def catch_and_return_token(func, self, *args, **kwargs):
     instead return the result token attached to the exception.
 
     The exception can be later retrived through :python:`_last_err`
-    (and :python:`_last_tb` when Python 2 is in use).
+    (and :python:`_last_tb` when Python 2 is in use), and will be raised
+    by the next checked method call (see :class:`CheckLastError`).
     """
 
-    try:
-        return func(self, *args, **kwargs)
-    except GSSError as e:
-        if e.token is not None and self.__DEFER_STEP_ERRORS__:
-            self._last_err = e
-            # skip the "return func" line above in the traceback
-            if six.PY2:
-                self._last_tb = sys.exc_info()[2].tb_next.tb_next
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        except GSSError as e:
+            if e.token is not None and self.__DEFER_STEP_ERRORS__:
+                self._last_err = e
+                # skip the "return func" line above in the traceback
+                if six.PY2:
+                    self._last_tb = sys.exc_info()[2].tb_next.tb_next
+                else:
+                    self._last_err.__traceback__ = e.__traceback__.tb_next
+
+                self.__class__ = type(self)._pending_error_class()
+                return e.token
             else:
-                self._last_err.__traceback__ = e.__traceback__.tb_next
+                raise
 
-            return e.token
-        else:
-            raise
+    return wrapper
 
 
-@deco.decorator
-def check_last_err(func, self, *args, **kwargs):
+def check_last_err(func):
     """Check and raise deferred errors before running the function
 
-    This method checks :python:`_last_err` before running the wrapped
-    function.  If present and not None, the exception will be raised
-    with its original traceback.
+    This marks a private method (or a property's getter) to be checked
+    for a deferred error (in addition to the public methods, which are
+    always checked).  If present, the exception will be raised with its
+    original traceback instead of running the function.
+
+    The function itself is returned unchanged: see :class:`CheckLastError`
+    for how the check is performed.
     """
 
-    if self._last_err is not None:
-        try:
-            if six.PY2:
-                six.reraise(type(self._last_err), self._last_err,
-                            self._last_tb)
-            else:
-                # NB(directxman12): not using six.reraise in Python 3 leads
-                #                   to cleaner tracebacks, and raise x is valid
-                #                   syntax in Python 3 (unlike raise x, y, z)
-                raise self._last_err
-        finally:
-            if six.PY2:
-                del self._last_tb  # in case of cycles, break glass
-
-            self._last_err = None
-    else:
-        return func(self, *args, **kwargs)
-
-    @deco.decorator
-    def check_last_err(func, self, *args, **kwargs):
-        if self._last_err is not None:
-            try:
-                raise self._last_err
-            finally:
-                self._last_err = None
-        else:
-            return func(self, *args, **kwargs)
+    func._check_last_err = True
+    return func
+
+
+def _check_pending(func):
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        _raise_last_err(self)
+
+    return wrapper
 
 
 class CheckLastError(type):
     """Check for a deferred error on all methods
 
-    This metaclass applies the :python:`check_last_err` decorator
-    to all methods not prefixed by '_'.
+    Deferred errors are checked for on all methods not prefixed by '_',
+    as well as any methods or property getters marked with
+    :python:`check_last_err`.
+
+    To avoid any overhead when no error has been deferred, the methods
+    themselves are not wrapped.  Instead, when an error is deferred, the
+    object's class is switched to a subclass (created on first use) whose
+    checked methods raise the deferred error and switch the object back
+    to its original class.
 
     Additionally, it enabled `__DEFER_STEP_ERRORS__` by default.
     """
@@ -189,14 +371,45 @@ class CheckLastError(type):
     def __new__(cls, name, parents, attrs):
         attrs['__DEFER_STEP_ERRORS__'] = True
 
-        for attr_name in attrs:
-            attr = attrs[attr_name]
-
-            # wrap only methods
-            if not isinstance(attr, types.FunctionType):
-                continue
-
-            if attr_name[0] != '_':
-                attrs[attr_name] = check_last_err(attr)
-
         return super(CheckLastError, cls).__new__(cls, name, parents, attrs)
+
+    def _pending_error_class(cls):
+        # an error may be deferred while another one is already pending,
+        # so always start from the original class (rather than creating
+        # a pending class of the pending class)
+        cls = cls.__dict__.get('_checked_class', cls)
+
+        pending_cls = cls.__dict__.get('_pending_error_cls')
+        if pending_cls is not None:
+            return pending_cls
+
+        attrs = {
+            '__slots__': (),
+            '__module__': cls.__module__,
+            '__doc__': cls.__doc__,
+            '_checked_class': cls,
+        }
+
+        seen = set()
+        for klass in cls.__mro__:
+            for attr_name, attr in vars(klass).items():
+                if attr_name in seen:
+                    continue
+                seen.add(attr_name)
+
+                if isinstance(attr, types.FunctionType):
+                    if (attr_name[0] != '_' or
+                            getattr(attr, '_check_last_err', False)):
+                        attrs[attr_name] = _check_pending(attr)
+                elif (isinstance(attr, property) and
+                        getattr(attr.fget, '_check_last_err', False)):
+                    attrs[attr_name] = property(_check_pending(attr.fget),
+                                                attr.fset, attr.fdel,
+                                                attr.__doc__)
+
+        # skip CheckLastError.__new__, so that the subclass inherits
+        # __DEFER_STEP_ERRORS__
+        pending_cls = type.__new__(CheckLastError, cls.__name__, (cls,),
+                                   attrs)
+        cls._pending_error_cls = pending_cls
+        return pending_cls
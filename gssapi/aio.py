@@ -0,0 +1,117 @@
+"""asyncio Support for Security Context Establishment
+
+This module drives the establishment of high-level security contexts
+from :mod:`asyncio` coroutines.  Steps which may block on the network
+(the first initiator step, which may need to fetch a service ticket from
+the KDC) are run in a shared, bounded thread pool, while purely local
+steps are run directly, so that many contexts can be established
+concurrently without blocking the event loop or using a thread for each.
+
+This module requires Python 3.5 or newer.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+
+# the default maximum number of steps run in the thread pool at once
+DEFAULT_MAX_WORKERS = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# get_running_loop was added in Python 3.7 (before that, get_event_loop
+# returned the running loop when called from a coroutine)
+_get_running_loop = getattr(asyncio, 'get_running_loop',
+                            asyncio.get_event_loop)
+
+
+def set_executor(executor):
+    """Set the executor used to run blocking steps
+
+    By default, a :class:`concurrent.futures.ThreadPoolExecutor` with
+    :data:`DEFAULT_MAX_WORKERS` threads is created on first use.
+
+    Args:
+        executor (concurrent.futures.Executor): the executor to use
+            (or None to use the default executor)
+    """
+
+    global _executor
+    with _executor_lock:
+        _executor = executor
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                DEFAULT_MAX_WORKERS)
+
+        return _executor
+
+
+def _may_block(ctx, token):
+    # accepting only needs the local keytab, and the later initiator steps only
+    # process the acceptor's reply, but the first initiator step may need to
+    # get a ticket for the target from the KDC
+    return ctx.usage == 'initiate' and token is None
+
+
+async def step(ctx, token=None):
+    """Perform a negotiation step without blocking the event loop
+
+    This method performs a negotiation step, like
+    :meth:`~gssapi.sec_contexts.SecurityContext.step`.  Steps which may
+    block on the network are run in the executor (see
+    :func:`set_executor`); other steps are run directly.
+
+    Args:
+        ctx (SecurityContext): the security context
+        token (bytes): the input token from the other participant's step
+
+    Returns:
+        bytes: the output token to send to the other participant
+    """
+
+    if not _may_block(ctx, token):
+        return ctx.step(token)
+
+    loop = _get_running_loop()
+    return await loop.run_in_executor(_get_executor(), ctx.step, token)
+
+
+async def establish(ctx, send, recv):
+    """Establish a security context
+
+    This method performs negotiation steps on the given security context
+    until it is complete, sending output tokens with `send` and receiving
+    input tokens with `recv`.  Accepting contexts start by receiving
+    a token, while initiating contexts start by sending one.
+
+    Args:
+        ctx (SecurityContext): the security context
+        send: a coroutine function taking a token to send to the other
+            participant
+        recv: a coroutine function returning the next token received from
+            the other participant
+
+    Returns:
+        SecurityContext: the (now complete) security context
+    """
+
+    token = None
+    if ctx.usage == 'accept':
+        token = await recv()
+
+    while True:
+        out_token = await step(ctx, token)
+        if out_token:
+            await send(out_token)
+
+        if ctx.complete:
+            return ctx
+
+        token = await recv()
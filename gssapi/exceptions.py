@@ -1,5 +1,6 @@
 from gssapi.raw.exceptions import *  # noqa
 from gssapi.raw.misc import GSSError  # noqa
+from gssapi.raw.exceptions import EncryptionNotUsedError
 
 """High-Level API Errors
 
@@ -26,7 +27,7 @@ class UnknownUsageError(GeneralError):
     MAJOR_MESSAGE = "Unable to determine {obj} usage"
 
 
-class EncryptionNotUsed(GeneralError):
+class EncryptionNotUsed(GeneralError, EncryptionNotUsedError):
     """An Error indicating that encryption was requested, but not used"""
     MAJOR_MESSAGE = "Confidentiality was requested, but not used"
 
@@ -0,0 +1,274 @@
+"""Proactive Expiry Notifications
+
+This module notifies the application shortly before security contexts
+and credentials expire, so that they can be renewed (e.g. by
+re-authenticating, or establishing a new security context) before they
+cause errors in the middle of a request.
+
+.. code-block:: python
+
+    scheduler = ExpiryScheduler(margin=60)
+    scheduler.register(ctx, lambda ctx: renew_connection(ctx))
+
+All registered objects are tracked in a single heap, ordered by
+expiry time, and callbacks are called from a single background thread.
+Applications using :mod:`asyncio` can pass the notification on to their
+event loop with :meth:`asyncio.AbstractEventLoop.call_soon_threadsafe`.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+import traceback
+import weakref
+
+from gssapi.raw.misc import GSSError
+
+
+# the default number of seconds before expiry at which to fire callbacks
+DEFAULT_MARGIN = 60.0
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+def _cancel_collected(entry_ref):
+    # the weak reference to the registration keeps the registration and its
+    # own weak reference to the object from forming a cycle
+    def callback(obj_ref):
+        entry = entry_ref()
+        if entry is not None:
+            entry.cancel()
+
+    return callback
+
+
+def _remaining_lifetime(obj):
+    # both SecurityContext and Credentials have a lifetime property (None means
+    # "never expires")
+    try:
+        return obj.lifetime
+    except GSSError:
+        # the object has already expired (or is otherwise unusable)
+        return 0
+
+
+class ScheduledExpiry(object):
+    """A registration with an :class:`ExpiryScheduler`
+
+    Attributes:
+        expires_at (float): the time (according to :func:`time.monotonic`)
+            at which the object was expected to expire when it was
+            registered, or None if it never expires
+        fire_at (float): the time at which the callback will be called,
+            or None if it will never be called
+        cancelled (bool): whether or not the registration was cancelled
+            (registrations are cancelled automatically once the object is
+            garbage collected)
+    """
+
+    def __init__(self, obj, callback, expires_at, fire_at):
+        self._ref = weakref.ref(obj, _cancel_collected(weakref.ref(self)))
+        self._callback = callback
+        self.expires_at = expires_at
+        self.fire_at = fire_at
+        self.cancelled = False
+
+        # the scheduler whose heap holds this registration, if any
+        self._scheduler = None
+
+    def cancel(self):
+        """Cancel the callback, if it has not been called yet"""
+        self.cancelled = True
+        self._callback = None
+
+        scheduler = self._scheduler
+        if scheduler is not None:
+            scheduler._discard(self)
+
+
+class ExpiryScheduler(object):
+    """Calls callbacks shortly before objects expire
+
+    Security contexts and credentials are registered with a callback,
+    which is called (from the scheduler's background thread) `margin`
+    seconds before the object's remaining lifetime runs out (or right
+    away, if less than `margin` seconds remain).  The callback is called
+    with the object, and is only called once.
+
+    The scheduler only keeps weak references to the registered objects,
+    so registering an object does not keep it alive.
+
+    Args:
+        margin (float): the default number of seconds before expiry at
+            which to call the callbacks
+    """
+
+    def __init__(self, margin=DEFAULT_MARGIN):
+        self.margin = margin
+
+        self._heap = []
+        # the number of cancelled registrations still in the heap
+        self._num_cancelled = 0
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def register(self, obj, callback, margin=None):
+        """Call a function shortly before an object expires
+
+        Args:
+            obj (SecurityContext or Credentials): the object to track
+            callback: a function taking the object
+            margin (float): the number of seconds before expiry at which
+                to call the function (or None to use the scheduler's
+                default margin)
+
+        Returns:
+            ScheduledExpiry: the registration, which may be cancelled
+
+        Raises:
+            ValueError: the scheduler has been closed
+        """
+
+        if margin is None:
+            margin = self.margin
+
+        lifetime = _remaining_lifetime(obj)
+        now = _monotonic()
+
+        if lifetime is None:
+            # never expires, so there's nothing to schedule
+            return ScheduledExpiry(obj, callback, None, None)
+
+        expires_at = now + lifetime
+        entry = ScheduledExpiry(obj, callback, expires_at,
+                                expires_at - margin)
+
+        with self._cond:
+            if self._closed:
+                raise ValueError("The expiry scheduler has been closed")
+
+            # cancelled registrations are normally only dropped once they
+            # reach the top of the heap, which may be hours away, so drop them
+            # all at once when they make up most of the heap
+            if self._num_cancelled * 2 > len(self._heap):
+                self._compact()
+
+            entry._scheduler = self
+            heapq.heappush(self._heap, (entry.fire_at, next(self._sequence),
+                                        entry))
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name='gssapi-expiry')
+                self._thread.daemon = True
+                self._thread.start()
+
+            # only wake up the thread if this is the new earliest entry
+            if self._heap[0][2] is entry:
+                self._cond.notify()
+
+        return entry
+
+    def _discard(self, entry):
+        # called when a registration is cancelled (possibly from a weak
+        # reference callback, in any thread, while the heap is being
+        # modified), so this only counts the registration, leaving it to be
+        # dropped from the heap later
+        with self._cond:
+            if entry._scheduler is self:
+                entry._scheduler = None
+                self._num_cancelled += 1
+
+    def _compact(self):
+        # called with the condition held
+        heap = []
+        for item in self._heap:
+            if item[2].cancelled:
+                # don't let a cancellation still in progress count it
+                item[2]._scheduler = None
+            else:
+                heap.append(item)
+
+        heapq.heapify(heap)
+        self._heap = heap
+        self._num_cancelled = 0
+
+    def _next_due(self):
+        # called with the condition held
+        while not self._closed:
+            if not self._heap:
+                self._cond.wait()
+                continue
+
+            fire_at, _, entry = self._heap[0]
+            if entry.cancelled:
+                heapq.heappop(self._heap)
+                if entry._scheduler is None:
+                    self._num_cancelled -= 1
+                else:
+                    # cancelled, but not yet counted by _discard
+                    entry._scheduler = None
+                continue
+
+            delay = fire_at - _monotonic()
+            if delay > 0:
+                self._cond.wait(delay)
+                continue
+
+            heapq.heappop(self._heap)
+            entry._scheduler = None
+            return entry
+
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                entry = self._next_due()
+                if entry is None:
+                    return
+
+                callback = entry._callback
+                entry._callback = None
+
+            obj = entry._ref()
+            if obj is None or callback is None:
+                continue
+
+            try:
+                callback(obj)
+            except Exception:
+                # report the error like an uncaught exception in a thread
+                # would, but keep the thread alive for the other callbacks
+                traceback.print_exc()
+
+    def close(self):
+        """Stop the background thread, cancelling all pending callbacks"""
+
+        with self._cond:
+            self._closed = True
+            heap = self._heap
+            self._heap = []
+            self._num_cancelled = 0
+            for _, _, entry in heap:
+                entry._scheduler = None
+                entry.cancel()
+            self._cond.notify()
+
+        if (self._thread is not None and
+                self._thread is not threading.current_thread()):
+            self._thread.join()
+
+    def __len__(self):
+        with self._cond:
+            return sum(1 for _, _, entry in self._heap
+                       if not entry.cancelled and entry._ref() is not None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
@@ -0,0 +1,265 @@
+"""Protect and unprotect files with a GSSAPI security context
+
+This module wraps (protects) and unwraps (unprotects) whole files using
+an established security context.  A protected file is a series of
+records, each consisting of a wrapped token prefixed by its length as a
+4-byte big-endian integer (the same format produced by
+:meth:`gssapi.sec_contexts.SecurityContext.wrap_stream`).
+
+Both the input and output files are memory-mapped, and each record is
+wrapped or unwrapped directly from the input mapping into the output
+mapping, so arbitrarily large files can be processed in bounded memory.
+Memory-mapped files must support the buffer protocol, so this module
+requires Python 3.
+
+This module may also be run as a script, e.g.:
+
+.. code-block:: sh
+
+    python -m gssapi.file protect --context ctx.tok plain.dat protected.dat
+    python -m gssapi.file unprotect --context ctx.tok protected.dat plain.dat
+
+where the context file contains a security context exported with
+:meth:`gssapi.sec_contexts.SecurityContext.export`.
+"""
+
+import argparse
+import mmap
+import os
+import sys
+import time
+
+from gssapi.raw import message as rmessage
+from gssapi.raw.types import RequirementFlag
+
+import gssapi.exceptions as excs
+from gssapi import _utils
+from gssapi.sec_contexts import SecurityContext
+
+
+# the default maximum size of each wrapped record
+DEFAULT_RECORD_SIZE = 64 * 1024
+
+
+def _map_input(in_file):
+    size = os.fstat(in_file.fileno()).st_size
+    if not size:
+        # empty files can't be memory-mapped
+        return memoryview(b'')
+
+    return memoryview(mmap.mmap(in_file.fileno(), size,
+                                access=mmap.ACCESS_READ))
+
+
+def _map_output(out_file, size):
+    out_file.truncate(size)
+    return memoryview(mmap.mmap(out_file.fileno(), size))
+
+
+def _release(view):
+    # close the mapping right away, instead of waiting for it to be collected
+    obj = view.obj
+    view.release()
+    if isinstance(obj, mmap.mmap):
+        obj.close()
+
+
+def protect_file(context, in_path, out_path,
+                 max_record_size=DEFAULT_RECORD_SIZE, encrypt=True):
+    """Protect (wrap) a file
+
+    This method splits the input file into chunks small enough to fit
+    in records of at most `max_record_size` bytes (as calculated by
+    :meth:`~gssapi.sec_contexts.SecurityContext.get_wrap_size_limit`),
+    and writes each wrapped chunk to the output file as a length-prefixed
+    record.
+
+    Args:
+        context (SecurityContext): the established security context
+        in_path (str): the path of the file to protect
+        out_path (str): the path of the protected file to write
+        max_record_size (int): the maximum size of each wrapped record,
+            not including its length prefix
+        encrypt (bool): whether or not to encrypt the file
+
+    Returns:
+        int: the size of the protected file
+
+    Raises:
+        EncryptionNotUsed: encryption was requested, but not used
+        ValueError: `max_record_size` is too small to hold any data
+    """
+
+    chunk_size = context.get_wrap_size_limit(max_record_size, encrypt)
+    if chunk_size <= 0:
+        raise ValueError("The maximum record size is too small to hold "
+                         "any data")
+
+    header_size = _utils.FRAME_HEADER.size
+
+    with open(in_path, 'rb') as in_file, open(out_path, 'w+b') as out_file:
+        in_view = _map_input(in_file)
+        try:
+            num_records = -(-len(in_view) // chunk_size)
+            max_size = num_records * (header_size + max_record_size)
+            if not max_size:
+                return 0
+
+            out_view = _map_output(out_file, max_size)
+            out_pos = 0
+            chunk = None
+            try:
+                for in_pos in range(0, len(in_view), chunk_size):
+                    chunk = in_view[in_pos:in_pos + chunk_size]
+                    res = rmessage.wrap_into(context, chunk, out_view,
+                                             encrypt,
+                                             headroom=out_pos + header_size)
+                    if encrypt and not res.encrypted:
+                        raise excs.EncryptionNotUsed("Wrapped message was "
+                                                     "not encrypted")
+
+                    _utils.FRAME_HEADER.pack_into(out_view, out_pos,
+                                                  res.length)
+                    out_pos += header_size + res.length
+            finally:
+                # the mapping can't be closed while slices of it are still
+                # alive
+                chunk = None
+                _release(out_view)
+
+            out_file.truncate(out_pos)
+            return out_pos
+        finally:
+            _release(in_view)
+
+
+def unprotect_file(context, in_path, out_path):
+    """Unprotect (unwrap) a file
+
+    This method unwraps each record of a file written by
+    :func:`protect_file`, and writes the unwrapped data to the
+    output file.  As with
+    :meth:`~gssapi.sec_contexts.SecurityContext.decrypt`, an exception
+    will be raised if encryption was used by the context, but not by
+    a record.
+
+    Args:
+        context (SecurityContext): the established security context
+        in_path (str): the path of the protected file
+        out_path (str): the path of the unprotected file to write
+
+    Returns:
+        int: the size of the unprotected file
+
+    Raises:
+        EncryptionNotUsed: encryption was expected, but not used
+        ValueError: the protected file ended partway through a record
+    """
+
+    header_size = _utils.FRAME_HEADER.size
+    check_conf = None
+
+    with open(in_path, 'rb') as in_file, open(out_path, 'w+b') as out_file:
+        in_view = _map_input(in_file)
+        try:
+            # the unwrapped data is always smaller than the wrapped data
+            if not len(in_view):
+                return 0
+
+            out_view = _map_output(out_file, len(in_view))
+            in_pos = 0
+            out_pos = 0
+            token = None
+            try:
+                while in_pos < len(in_view):
+                    if len(in_view) - in_pos < header_size:
+                        raise ValueError("The file ended partway through a "
+                                         "record header")
+
+                    length = _utils.FRAME_HEADER.unpack_from(in_view,
+                                                             in_pos)[0]
+                    in_pos += header_size
+                    if len(in_view) - in_pos < length:
+                        raise ValueError("The file ended partway through a "
+                                         "record")
+
+                    token = in_view[in_pos:in_pos + length]
+                    res = rmessage.unwrap_into(context, token,
+                                               out_view[out_pos:])
+                    in_pos += length
+                    out_pos += res.length
+
+                    if not res.encrypted:
+                        if check_conf is None:
+                            check_conf = bool(context.actual_flags &
+                                              RequirementFlag.confidentiality)
+
+                        if check_conf:
+                            raise excs.EncryptionNotUsed("The context was "
+                                                         "established with "
+                                                         "encryption, but a "
+                                                         "record was not "
+                                                         "encrypted")
+            finally:
+                token = None
+                _release(out_view)
+
+            out_file.truncate(out_pos)
+            return out_pos
+        finally:
+            _release(in_view)
+
+
+def main(argv=None):
+    """Run the file protection command line tool
+
+    Args:
+        argv ([str]): the command line arguments
+            (or None to use :data:`sys.argv`)
+
+    Returns:
+        int: the exit status
+    """
+
+    parser = argparse.ArgumentParser(
+        prog='python -m gssapi.file',
+        description="Protect or unprotect a file with a GSSAPI security "
+                    "context exported with SecurityContext.export()")
+    parser.add_argument('action', choices=('protect', 'unprotect'))
+    parser.add_argument('input', help="the file to read")
+    parser.add_argument('output', help="the file to write")
+    parser.add_argument('--context', required=True,
+                        help="a file containing the exported security "
+                             "context")
+    parser.add_argument('--record-size', type=int,
+                        default=DEFAULT_RECORD_SIZE,
+                        help="the maximum size of each protected record "
+                             "(default: %(default)s)")
+    parser.add_argument('--no-encrypt', dest='encrypt',
+                        action='store_false',
+                        help="only sign, and do not encrypt, the records")
+
+    args = parser.parse_args(argv)
+
+    with open(args.context, 'rb') as context_file:
+        context = SecurityContext(token=context_file.read())
+
+    start = time.time()
+    if args.action == 'protect':
+        out_size = protect_file(context, args.input, args.output,
+                                args.record_size, args.encrypt)
+    else:
+        out_size = unprotect_file(context, args.input, args.output)
+    elapsed = time.time() - start
+
+    in_size = os.path.getsize(args.input)
+    rate = in_size / elapsed / (1024 * 1024) if elapsed else float('inf')
+    sys.stderr.write("{0}ed {1} bytes into {2} bytes in {3:.3f}s "
+                     "({4:.1f} MB/s)\n".format(args.action, in_size,
+                                               out_size, elapsed, rate))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
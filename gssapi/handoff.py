@@ -0,0 +1,282 @@
+"""Bulk Handoff of Security Contexts Between Processes
+
+This module moves many established security contexts from one process
+to another at once (e.g. from the master process of a prefork server to
+a worker).  The contexts are exported into a single buffer (optionally
+in a :mod:`multiprocessing.shared_memory` segment), along with an index
+of where each export token starts, and the receiving process imports
+each context lazily, the first time it is used.
+
+.. code-block:: python
+
+    # in the sending process
+    shm = export_contexts(contexts)
+    send_to_worker(shm.name)
+    shm.close()
+
+    # in the receiving process
+    with import_contexts(shm_name) as bundle:
+        ctx = bundle[i]  # imported here
+
+Shared memory segments require Python 3.8 or newer (other buffers may be
+used with :func:`pack_contexts` and :func:`import_contexts` on any
+version).
+"""
+
+import struct
+
+import six
+
+from gssapi.raw import sec_contexts as rsec_contexts
+
+from gssapi import _utils
+from gssapi.sec_contexts import SecurityContext
+
+
+# the bundle header: a magic number and the number of contexts
+_HEADER = struct.Struct('!4sI')
+# each index entry: the offset and length of an export token
+_INDEX_ENTRY = struct.Struct('!II')
+_MAGIC = b'GSCX'
+
+
+def _export_tokens(contexts):
+    # raise any deferred step error (as SecurityContext.export would) before
+    # any of the contexts are exported, so that none of them are lost
+    contexts = list(contexts)
+    for ctx in contexts:
+        if ctx._last_err is not None:
+            _utils._raise_last_err(ctx)
+
+    # the tokens are kept as GSSBuffers, so that they are only copied once
+    # (into the bundle)
+    tokens = [rsec_contexts.export_sec_context(ctx, as_buffer=True)
+              for ctx in contexts]
+    size = (_HEADER.size + _INDEX_ENTRY.size * len(tokens) +
+            sum(len(token) for token in tokens))
+    return (tokens, size)
+
+
+def _pack_into(buff, tokens):
+    _HEADER.pack_into(buff, 0, _MAGIC, len(tokens))
+
+    index_pos = _HEADER.size
+    data_pos = index_pos + _INDEX_ENTRY.size * len(tokens)
+    for token in tokens:
+        _INDEX_ENTRY.pack_into(buff, index_pos, data_pos, len(token))
+        buff[data_pos:data_pos + len(token)] = memoryview(token)
+        index_pos += _INDEX_ENTRY.size
+        data_pos += len(token)
+
+
+def pack_contexts(contexts):
+    """Export many security contexts into a single buffer
+
+    Exporting a context deactivates it in this process, so the contexts
+    may no longer be used afterwards.  If exporting any of the contexts
+    fails, the contexts exported before it are lost.  A context with a
+    deferred step error has its error raised before any of the contexts
+    are exported.
+
+    Args:
+        contexts ([SecurityContext]): the contexts to export
+
+    Returns:
+        bytearray: the bundle of exported contexts, which may be
+            passed to :func:`import_contexts`
+
+    Raises:
+        ~gssapi.exceptions.GSSError
+    """
+
+    tokens, size = _export_tokens(contexts)
+    buff = bytearray(size)
+    _pack_into(memoryview(buff), tokens)
+    return buff
+
+
+def export_contexts(contexts, name=None):
+    """Export many security contexts into a shared memory segment
+
+    This works like :func:`pack_contexts`, except that the bundle is
+    written directly into a new shared memory segment.  The caller is
+    responsible for closing the segment (and for making sure that it is
+    eventually unlinked, e.g. by the receiving process).
+
+    This method requires Python 3.8 or newer.
+
+    Args:
+        contexts ([SecurityContext]): the contexts to export
+        name (str): the name of the shared memory segment
+            (or None to generate a name)
+
+    Returns:
+        multiprocessing.shared_memory.SharedMemory: the shared memory
+            segment containing the bundle
+
+    Raises:
+        ~gssapi.exceptions.GSSError
+    """
+
+    from multiprocessing import shared_memory
+
+    tokens, size = _export_tokens(contexts)
+    shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    try:
+        _pack_into(shm.buf, tokens)
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+
+    return shm
+
+
+def _attach(name):
+    from multiprocessing import shared_memory
+
+    try:
+        # without track=False, the resource tracker would unlink the segment
+        # when this process exits, even though the sender created it
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # track was added in Python 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
+class ContextBundle(object):
+    """A sequence of lazily imported security contexts
+
+    Each context is imported the first time it is accessed, and the
+    same :class:`~gssapi.sec_contexts.SecurityContext` object is
+    returned on later accesses (an exported context may only be
+    imported once).  Slicing the bundle imports each context in the
+    slice, and returns a list of them.
+
+    The bundle keeps a view of the underlying buffer until it is closed,
+    after which contexts which have not yet been imported can no longer
+    be imported.
+    """
+
+    def __init__(self, buff, shm=None):
+        self._shm = shm
+        self._view = memoryview(buff)
+
+        try:
+            self._index = self._read_index()
+        except ValueError:
+            self._view = None
+            raise
+
+        self._contexts = [None] * len(self._index)
+
+    def _read_index(self):
+        if len(self._view) < _HEADER.size:
+            raise ValueError("The buffer is too small to hold a bundle of "
+                             "security contexts")
+
+        magic, count = _HEADER.unpack_from(self._view)
+        if magic != _MAGIC:
+            raise ValueError("The buffer does not contain a bundle of "
+                             "security contexts")
+
+        index_end = _HEADER.size + _INDEX_ENTRY.size * count
+        if len(self._view) < index_end:
+            raise ValueError("The bundle of security contexts is truncated")
+
+        index = [_INDEX_ENTRY.unpack_from(self._view, pos)
+                 for pos in range(_HEADER.size, index_end, _INDEX_ENTRY.size)]
+        for offset, length in index:
+            if offset + length > len(self._view):
+                raise ValueError("The bundle of security contexts is "
+                                 "truncated")
+
+        return index
+
+    def __len__(self):
+        return len(self._contexts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        ctx = self._contexts[index]
+        if ctx is None:
+            if self._view is None:
+                raise ValueError("The bundle of security contexts has "
+                                 "been closed")
+
+            offset, length = self._index[index]
+            token = self._view[offset:offset + length]
+            try:
+                ctx = SecurityContext(token=token)
+            finally:
+                # shared memory can't be closed while views of it are still
+                # alive
+                if not six.PY2:
+                    token.release()
+
+            self._contexts[index] = ctx
+
+        return ctx
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self, unlink=False):
+        """Release the underlying buffer
+
+        Args:
+            unlink (bool): whether or not to also unlink the shared memory
+                segment (if the bundle was imported from one)
+        """
+
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+
+        if self._shm is not None:
+            self._shm.close()
+            if unlink:
+                self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+def import_contexts(source):
+    """Import a bundle of security contexts
+
+    The contexts are imported lazily, the first time each one is
+    accessed.
+
+    Args:
+        source: the bundle, as a bytes-like object (such as the result of
+            :func:`pack_contexts`), a
+            :class:`multiprocessing.shared_memory.SharedMemory` object,
+            or the name of a shared memory segment (Python 3.8+)
+
+    Returns:
+        ContextBundle: the sequence of security contexts
+
+    Raises:
+        ValueError: the source does not contain a valid bundle
+    """
+
+    if isinstance(source, six.text_type):
+        shm = _attach(source)
+        try:
+            return ContextBundle(shm.buf, shm)
+        except BaseException:
+            shm.close()
+            raise
+    elif hasattr(source, 'buf') and hasattr(source, 'unlink'):
+        # the caller owns the SharedMemory object
+        return ContextBundle(source.buf)
+    else:
+        return ContextBundle(source)
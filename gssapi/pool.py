@@ -0,0 +1,245 @@
+"""Pools of Prepared Initiator Security Contexts
+
+This module keeps pools of initiating security contexts whose first
+negotiation step has already been performed, so that establishing a
+context with a frequently used target doesn't have to wait for the
+first step (which, for Kerberos, may need to get a service ticket from
+the KDC) on the critical path.
+
+.. code-block:: python
+
+    pool = ContextPool()
+    pool.warm(target_name)
+
+    # later, for each new connection
+    ctx, token = pool.get(target_name)
+    send(token)
+    while not ctx.complete:
+        token = ctx.step(receive())
+
+Since the first token of a context contains a timestamp which acceptors
+only accept within a limited window, prepared contexts are discarded once
+they are older than the pool's maximum age.  Contexts which use channel
+bindings cannot be prepared ahead of time, since the channel bindings
+are part of the first token.
+"""
+
+import collections
+import threading
+import time
+
+from six.moves import queue
+
+from gssapi.raw import names as rname
+from gssapi.raw import named_tuples as tuples
+from gssapi.raw.types import RequirementFlag, IntEnumFlagSet
+
+from gssapi.sec_contexts import SecurityContext
+
+
+# the default number of prepared contexts kept for each target
+DEFAULT_POOL_SIZE = 4
+# the default number of seconds for which a prepared context may be used
+DEFAULT_MAX_AGE = 60.0
+
+_STOP = object()
+
+
+class _PoolSpec(object):
+    """The arguments used to create the contexts in a pool"""
+
+    def __init__(self, name, mech, flags, creds, lifetime):
+        self.name = name
+        self.mech = mech
+        self.flags = flags
+        self.creds = creds
+        self.lifetime = lifetime
+
+    def create(self):
+        return SecurityContext(name=self.name, mech=self.mech,
+                               flags=self.flags, creds=self.creds,
+                               lifetime=self.lifetime, usage='initiate')
+
+
+class ContextPool(object):
+    """A pool of prepared initiating security contexts
+
+    Prepared contexts are kept separately for each combination of target
+    name, mechanism, flags, credentials, and lifetime.  The pool for a
+    combination is filled in a background thread once the combination
+    has been used with :meth:`warm` or :meth:`get`, and is refilled in the
+    background as contexts are taken from it.
+
+    Args:
+        size (int): the number of prepared contexts to keep for each
+            combination
+        max_age (float): the number of seconds after which a prepared
+            context is discarded
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_age=DEFAULT_MAX_AGE):
+        if size <= 0:
+            raise ValueError("size must be positive")
+
+        self.size = size
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._specs = {}
+        # the keys which are queued to be refilled
+        self._pending = set()
+
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run,
+                                        name='gssapi-context-pool')
+        self._worker.daemon = True
+        self._worker.start()
+
+    @staticmethod
+    def _key(name, mech, flags, creds, lifetime):
+        # names aren't hashable (equality is determined by GSSAPI), so use
+        # their displayed forms
+        disp = rname.display_name(name, name_type=True)
+        if flags is not None:
+            flags = int(IntEnumFlagSet(RequirementFlag, flags))
+
+        return (disp.name, disp.name_type, mech, flags, creds, lifetime)
+
+    def _register(self, name, mech, flags, creds, lifetime):
+        key = self._key(name, mech, flags, creds, lifetime)
+        with self._lock:
+            if key not in self._pools:
+                self._pools[key] = collections.deque()
+                self._specs[key] = _PoolSpec(name, mech, flags, creds,
+                                             lifetime)
+
+        return key
+
+    def _schedule(self, key):
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+
+        self._queue.put(key)
+
+    def warm(self, name, mech=None, flags=None, creds=None, lifetime=None):
+        """Start preparing contexts for a target
+
+        This method returns immediately, and the contexts are prepared in
+        the background (which, for Kerberos, also fetches the service
+        ticket into the credentials cache).
+
+        Args:
+            name (Name): the target name
+            mech (OID): the mechanism to use (or None for the default)
+            flags ([RequirementFlag]): the desired flags
+                (or None for the default flags)
+            creds (Credentials): the initiator credentials to use
+                (or None for the default credentials)
+            lifetime (int): the requested lifetime of the contexts
+                (or None for the default lifetime)
+        """
+
+        self._schedule(self._register(name, mech, flags, creds, lifetime))
+
+    def get(self, name, mech=None, flags=None, creds=None, lifetime=None):
+        """Get a prepared context for a target
+
+        If no prepared context is available, a new context is prepared
+        immediately.  Either way, the pool is refilled in the background.
+
+        Args:
+            name (Name): the target name
+            mech (OID): the mechanism to use (or None for the default)
+            flags ([RequirementFlag]): the desired flags
+                (or None for the default flags)
+            creds (Credentials): the initiator credentials to use
+                (or None for the default credentials)
+            lifetime (int): the requested lifetime of the context
+                (or None for the default lifetime)
+
+        Returns:
+            PreparedContext: the context (whose first step has been
+                performed), and the token from its first step
+
+        Raises:
+            ~gssapi.exceptions.GSSError
+        """
+
+        key = self._register(name, mech, flags, creds, lifetime)
+
+        prepared = None
+        oldest = time.time() - self.max_age
+        with self._lock:
+            pool = self._pools[key]
+            while pool:
+                created, candidate = pool.popleft()
+                if created >= oldest:
+                    prepared = candidate
+                    break
+
+            spec = self._specs[key]
+
+        self._schedule(key)
+
+        if prepared is None:
+            ctx = spec.create()
+            prepared = tuples.PreparedContext(ctx, ctx.step())
+
+        return prepared
+
+    def _fill(self, key):
+        with self._lock:
+            self._pending.discard(key)
+            spec = self._specs[key]
+            pool = self._pools[key]
+
+            # drop any contexts which have become too old
+            oldest = time.time() - self.max_age
+            while pool and pool[0][0] < oldest:
+                pool.popleft()
+
+            missing = self.size - len(pool)
+
+        for i in range(missing):
+            ctx = spec.create()
+            try:
+                token = ctx.step()
+            except Exception:
+                # get() will report the error when it prepares a context
+                # itself, so just stop filling the pool for now
+                return
+
+            with self._lock:
+                pool.append((time.time(), tuples.PreparedContext(ctx, token)))
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            if key is _STOP:
+                return
+
+            self._fill(key)
+
+    def close(self):
+        """Stop the background thread and discard the prepared contexts"""
+
+        self._queue.put(_STOP)
+        self._worker.join()
+
+        with self._lock:
+            self._pools.clear()
+            self._specs.clear()
+            self._pending.clear()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(pool) for pool in self._pools.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
@@ -7,6 +7,7 @@ from gssapi.raw.sec_contexts import *  # noqa
 from gssapi.raw.oids import *  # noqa
 from gssapi.raw.types import *  # noqa
 from gssapi.raw.chan_bindings import *  # noqa
+from gssapi.raw.buffers import *  # noqa
 
 # optional S4U support
 try:
@@ -31,6 +32,24 @@ try:
 except ImportError:
     pass
 
+# optional DCE (IOV) support
+try:
+    from gssapi.raw.ext_dce import *  # noqa
+except ImportError:
+    pass
+
+# optional DCE (AEAD) support
+try:
+    from gssapi.raw.ext_dce_aead import *  # noqa
+except ImportError:
+    pass
+
+# optional IOV MIC support
+try:
+    from gssapi.raw.ext_iov_mic import *  # noqa
+except ImportError:
+    pass
+
 # optional KRB5 mech support
 try:
     import gssapi.raw.mech_krb5  # noqa
@@ -0,0 +1,8 @@
+from gssapi.raw.cython_types cimport gss_buffer_desc
+
+
+cdef class GSSBuffer:
+    cdef gss_buffer_desc raw_buffer
+
+
+cdef object c_make_buffer(gss_buffer_desc *buff, bint as_buffer)
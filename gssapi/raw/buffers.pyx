@@ -0,0 +1,86 @@
+GSSAPI="BASE"  # This ensures that a full module is generated by Cython
+
+from cpython.buffer cimport PyBuffer_FillInfo
+
+from gssapi.raw.cython_types cimport *
+
+
+# an empty gss_buffer_desc may have a NULL value, but buffer consumers expect a
+# valid pointer
+cdef char _EMPTY_BUFFER[1]
+
+
+cdef class GSSBuffer:
+    """GSSAPI Buffer
+
+    This class holds an output buffer allocated by the GSSAPI library,
+    such as a wrapped message or an exported name, without copying it.
+    The buffer is released back to the GSSAPI library when this object
+    is garbage collected.
+
+    The contents are exposed, read-only, via the buffer protocol, so they
+    may be passed directly to methods like :meth:`socket.socket.sendall`
+    or :meth:`io.RawIOBase.write`, or wrapped in a :class:`memoryview`.
+    To copy the contents out, use the :func:`bytes` function in Python 3
+    or the :meth:`__bytes__` method directly in Python 2.
+    """
+
+    # defined in pxd
+    # cdef gss_buffer_desc raw_buffer
+
+    def __cinit__(GSSBuffer self):
+        # GSS_C_EMPTY_BUFFER
+        self.raw_buffer = gss_buffer_desc(0, NULL)
+
+    def __dealloc__(GSSBuffer self):
+        cdef OM_uint32 tmp_min_stat
+        if self.raw_buffer.value is not NULL:
+            gss_release_buffer(&tmp_min_stat, &self.raw_buffer)
+
+    def __getbuffer__(GSSBuffer self, Py_buffer *buffer, int flags):
+        # each view holds a reference to this object, so the buffer cannot be
+        # released while in use
+        cdef void *value = self.raw_buffer.value
+        if value is NULL:
+            value = _EMPTY_BUFFER
+
+        PyBuffer_FillInfo(buffer, self, value, self.raw_buffer.length,
+                          1, flags)
+
+    def __len__(GSSBuffer self):
+        return self.raw_buffer.length
+
+    def __bytes__(GSSBuffer self):
+        if self.raw_buffer.value is NULL:
+            return b''
+        return (<char *>self.raw_buffer.value)[:self.raw_buffer.length]
+
+    def __repr__(GSSBuffer self):
+        return "<GSSBuffer of {0} bytes>".format(self.raw_buffer.length)
+
+
+cdef object c_make_buffer(gss_buffer_desc *buff, bint as_buffer):
+    """Convert a GSSAPI output buffer to a Python object
+
+    This returns a :class:`GSSBuffer` taking over the given buffer
+    if `as_buffer` is set, and a copy of its contents as `bytes` otherwise.
+    Either way, the given buffer is left empty and need not be released.
+    """
+
+    cdef GSSBuffer res_buffer
+    cdef OM_uint32 tmp_min_stat
+
+    if as_buffer:
+        res_buffer = GSSBuffer()
+        res_buffer.raw_buffer = buff[0]
+        # GSS_C_EMPTY_BUFFER
+        buff[0] = gss_buffer_desc(0, NULL)
+        return res_buffer
+
+    if buff.value is NULL:
+        res = b''
+    else:
+        res = (<char *>buff.value)[:buff.length]
+
+    gss_release_buffer(&tmp_min_stat, buff)
+    return res
@@ -11,4 +11,10 @@ cdef class ChannelBindings:
 
     cdef public bytes application_data
 
-    cdef gss_channel_bindings_t __cvalue__(ChannelBindings self)
+    cdef gss_channel_bindings_t __cvalue__(ChannelBindings self) except NULL
+    cdef void __release_cvalue__(ChannelBindings self,
+                                 gss_channel_bindings_t cvalue)
+
+
+cdef class FrozenChannelBindings(ChannelBindings):
+    cdef gss_channel_bindings_t _cvalue
@@ -37,6 +37,19 @@ cdef class ChannelBindings:
 
         self.application_data = application_data
 
+    def freeze(ChannelBindings self):
+        """Get an immutable copy of these channel bindings
+
+        Returns:
+            FrozenChannelBindings: the immutable channel bindings
+        """
+
+        return FrozenChannelBindings(self.initiator_address_type,
+                                     self.initiator_address,
+                                     self.acceptor_address_type,
+                                     self.acceptor_address,
+                                     self.application_data)
+
     cdef gss_channel_bindings_t __cvalue__(ChannelBindings self) except NULL:
         """Get the C struct version of the channel bindings"""
         cdef gss_channel_bindings_t res
@@ -64,3 +77,78 @@ cdef class ChannelBindings:
             res.application_data.length = len(self.application_data)
 
         return res
+
+    cdef void __release_cvalue__(ChannelBindings self,
+                                 gss_channel_bindings_t cvalue):
+        """Release a C struct returned by __cvalue__"""
+        free(cvalue)
+
+
+cdef class FrozenChannelBindings(ChannelBindings):
+    """Immutable GSSAPI Channel Bindings
+
+    This class represents a set of GSSAPI channel bindings which may not
+    be modified once created.  The C struct passed to GSSAPI is built once
+    and reused, so frozen channel bindings are cheaper to use repeatedly
+    (e.g. for every step of every security context established over the
+    same TLS channel).
+    """
+
+    # defined in pxd file
+    # cdef gss_channel_bindings_t _cvalue
+
+    def __init__(FrozenChannelBindings self, initiator_address_type=None,
+                 initiator_address=None, acceptor_address_type=None,
+                 acceptor_address=None, application_data=None):
+        """
+        Args:
+            initiator_address_type (AddressType): the initiator address type
+            initiator_address (bytes): the initiator address
+            acceptor_address_type (AddressType):  the acceptor address type
+            acceptor_address (bytes): the acceptor address
+            application_data (bytes): additional application-specific data
+        """
+
+        if self._cvalue is not NULL:
+            raise AttributeError("FrozenChannelBindings objects are "
+                                 "immutable")
+
+        ChannelBindings.__init__(self, initiator_address_type,
+                                 initiator_address, acceptor_address_type,
+                                 acceptor_address, application_data)
+
+        # the struct points into the attribute values, which are kept alive
+        # (and can't be replaced) for the lifetime of this object
+        self._cvalue = ChannelBindings.__cvalue__(self)
+
+    def __setattr__(FrozenChannelBindings self, name, value):
+        raise AttributeError("FrozenChannelBindings objects are immutable")
+
+    def __delattr__(FrozenChannelBindings self, name):
+        raise AttributeError("FrozenChannelBindings objects are immutable")
+
+    def freeze(FrozenChannelBindings self):
+        """Get an immutable copy of these channel bindings
+
+        Returns:
+            FrozenChannelBindings: these channel bindings
+        """
+
+        return self
+
+    def __dealloc__(FrozenChannelBindings self):
+        free(self._cvalue)
+        self._cvalue = NULL
+
+    cdef gss_channel_bindings_t __cvalue__(FrozenChannelBindings self) \
+            except NULL:
+        """Get the (cached) C struct version of the channel bindings"""
+        if self._cvalue is NULL:
+            raise ValueError("The channel bindings were not initialized")
+
+        return self._cvalue
+
+    cdef void __release_cvalue__(FrozenChannelBindings self,
+                                 gss_channel_bindings_t cvalue):
+        """Do nothing, since the C struct is reused"""
+        pass
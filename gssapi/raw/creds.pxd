@@ -4,3 +4,5 @@ from gssapi.raw.cython_types cimport gss_cred_id_t
 cdef class Creds:
     cdef gss_cred_id_t raw_creds
     cdef bint _free_on_dealloc
+    # allow weak references (e.g. from gssapi.expiry)
+    cdef object __weakref__
@@ -38,7 +38,6 @@ cdef extern from "gssapi.h":
                            OM_uint32 *actual_initiator_ttl,
                            OM_uint32 *actual_acceptor_ttl) nogil
 
-    # NB(directxman12): this is called frequently, so don't release the GIL
     OM_uint32 gss_inquire_cred(OM_uint32 *min_stat,
                                const gss_cred_id_t creds,
                                gss_name_t *name,
@@ -61,6 +60,7 @@ cdef class Creds:
     """
     # defined in pxd
     # cdef gss_cred_id_t raw_creds
+    # cdef object __weakref__
 
     def __cinit__(self, Creds cpy=None):
         if cpy is not None:
@@ -74,7 +74,8 @@ cdef class Creds:
         # methods
         cdef OM_uint32 maj_stat, min_stat
         if self.raw_creds is not GSS_C_NO_CREDENTIAL:
-            maj_stat = gss_release_cred(&min_stat, &self.raw_creds)
+            with nogil:
+                maj_stat = gss_release_cred(&min_stat, &self.raw_creds)
             if maj_stat != GSS_S_COMPLETE:
                 raise GSSError(maj_stat, min_stat)
             self.raw_creds = NULL
@@ -167,7 +168,8 @@ def release_cred(Creds creds not None):
     """
 
     cdef OM_uint32 maj_stat, min_stat
-    maj_stat = gss_release_cred(&min_stat, &creds.raw_creds)
+    with nogil:
+        maj_stat = gss_release_cred(&min_stat, &creds.raw_creds)
     if maj_stat != GSS_S_COMPLETE:
         raise GSSError(maj_stat, min_stat)
     creds.raw_creds = NULL
@@ -286,8 +288,9 @@ def inquire_cred(Creds creds not None, name=True, lifetime=True, usage=True,
         res_mechs_ptr = &res_mechs
 
     cdef OM_uint32 maj_stat, min_stat
-    maj_stat = gss_inquire_cred(&min_stat, creds.raw_creds, res_name_ptr,
-                                res_ttl_ptr, res_usage_ptr, res_mechs_ptr)
+    with nogil:
+        maj_stat = gss_inquire_cred(&min_stat, creds.raw_creds, res_name_ptr,
+                                    res_ttl_ptr, res_usage_ptr, res_mechs_ptr)
 
     cdef Name rn
     if maj_stat == GSS_S_COMPLETE:
@@ -365,10 +368,12 @@ def inquire_cred_by_mech(Creds creds not None, OID mech not None,
         res_usage_ptr = &res_usage
 
     cdef OM_uint32 maj_stat, min_stat
-    maj_stat = gss_inquire_cred_by_mech(&min_stat, creds.raw_creds,
-                                        &mech.raw_oid, res_name_ptr,
-                                        res_initiator_ttl_ptr,
-                                        res_acceptor_ttl_ptr, res_usage_ptr)
+    with nogil:
+        maj_stat = gss_inquire_cred_by_mech(&min_stat, creds.raw_creds,
+                                            &mech.raw_oid, res_name_ptr,
+                                            res_initiator_ttl_ptr,
+                                            res_acceptor_ttl_ptr,
+                                            res_usage_ptr)
     cdef Name rn
     if maj_stat == GSS_S_COMPLETE:
         if name:
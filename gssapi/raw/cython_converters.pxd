@@ -1,7 +1,8 @@
+from cpython.buffer cimport PyObject_GetBuffer, PyBUF_SIMPLE
 from libc.string cimport memcmp
 
 from gssapi.raw.cython_types cimport gss_OID, gss_OID_set, gss_OID_desc
-from gssapi.raw.cython_types cimport OM_uint32
+from gssapi.raw.cython_types cimport OM_uint32, gss_buffer_desc
 from gssapi.raw.cython_types cimport GSS_C_INDEFINITE
 from gssapi.raw.oids cimport OID
 
@@ -34,3 +35,17 @@ cdef inline bint c_compare_oids(gss_OID a, gss_OID b):
 
     return (a.length == b.length and
             not memcmp(a.elements, b.elements, a.length))
+
+
+cdef inline int c_get_buffer(object obj, Py_buffer *view,
+                             gss_buffer_desc *buff) except -1:
+    """Point a GSS buffer at the contents of a buffer-protocol object.
+
+    No copy is made: the caller must keep the view until the GSSAPI call
+    using the buffer has completed, and then release it with
+    PyBuffer_Release.
+    """
+    PyObject_GetBuffer(obj, view, PyBUF_SIMPLE)
+    buff.length = view.len
+    buff.value = <char *>view.buf
+    return 0
@@ -193,3 +193,33 @@ class TokenTooLateError(TokenOutOfSequenceError):
 
 class TokenTooEarlyError(TokenOutOfSequenceError):
     SUPPLEMENTARY_CODE = GSS_S_GAP_TOKEN
+
+
+# non-GSS errors
+class EncryptionNotUsedError(Exception):
+    """
+    An Error indicating that encryption was required, but not used
+
+    The message was otherwise unwrapped successfully, and is
+    available from the `unwrapped_message` attribute.
+    """
+
+    def __init__(self, message, unwrapped_message=None):
+        super(EncryptionNotUsedError, self).__init__(message)
+
+        self.unwrapped_message = unwrapped_message
+
+
+class OutputBufferTooSmallError(ValueError):
+    """
+    An Error indicating that an output buffer was too small
+
+    If the message had already been wrapped (using up a sequence number)
+    when this was detected, the wrapped message is available from the
+    `token` attribute, so that it need not be discarded.
+    """
+
+    def __init__(self, message, token=None):
+        super(OutputBufferTooSmallError, self).__init__(message)
+
+        self.token = token
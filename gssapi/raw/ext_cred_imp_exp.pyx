@@ -1,6 +1,9 @@
 GSSAPI="BASE"  # This ensures that a full module is generated by Cython
 
+from cpython.buffer cimport PyBuffer_Release
+
 from gssapi.raw.cython_types cimport *
+from gssapi.raw.cython_converters cimport c_get_buffer
 from gssapi.raw.cython_converters cimport c_create_oid_set
 from gssapi.raw.cython_converters cimport c_get_mech_oid_set
 from gssapi.raw.cython_converters cimport c_py_ttl_to_c, c_c_ttl_to_py
@@ -68,14 +71,17 @@ def import_cred(token not None):
         GSSError
     """
 
-    cdef gss_buffer_desc token_buffer = gss_buffer_desc(len(token), token)
+    cdef Py_buffer token_view
+    cdef gss_buffer_desc token_buffer
 
     cdef gss_cred_id_t creds
 
     cdef OM_uint32 maj_stat, min_stat
 
+    c_get_buffer(token, &token_view, &token_buffer)
     with nogil:
         maj_stat = gss_import_cred(&min_stat, &token_buffer, &creds)
+    PyBuffer_Release(&token_view)
 
     cdef Creds res
     if maj_stat == GSS_S_COMPLETE:
@@ -0,0 +1,18 @@
+from gssapi.raw.cython_types cimport OM_uint32, gss_buffer_desc
+
+
+cdef extern from "gssapi/gssapi_ext.h":
+    ctypedef struct gss_iov_buffer_desc:
+        OM_uint32 type
+        gss_buffer_desc buffer
+    ctypedef gss_iov_buffer_desc* gss_iov_buffer_t
+
+
+cdef class IOV:
+    cdef int iov_len
+    cdef gss_iov_buffer_desc *_iov
+    cdef Py_buffer *_views
+    cdef list _buffs
+
+    cdef void _clear(IOV self)
+    cdef int _check_writable(IOV self, bint all_buffers) except -1
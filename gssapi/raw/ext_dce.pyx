@@ -0,0 +1,379 @@
+GSSAPI="BASE"  # This ensures that a full module is generated by Cython
+
+from cpython.buffer cimport PyObject_GetBuffer, PyBuffer_Release
+from cpython.buffer cimport PyBUF_SIMPLE, PyBUF_WRITABLE
+from libc.stdlib cimport calloc, free
+
+from gssapi.raw.cython_types cimport *
+from gssapi.raw.sec_contexts cimport SecurityContext
+
+from gssapi.raw.misc import GSSError
+from gssapi.raw.named_tuples import IOVUnwrapResult, IOVBuffer
+
+from enum import IntEnum
+
+
+cdef extern from "gssapi/gssapi_ext.h":
+    OM_uint32 GSS_IOV_BUFFER_TYPE_EMPTY
+    OM_uint32 GSS_IOV_BUFFER_TYPE_DATA
+    OM_uint32 GSS_IOV_BUFFER_TYPE_HEADER
+    OM_uint32 GSS_IOV_BUFFER_TYPE_MECH_PARAMS
+    OM_uint32 GSS_IOV_BUFFER_TYPE_TRAILER
+    OM_uint32 GSS_IOV_BUFFER_TYPE_PADDING
+    OM_uint32 GSS_IOV_BUFFER_TYPE_STREAM
+    OM_uint32 GSS_IOV_BUFFER_TYPE_SIGN_ONLY
+
+    OM_uint32 GSS_IOV_BUFFER_FLAG_MASK
+    OM_uint32 GSS_IOV_BUFFER_FLAG_ALLOCATE
+    OM_uint32 GSS_IOV_BUFFER_FLAG_ALLOCATED
+
+    OM_uint32 gss_wrap_iov(OM_uint32 *min_stat,
+                           gss_ctx_id_t context,
+                           int conf_req,
+                           gss_qop_t qop,
+                           int *conf_used,
+                           gss_iov_buffer_desc *iov,
+                           int iov_count) nogil
+
+    OM_uint32 gss_unwrap_iov(OM_uint32 *min_stat,
+                             gss_ctx_id_t context,
+                             int *conf_used,
+                             gss_qop_t *qop_used,
+                             gss_iov_buffer_desc *iov,
+                             int iov_count) nogil
+
+    OM_uint32 gss_wrap_iov_length(OM_uint32 *min_stat,
+                                  gss_ctx_id_t context,
+                                  int conf_req,
+                                  gss_qop_t qop,
+                                  int *conf_used,
+                                  gss_iov_buffer_desc *iov,
+                                  int iov_count) nogil
+
+    OM_uint32 gss_release_iov_buffer(OM_uint32 *min_stat,
+                                     gss_iov_buffer_desc *iov,
+                                     int iov_count) nogil
+
+
+class IOVBufferType(IntEnum):
+    """
+    IOV Buffer Types
+
+    This IntEnum represent GSSAPI IOV buffer
+    types to be used with the IOV methods.
+
+    The numbers behind the values correspond directly
+    to their C counterparts.
+    """
+
+    empty = GSS_IOV_BUFFER_TYPE_EMPTY
+    data = GSS_IOV_BUFFER_TYPE_DATA
+    header = GSS_IOV_BUFFER_TYPE_HEADER
+    mech_params = GSS_IOV_BUFFER_TYPE_MECH_PARAMS
+    trailer = GSS_IOV_BUFFER_TYPE_TRAILER
+    padding = GSS_IOV_BUFFER_TYPE_PADDING
+    stream = GSS_IOV_BUFFER_TYPE_STREAM
+    sign_only = GSS_IOV_BUFFER_TYPE_SIGN_ONLY
+    # GSS_IOV_BUFFER_TYPE_MIC_TOKEN is only defined by GSSAPI implementations
+    # which support the IOV MIC extension, so its (standard) value is used
+    # directly
+    mic_token = 12
+
+
+cdef class IOV:
+    """A GSSAPI IOV
+
+    This class represents an array of GSSAPI IOV buffers, which
+    describe the header, data, padding and trailer regions of a
+    wrapped message.
+
+    Buffers are passed as objects supporting the buffer protocol (such as
+    :class:`bytearray`, :class:`memoryview` or :class:`mmap.mmap`).  No
+    copies of the buffer contents are made: the buffers are held for the
+    lifetime of the IOV, and the IOV methods operate on them in place.
+
+    Each positional argument is either a buffer-protocol object, which
+    is treated as a data buffer, or a tuple describing the buffer.  The
+    tuple may be of the form `(type, allocate)` for header, padding and
+    trailer buffers, `(type, value)` for other buffers, or
+    `(type, allocate, value)`.  When `allocate` is True, the GSSAPI
+    library allocates the buffer itself.
+
+    If `std_layout` is True (the default), a header buffer is prepended,
+    and padding and trailer buffers are appended to the given buffers.
+    These are library-allocated if `auto_alloc` is True (the default),
+    and otherwise have no value, so that :func:`wrap_iov_length` can be
+    used to determine their sizes.
+
+    Indexing an IOV returns an :class:`IOVBuffer` for the given buffer.
+    The value is the original buffer object for buffers that were passed
+    in, a copy of library-allocated buffers, and a new :class:`bytearray`
+    of the required size for buffers whose length was computed by
+    :func:`wrap_iov_length`.
+    """
+
+    # defined in ext_dce.pxd
+    # cdef int iov_len
+    # cdef gss_iov_buffer_desc *_iov
+    # cdef Py_buffer *_views
+    # cdef list _buffs
+
+    AUTO_ALLOC_BUFFERS = set([IOVBufferType.header, IOVBufferType.padding,
+                              IOVBufferType.trailer,
+                              IOVBufferType.mic_token])
+
+    def __init__(IOV self, *args, std_layout=True, auto_alloc=True):
+        self._clear()
+
+        buffs = []
+        if std_layout:
+            buffs.append(IOVBuffer(IOVBufferType.header, auto_alloc, None))
+
+        for buff_desc in args:
+            if isinstance(buff_desc, tuple):
+                if len(buff_desc) > 3 or len(buff_desc) < 2:
+                    raise ValueError("Buffer description tuples must be "
+                                     "length 2 or 3")
+
+                buff_type = buff_desc[0]
+
+                if len(buff_desc) == 2:
+                    if buff_type in self.AUTO_ALLOC_BUFFERS:
+                        alloc = buff_desc[1]
+                        value = None
+                    else:
+                        alloc = False
+                        value = buff_desc[1]
+                else:
+                    (buff_type, alloc, value) = buff_desc
+
+                if alloc and value is not None:
+                    raise ValueError("A buffer may not both be allocated "
+                                     "by GSSAPI and have a value")
+
+                buffs.append(IOVBuffer(buff_type, alloc, value))
+            else:
+                buffs.append(IOVBuffer(IOVBufferType.data, False, buff_desc))
+
+        if std_layout:
+            buffs.append(IOVBuffer(IOVBufferType.padding, auto_alloc, None))
+            buffs.append(IOVBuffer(IOVBufferType.trailer, auto_alloc, None))
+
+        cdef int i
+        self.iov_len = len(buffs)
+        self._iov = <gss_iov_buffer_desc *>calloc(self.iov_len,
+                                                  sizeof(gss_iov_buffer_desc))
+        # calloc leaves each view's obj NULL, so every view can be
+        # unconditionally released
+        self._views = <Py_buffer *>calloc(self.iov_len, sizeof(Py_buffer))
+        if self._iov is NULL or self._views is NULL:
+            self._clear()
+            raise MemoryError("Cannot calloc for IOV buffer array")
+
+        self._buffs = buffs
+        for i in range(self.iov_len):
+            buff = buffs[i]
+            self._iov[i].type = buff.type
+            if buff.allocate:
+                self._iov[i].type |= GSS_IOV_BUFFER_FLAG_ALLOCATE
+
+            if buff.value is not None:
+                # prefer writable views, since most buffers are
+                # modified in place, but allow read-only buffers
+                # (e.g. bytes) for buffers which are only read
+                try:
+                    PyObject_GetBuffer(buff.value, &self._views[i],
+                                       PyBUF_WRITABLE)
+                except BufferError:
+                    PyObject_GetBuffer(buff.value, &self._views[i],
+                                       PyBUF_SIMPLE)
+
+                self._iov[i].buffer.length = self._views[i].len
+                self._iov[i].buffer.value = <char *>self._views[i].buf
+
+    cdef void _clear(IOV self):
+        cdef OM_uint32 tmp_min_stat
+        cdef int i
+        if self._iov is not NULL:
+            gss_release_iov_buffer(&tmp_min_stat, self._iov, self.iov_len)
+            free(self._iov)
+            self._iov = NULL
+
+        if self._views is not NULL:
+            for i in range(self.iov_len):
+                PyBuffer_Release(&self._views[i])
+            free(self._views)
+            self._views = NULL
+
+        self.iov_len = 0
+        self._buffs = []
+
+    cdef int _check_writable(IOV self, bint all_buffers) except -1:
+        """Check that the buffers to be modified in place are writable"""
+        cdef int i
+        cdef OM_uint32 buff_type
+        for i in range(self.iov_len):
+            if self._buffs[i].value is None or not self._views[i].readonly:
+                continue
+
+            buff_type = self._iov[i].type & ~GSS_IOV_BUFFER_FLAG_MASK
+            if (buff_type == GSS_IOV_BUFFER_TYPE_DATA or
+                    buff_type == GSS_IOV_BUFFER_TYPE_STREAM or
+                    (all_buffers and
+                     buff_type != GSS_IOV_BUFFER_TYPE_SIGN_ONLY)):
+                raise TypeError("IOV buffer {0} (type {1}) must be writable, "
+                                "since it is modified in "
+                                "place".format(i, buff_type))
+
+        return 0
+
+    def __len__(IOV self):
+        return self.iov_len
+
+    def __getitem__(IOV self, ind):
+        if ind < 0:
+            ind += self.iov_len
+        if ind < 0 or ind >= self.iov_len:
+            raise IndexError("IOV index out of range")
+
+        cdef int i = ind
+        buff = self._buffs[i]
+        cdef gss_buffer_desc *c_buff = &self._iov[i].buffer
+
+        if buff.value is not None:
+            # the contents were modified in place
+            value = buff.value
+        elif c_buff.value is not NULL:
+            value = c_buff.value[:c_buff.length]
+        elif c_buff.length:
+            # the length was filled in by wrap_iov_length
+            value = bytearray(c_buff.length)
+        else:
+            value = None
+
+        return IOVBuffer(buff.type, buff.allocate, value)
+
+    def __repr__(IOV self):
+        return "<IOV {0}>".format([self[i] for i in range(self.iov_len)])
+
+    def __dealloc__(IOV self):
+        self._clear()
+
+
+def wrap_iov(SecurityContext context not None, IOV message not None,
+             confidential=True, qop=None):
+    """Wrap/Encrypt an IOV message in place
+
+    This method wraps or encrypts an IOV message.  The data buffers are
+    encrypted in place, and the header, padding and trailer buffers are
+    either filled in place or allocated by the GSSAPI library, as
+    requested when creating the :class:`IOV`.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (IOV): the IOV message to wrap
+        confidential (bool): whether or not to encrypt the data buffers
+        qop (int): the desired Quality of Protection
+            (or None for the default QoP)
+
+    Returns:
+        bool: whether or not confidentiality was actually used
+
+    Raises:
+        GSSError
+    """
+
+    message._check_writable(True)
+
+    cdef int conf_req = confidential
+    cdef gss_qop_t qop_req = qop if qop is not None else GSS_C_QOP_DEFAULT
+    cdef int conf_used
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    with nogil:
+        maj_stat = gss_wrap_iov(&min_stat, context.raw_ctx, conf_req,
+                                qop_req, &conf_used, message._iov,
+                                message.iov_len)
+
+    if maj_stat == GSS_S_COMPLETE:
+        return <bint>conf_used
+    else:
+        raise GSSError(maj_stat, min_stat)
+
+
+def unwrap_iov(SecurityContext context not None, IOV message not None):
+    """Unwrap/Decrypt an IOV message in place
+
+    This method unwraps or decrypts an IOV message.  The data buffers
+    (or the stream buffer) are decrypted in place.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (IOV): the IOV message to unwrap
+
+    Returns:
+        IOVUnwrapResult: whether or not confidentiality was used,
+            and the QoP used
+
+    Raises:
+        GSSError
+    """
+
+    message._check_writable(False)
+
+    cdef int conf_used
+    cdef gss_qop_t qop_used
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    with nogil:
+        maj_stat = gss_unwrap_iov(&min_stat, context.raw_ctx, &conf_used,
+                                  &qop_used, message._iov, message.iov_len)
+
+    if maj_stat == GSS_S_COMPLETE:
+        return IOVUnwrapResult(<bint>conf_used, qop_used)
+    else:
+        raise GSSError(maj_stat, min_stat)
+
+
+def wrap_iov_length(SecurityContext context not None, IOV message not None,
+                    confidential=True, qop=None):
+    """Compute the buffer lengths for wrapping an IOV message
+
+    This method computes the lengths of the header, padding and trailer
+    buffers of an IOV message, without actually wrapping the message.
+    Afterwards, indexing the IOV returns a :class:`bytearray` of the
+    required size for each buffer which was passed without a value,
+    which may then be used to construct the IOV passed to
+    :func:`wrap_iov`.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (IOV): the IOV message for which to compute the lengths
+        confidential (bool): whether or not encryption will be used
+        qop (int): the QoP that will be used when actually wrapping
+            (or None for the default QoP)
+
+    Returns:
+        bool: whether or not confidentiality would be used
+
+    Raises:
+        GSSError
+    """
+
+    cdef int conf_req = confidential
+    cdef gss_qop_t qop_req = qop if qop is not None else GSS_C_QOP_DEFAULT
+    cdef int conf_used
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    with nogil:
+        maj_stat = gss_wrap_iov_length(&min_stat, context.raw_ctx, conf_req,
+                                       qop_req, &conf_used, message._iov,
+                                       message.iov_len)
+
+    if maj_stat == GSS_S_COMPLETE:
+        return <bint>conf_used
+    else:
+        raise GSSError(maj_stat, min_stat)
@@ -0,0 +1,157 @@
+GSSAPI="BASE"  # This ensures that a full module is generated by Cython
+
+from cpython.buffer cimport PyBuffer_Release
+
+from gssapi.raw.cython_types cimport *
+from gssapi.raw.cython_converters cimport c_get_buffer
+from gssapi.raw.sec_contexts cimport SecurityContext
+
+from gssapi.raw.misc import GSSError
+from gssapi.raw.named_tuples import WrapResult, UnwrapResult
+
+
+cdef extern from "gssapi/gssapi_ext.h":
+    OM_uint32 gss_wrap_aead(OM_uint32 *min_stat,
+                            gss_ctx_id_t context,
+                            int conf_req,
+                            gss_qop_t qop,
+                            gss_buffer_t input_assoc_buffer,
+                            gss_buffer_t input_payload_buffer,
+                            int *conf_used,
+                            gss_buffer_t output_message_buffer) nogil
+
+    OM_uint32 gss_unwrap_aead(OM_uint32 *min_stat,
+                              gss_ctx_id_t context,
+                              gss_buffer_t input_message_buffer,
+                              gss_buffer_t input_assoc_buffer,
+                              gss_buffer_t output_payload_buffer,
+                              int *conf_used,
+                              gss_qop_t *qop_used) nogil
+
+
+def wrap_aead(SecurityContext context not None, message, associated=None,
+              confidential=True, qop=None):
+    """
+    Wrap/Encrypt an AEAD message.
+
+    This method takes an input message and associated data,
+    and outputs an AEAD message.  The associated data is protected
+    along with the message, but is not encrypted or included in the
+    output message, so it must be passed to :func:`unwrap_aead`
+    separately.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (bytes): the message to wrap or encrypt
+        associated (bytes): associated data to go with the message
+            (or None for no associated data)
+        confidential (bool): whether or not to encrypt the message (True),
+            or just wrap it with a MIC (False)
+        qop (int): the desired Quality of Protection
+            (or None for the default QoP)
+
+    Returns:
+        WrapResult: the wrapped/encrypted message (which does not include
+            the associated data), and whether or not encryption was used
+
+    Raises:
+        GSSError
+    """
+
+    cdef int conf_req = confidential
+    cdef gss_qop_t qop_req = qop if qop is not None else GSS_C_QOP_DEFAULT
+
+    cdef Py_buffer message_view, assoc_view
+    cdef gss_buffer_desc message_buffer
+    cdef gss_buffer_desc assoc_buffer
+    cdef gss_buffer_t assoc_buffer_ptr = GSS_C_NO_BUFFER
+
+    cdef int conf_used
+    # GSS_C_EMPTY_BUFFER
+    cdef gss_buffer_desc output_buffer = gss_buffer_desc(0, NULL)
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    c_get_buffer(message, &message_view, &message_buffer)
+    try:
+        if associated is not None:
+            c_get_buffer(associated, &assoc_view, &assoc_buffer)
+            assoc_buffer_ptr = &assoc_buffer
+
+        with nogil:
+            maj_stat = gss_wrap_aead(&min_stat, context.raw_ctx, conf_req,
+                                     qop_req, assoc_buffer_ptr,
+                                     &message_buffer, &conf_used,
+                                     &output_buffer)
+
+        if associated is not None:
+            PyBuffer_Release(&assoc_view)
+    finally:
+        PyBuffer_Release(&message_view)
+
+    if maj_stat == GSS_S_COMPLETE:
+        output_message = output_buffer.value[:output_buffer.length]
+        gss_release_buffer(&min_stat, &output_buffer)
+        return WrapResult(output_message, <bint>conf_used)
+    else:
+        raise GSSError(maj_stat, min_stat)
+
+
+def unwrap_aead(SecurityContext context not None, message, associated=None):
+    """
+    Unwrap/Decrypt an AEAD message.
+
+    This method takes an encrpyted/wrapped AEAD message and some associated
+    data, and returns an unwrapped/decrypted message.  The associated data
+    must be the same as was passed to :func:`wrap_aead`, or the message
+    will fail to unwrap.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (bytes): the AEAD message to unwrap or decrypt
+        associated (bytes): associated data that goes with the message
+            (or None for no associated data)
+
+    Returns:
+        UnwrapResult: the unwrapped/decrypted message, whether or not
+            encryption was used, and the QoP used
+
+    Raises:
+        GSSError
+    """
+
+    cdef Py_buffer input_view, assoc_view
+    cdef gss_buffer_desc input_buffer
+    cdef gss_buffer_desc assoc_buffer
+    cdef gss_buffer_t assoc_buffer_ptr = GSS_C_NO_BUFFER
+
+    # GSS_C_EMPTY_BUFFER
+    cdef gss_buffer_desc output_buffer = gss_buffer_desc(0, NULL)
+    cdef int conf_state
+    cdef gss_qop_t qop_state
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    c_get_buffer(message, &input_view, &input_buffer)
+    try:
+        if associated is not None:
+            c_get_buffer(associated, &assoc_view, &assoc_buffer)
+            assoc_buffer_ptr = &assoc_buffer
+
+        with nogil:
+            maj_stat = gss_unwrap_aead(&min_stat, context.raw_ctx,
+                                       &input_buffer, assoc_buffer_ptr,
+                                       &output_buffer, &conf_state,
+                                       &qop_state)
+
+        if associated is not None:
+            PyBuffer_Release(&assoc_view)
+    finally:
+        PyBuffer_Release(&input_view)
+
+    if maj_stat == GSS_S_COMPLETE:
+        output_message = output_buffer.value[:output_buffer.length]
+        gss_release_buffer(&min_stat, &output_buffer)
+        return UnwrapResult(output_message, <bint>conf_state, qop_state)
+    else:
+        raise GSSError(maj_stat, min_stat)
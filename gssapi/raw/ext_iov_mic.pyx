@@ -0,0 +1,124 @@
+GSSAPI="BASE"  # This ensures that a full module is generated by Cython
+
+from gssapi.raw.cython_types cimport *
+from gssapi.raw.sec_contexts cimport SecurityContext
+from gssapi.raw.ext_dce cimport IOV, gss_iov_buffer_desc
+
+from gssapi.raw.misc import GSSError
+
+
+cdef extern from "gssapi/gssapi_ext.h":
+    OM_uint32 gss_get_mic_iov(OM_uint32 *min_stat,
+                              gss_ctx_id_t context,
+                              gss_qop_t qop,
+                              gss_iov_buffer_desc *iov,
+                              int iov_count) nogil
+
+    OM_uint32 gss_get_mic_iov_length(OM_uint32 *min_stat,
+                                     gss_ctx_id_t context,
+                                     gss_qop_t qop,
+                                     gss_iov_buffer_desc *iov,
+                                     int iov_count) nogil
+
+    OM_uint32 gss_verify_mic_iov(OM_uint32 *min_stat,
+                                 gss_ctx_id_t context,
+                                 gss_qop_t *qop_used,
+                                 gss_iov_buffer_desc *iov,
+                                 int iov_count) nogil
+
+
+def get_mic_iov(SecurityContext context not None, IOV message not None,
+                qop=None):
+    """Generate a MIC for an IOV message
+
+    This method generates a MIC for the data and sign-only buffers of an
+    IOV message, without joining them together.  The IOV message must
+    contain a MIC token buffer (of type
+    :attr:`IOVBufferType.mic_token`), which is either filled in place or
+    allocated by the GSSAPI library, as requested when creating the
+    :class:`IOV`.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (IOV): the IOV message for which to generate the MIC
+        qop (int): the requested Quality of Protection
+            (or None to use the default)
+
+    Raises:
+        GSSError
+    """
+
+    cdef gss_qop_t qop_req = qop if qop is not None else GSS_C_QOP_DEFAULT
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    with nogil:
+        maj_stat = gss_get_mic_iov(&min_stat, context.raw_ctx, qop_req,
+                                   message._iov, message.iov_len)
+
+    if maj_stat != GSS_S_COMPLETE:
+        raise GSSError(maj_stat, min_stat)
+
+
+def get_mic_iov_length(SecurityContext context not None, IOV message not None,
+                       qop=None):
+    """Compute the MIC token length for an IOV message
+
+    This method computes the length of the MIC token buffer of an IOV
+    message, without actually generating the MIC.  Afterwards, indexing
+    the IOV returns a :class:`bytearray` of the required size for the
+    MIC token buffer, if it was passed without a value.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (IOV): the IOV message for which to compute the length
+        qop (int): the QoP that will be used when actually generating the MIC
+            (or None for the default QoP)
+
+    Raises:
+        GSSError
+    """
+
+    cdef gss_qop_t qop_req = qop if qop is not None else GSS_C_QOP_DEFAULT
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    with nogil:
+        maj_stat = gss_get_mic_iov_length(&min_stat, context.raw_ctx,
+                                          qop_req, message._iov,
+                                          message.iov_len)
+
+    if maj_stat != GSS_S_COMPLETE:
+        raise GSSError(maj_stat, min_stat)
+
+
+def verify_mic_iov(SecurityContext context not None, IOV message not None):
+    """Verify the MIC of an IOV message
+
+    This method verifies the MIC token buffer of an IOV message against
+    its data and sign-only buffers, without joining them together.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (IOV): the IOV message to verify, including the MIC
+            token buffer
+
+    Returns:
+        int: the QoP used
+
+    Raises:
+        GSSError
+    """
+
+    cdef gss_qop_t qop_used
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    with nogil:
+        maj_stat = gss_verify_mic_iov(&min_stat, context.raw_ctx, &qop_used,
+                                      message._iov, message.iov_len)
+
+    if maj_stat == GSS_S_COMPLETE:
+        return qop_used
+    else:
+        raise GSSError(maj_stat, min_stat)
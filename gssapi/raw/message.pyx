@@ -1,10 +1,30 @@
 GSSAPI="BASE"  # This ensures that a full module is generated by Cython
 
+from cpython cimport array
+from cpython.buffer cimport PyBuffer_Release, PyObject_GetBuffer
+from cpython.buffer cimport PyBUF_WRITABLE
+from libc.stdlib cimport calloc, free
+from libc.string cimport memcpy
+
 from gssapi.raw.cython_types cimport *
+from gssapi.raw.buffers cimport c_make_buffer
+from gssapi.raw.cython_converters cimport c_get_buffer
 from gssapi.raw.sec_contexts cimport SecurityContext
 
 from gssapi.raw.misc import GSSError
+from gssapi.raw.exceptions import EncryptionNotUsedError
+from gssapi.raw.exceptions import OutputBufferTooSmallError
 from gssapi.raw.named_tuples import VerifyMICResult, WrapResult, UnwrapResult
+from gssapi.raw.named_tuples import GetMICBatchResult, VerifyMICBatchResult
+from gssapi.raw.named_tuples import WrapIntoResult, UnwrapIntoResult
+
+import array
+
+
+# calling tuple.__new__ directly skips the namedtuple constructors'
+# Python-level argument handling, which is noticeable for results created on
+# every message
+cdef object _tuple_new = tuple.__new__
 
 
 cdef extern from "gssapi.h":
@@ -43,7 +63,94 @@ cdef extern from "gssapi.h":
                          gss_qop_t *qop) nogil
 
 
-def get_mic(SecurityContext context not None, message, qop=None):
+# the per-message state for the batch methods
+cdef struct _BatchOp:
+    gss_ctx_id_t context
+    gss_buffer_desc input_buffer
+    gss_buffer_desc token_buffer
+    gss_buffer_desc output_buffer
+    OM_uint32 maj_stat
+    OM_uint32 min_stat
+    int conf_state
+    gss_qop_t qop_state
+
+
+# the status codes are OM_uint32, so they are returned in 'I' (unsigned int)
+# arrays
+cdef array.array _STATUS_ARRAY_TEMPLATE = array.array('I')
+
+
+cdef int _get_out_view(object out_buffer, Py_buffer *out_view,
+                       Py_ssize_t offset) except -1:
+    """Get a view of a writable buffer, with room past an offset"""
+    if offset < 0:
+        raise ValueError("The headroom may not be negative")
+
+    PyObject_GetBuffer(out_buffer, out_view, PyBUF_WRITABLE)
+    if out_view.len < offset:
+        PyBuffer_Release(out_view)
+        raise ValueError("The headroom ({0} bytes) is larger than the "
+                         "output buffer ({1} bytes)".format(offset,
+                                                            out_view.len))
+
+    return 0
+
+
+cdef int _check_room(Py_buffer *out_view, Py_ssize_t offset,
+                     Py_ssize_t length) except -1:
+    """Check that a writable buffer has room for a message at an offset"""
+    if out_view.len - offset < length:
+        raise ValueError("The output buffer is too small: {0} bytes "
+                         "are needed, but only {1} are available".format(
+                             offset + length, out_view.len))
+
+    return 0
+
+
+cdef Py_ssize_t _copy_into(gss_buffer_desc *src, Py_buffer *out_view,
+                           Py_ssize_t offset) except -1:
+    """Copy a GSS output buffer into a writable buffer at an offset"""
+    cdef Py_ssize_t length = <Py_ssize_t>src.length
+
+    _check_room(out_view, offset, length)
+    if length:
+        memcpy(<char *>out_view.buf + offset, src.value, length)
+
+    return length
+
+
+cdef _BatchOp* _alloc_batch(Py_ssize_t count, Py_buffer **views,
+                            int views_per_op=1) except NULL:
+    """Allocate the state and buffer views for a batch of messages"""
+    cdef _BatchOp *ops = <_BatchOp *>calloc(count, sizeof(_BatchOp))
+    # calloc leaves each view's obj NULL, so every view can be unconditionally
+    # released afterwards
+    views[0] = <Py_buffer *>calloc(count * views_per_op, sizeof(Py_buffer))
+    if ops is NULL or views[0] is NULL:
+        free(ops)
+        free(views[0])
+        raise MemoryError("Cannot calloc for batch message operations")
+
+    return ops
+
+
+cdef void _free_batch(_BatchOp *ops, Py_buffer *views, Py_ssize_t count,
+                      int views_per_op=1):
+    """Release the buffer views and output buffers of a batch"""
+    cdef OM_uint32 tmp_min_stat
+    cdef Py_ssize_t i
+    for i in range(count * views_per_op):
+        PyBuffer_Release(&views[i])
+
+    for i in range(count):
+        gss_release_buffer(&tmp_min_stat, &ops[i].output_buffer)
+
+    free(views)
+    free(ops)
+
+
+def get_mic(SecurityContext context not None, message, qop=None,
+            as_buffer=False):
     """
     Generate a MIC for a message.
 
@@ -57,31 +164,34 @@ def get_mic(SecurityContext context not None, message, qop=None):
         message (bytes): the message for which to generate the MIC
         qop (int): the requested Quality of Protection
             (or None to use the default)
+        as_buffer (bool): whether to return the MIC token as a
+            :class:`GSSBuffer` instead of copying it to a bytes object
 
     Returns:
-        bytes: the generated MIC token
+        bytes: the generated MIC token (a GSSBuffer if `as_buffer` is set)
 
     Raises:
         GSSError
     """
 
-    cdef gss_buffer_desc message_buffer = gss_buffer_desc(len(message),
-                                                          message)
     cdef gss_qop_t qop_req = qop if qop is not None else GSS_C_QOP_DEFAULT
 
     # GSS_C_EMPYT_BUFFER
     cdef gss_buffer_desc token_buffer = gss_buffer_desc(0, NULL)
 
+    cdef Py_buffer message_view
+    cdef gss_buffer_desc message_buffer
+
     cdef OM_uint32 maj_stat, min_stat
 
+    c_get_buffer(message, &message_view, &message_buffer)
     with nogil:
         maj_stat = gss_get_mic(&min_stat, context.raw_ctx, qop_req,
                                &message_buffer, &token_buffer)
+    PyBuffer_Release(&message_view)
 
     if maj_stat == GSS_S_COMPLETE:
-        res = token_buffer.value[:token_buffer.length]
-        gss_release_buffer(&min_stat, &token_buffer)
-        return res
+        return c_make_buffer(&token_buffer, as_buffer)
     else:
         raise GSSError(maj_stat, min_stat)
 
@@ -107,17 +217,23 @@ def verify_mic(SecurityContext context not None, message, token):
         GSSError
     """
 
-    cdef gss_buffer_desc message_buffer = gss_buffer_desc(len(message),
-                                                          message)
-    cdef gss_buffer_desc token_buffer = gss_buffer_desc(len(token), token)
+    cdef Py_buffer message_view, token_view
+    cdef gss_buffer_desc message_buffer, token_buffer
 
     cdef gss_qop_t qop_state
 
     cdef OM_uint32 maj_stat, min_stat
 
-    with nogil:
-        maj_stat = gss_verify_mic(&min_stat, context.raw_ctx, &message_buffer,
-                                  &token_buffer, &qop_state)
+    c_get_buffer(message, &message_view, &message_buffer)
+    try:
+        c_get_buffer(token, &token_view, &token_buffer)
+        with nogil:
+            maj_stat = gss_verify_mic(&min_stat, context.raw_ctx,
+                                      &message_buffer, &token_buffer,
+                                      &qop_state)
+        PyBuffer_Release(&token_view)
+    finally:
+        PyBuffer_Release(&message_view)
 
     if maj_stat == GSS_S_COMPLETE:
         return qop_state
@@ -165,7 +281,7 @@ def wrap_size_limit(SecurityContext context not None, OM_uint32 output_size,
 
 
 def wrap(SecurityContext context not None, message, confidential=True,
-         qop=None):
+         qop=None, as_buffer=False):
     """
     Wrap/Encrypt a message.
 
@@ -179,6 +295,8 @@ def wrap(SecurityContext context not None, message, confidential=True,
             or just wrap it with a MIC (False)
         qop (int): the desired Quality of Protection
             (or None for the default QoP)
+        as_buffer (bool): whether to return the wrapped message as a
+            :class:`GSSBuffer` instead of copying it to a bytes object
 
     Returns:
         WrapResult: the wrapped/encrypted message, and whether or not
@@ -190,8 +308,9 @@ def wrap(SecurityContext context not None, message, confidential=True,
 
     cdef int conf_req = confidential
     cdef gss_qop_t qop_req = qop if qop is not None else GSS_C_QOP_DEFAULT
-    cdef gss_buffer_desc message_buffer = gss_buffer_desc(len(message),
-                                                          message)
+
+    cdef Py_buffer message_view
+    cdef gss_buffer_desc message_buffer
 
     cdef int conf_used
     # GSS_C_EMPTY_BUFFER
@@ -199,19 +318,20 @@ def wrap(SecurityContext context not None, message, confidential=True,
 
     cdef OM_uint32 maj_stat, min_stat
 
+    c_get_buffer(message, &message_view, &message_buffer)
     with nogil:
         maj_stat = gss_wrap(&min_stat, context.raw_ctx, conf_req, qop_req,
                             &message_buffer, &conf_used, &output_buffer)
+    PyBuffer_Release(&message_view)
 
     if maj_stat == GSS_S_COMPLETE:
-        output_message = output_buffer.value[:output_buffer.length]
-        gss_release_buffer(&min_stat, &output_buffer)
-        return WrapResult(output_message, <bint>conf_used)
+        output_message = c_make_buffer(&output_buffer, as_buffer)
+        return _tuple_new(WrapResult, (output_message, <bint>conf_used))
     else:
         raise GSSError(maj_stat, min_stat)
 
 
-def unwrap(SecurityContext context not None, message):
+def unwrap(SecurityContext context not None, message, as_buffer=False):
     """
     Unwrap/Decrypt a message.
 
@@ -221,6 +341,8 @@ def unwrap(SecurityContext context not None, message):
     Args:
         context (SecurityContext): the current security context
         message (bytes): the message to unwrap/decrypt
+        as_buffer (bool): whether to return the unwrapped message as a
+            :class:`GSSBuffer` instead of copying it to a bytes object
 
     Returns:
         UnwrapResult: the unwrapped/decrypted message, whether or on
@@ -230,7 +352,8 @@ def unwrap(SecurityContext context not None, message):
         GSSError
     """
 
-    cdef gss_buffer_desc input_buffer = gss_buffer_desc(len(message), message)
+    cdef Py_buffer input_view
+    cdef gss_buffer_desc input_buffer
 
     # GSS_C_EMPTY_BUFFER
     cdef gss_buffer_desc output_buffer = gss_buffer_desc(0, NULL)
@@ -239,13 +362,605 @@ def unwrap(SecurityContext context not None, message):
 
     cdef OM_uint32 maj_stat, min_stat
 
+    c_get_buffer(message, &input_view, &input_buffer)
     with nogil:
         maj_stat = gss_unwrap(&min_stat, context.raw_ctx, &input_buffer,
                               &output_buffer, &conf_state, &qop_state)
+    PyBuffer_Release(&input_view)
+
+    if maj_stat == GSS_S_COMPLETE:
+        output_message = c_make_buffer(&output_buffer, as_buffer)
+        return _tuple_new(UnwrapResult,
+                          (output_message, <bint>conf_state, qop_state))
+    else:
+        raise GSSError(maj_stat, min_stat)
+
+
+def wrap_bytes(SecurityContext context not None, message, confidential=True,
+               qop=None):
+    """
+    Wrap/Encrypt a message, returning only the wrapped message.
+
+    This method works like :func:`wrap`, except that it returns just
+    the wrapped message, without constructing a :class:`WrapResult`.
+    Use it when it does not matter whether or not encryption was
+    actually used.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (bytes): the message to wrap or encrypt
+        confidential (bool): whether or not to encrypt the message (True),
+            or just wrap it with a MIC (False)
+        qop (int): the desired Quality of Protection
+            (or None for the default QoP)
+
+    Returns:
+        bytes: the wrapped/encrypted message
+
+    Raises:
+        GSSError
+    """
+
+    cdef int conf_req = confidential
+    cdef gss_qop_t qop_req = qop if qop is not None else GSS_C_QOP_DEFAULT
+
+    cdef Py_buffer message_view
+    cdef gss_buffer_desc message_buffer
+
+    # GSS_C_EMPTY_BUFFER
+    cdef gss_buffer_desc output_buffer = gss_buffer_desc(0, NULL)
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    c_get_buffer(message, &message_view, &message_buffer)
+    with nogil:
+        maj_stat = gss_wrap(&min_stat, context.raw_ctx, conf_req, qop_req,
+                            &message_buffer, NULL, &output_buffer)
+    PyBuffer_Release(&message_view)
 
     if maj_stat == GSS_S_COMPLETE:
-        output_message = output_buffer.value[:output_buffer.length]
-        gss_release_buffer(&min_stat, &output_buffer)
-        return UnwrapResult(output_message, <bint>conf_state, qop_state)
+        return c_make_buffer(&output_buffer, False)
     else:
         raise GSSError(maj_stat, min_stat)
+
+
+cdef object _unwrap_bytes(SecurityContext context, message,
+                          bint require_conf):
+    """Unwrap a message, optionally requiring confidentiality"""
+
+    cdef Py_buffer input_view
+    cdef gss_buffer_desc input_buffer
+
+    # GSS_C_EMPTY_BUFFER
+    cdef gss_buffer_desc output_buffer = gss_buffer_desc(0, NULL)
+    cdef int conf_state
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    # only ask for the conf state when it will be checked
+    c_get_buffer(message, &input_view, &input_buffer)
+    with nogil:
+        if require_conf:
+            maj_stat = gss_unwrap(&min_stat, context.raw_ctx, &input_buffer,
+                                  &output_buffer, &conf_state, NULL)
+        else:
+            maj_stat = gss_unwrap(&min_stat, context.raw_ctx, &input_buffer,
+                                  &output_buffer, NULL, NULL)
+    PyBuffer_Release(&input_view)
+
+    if maj_stat != GSS_S_COMPLETE:
+        raise GSSError(maj_stat, min_stat)
+
+    output_message = c_make_buffer(&output_buffer, False)
+    if require_conf and not conf_state:
+        raise EncryptionNotUsedError("The unwrapped message was not "
+                                     "encrypted",
+                                     unwrapped_message=output_message)
+
+    return output_message
+
+
+def unwrap_bytes(SecurityContext context not None, message):
+    """
+    Unwrap/Decrypt a message, returning only the unwrapped message.
+
+    This method works like :func:`unwrap`, except that it returns just
+    the unwrapped message, without constructing an :class:`UnwrapResult`.
+    Use it when it does not matter whether or not encryption was used
+    (see :func:`unwrap_checked` otherwise).
+
+    Args:
+        context (SecurityContext): the current security context
+        message (bytes): the message to unwrap/decrypt
+
+    Returns:
+        bytes: the unwrapped/decrypted message
+
+    Raises:
+        GSSError
+    """
+
+    return _unwrap_bytes(context, message, False)
+
+
+def unwrap_checked(SecurityContext context not None, message,
+                   require_conf=True):
+    """
+    Unwrap/Decrypt a message, checking that it was encrypted.
+
+    This method works like :func:`unwrap_bytes`, except that if
+    `require_conf` is set, an error is raised if the message was not
+    encrypted.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (bytes): the message to unwrap/decrypt
+        require_conf (bool): whether or not to require that the message
+            was encrypted
+
+    Returns:
+        bytes: the unwrapped/decrypted message
+
+    Raises:
+        GSSError
+        EncryptionNotUsedError: the message was not encrypted, but
+            `require_conf` was set
+    """
+
+    return _unwrap_bytes(context, message, require_conf)
+
+
+def wrap_into(SecurityContext context not None, message, out_buffer,
+              confidential=True, qop=None, Py_ssize_t headroom=0,
+              check_size=False):
+    """
+    Wrap/Encrypt a message into an existing buffer.
+
+    This method works like :func:`wrap`, except that the wrapped message
+    is copied directly into the given writable buffer (such as a
+    :class:`bytearray` or writable :class:`memoryview`), instead of
+    into a new :class:`bytes` object.  The first `headroom` bytes of the
+    buffer are left untouched, so that the caller may later fill them in
+    (e.g. with a length prefix).
+
+    Use :func:`wrap_size_limit` to size the buffer ahead of time.  If the
+    wrapped message turns out not to fit anyway, it has already used up
+    a sequence number, so it is returned as the `token` attribute of the
+    raised :class:`OutputBufferTooSmallError` instead of being discarded.
+    Alternatively, set `check_size` to check the buffer with
+    :func:`wrap_size_limit` before wrapping the message, at the cost of
+    an extra call into the GSSAPI library.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (bytes): the message to wrap or encrypt
+        out_buffer (bytearray): the writable buffer to place the wrapped
+            message in
+        confidential (bool): whether or not to encrypt the message (True),
+            or just wrap it with a MIC (False)
+        qop (int): the desired Quality of Protection
+            (or None for the default QoP)
+        headroom (int): the number of bytes to leave free at the start
+            of the output buffer
+        check_size (bool): whether or not to check that the wrapped
+            message will fit before wrapping it
+
+    Returns:
+        WrapIntoResult: the number of bytes written (after the headroom),
+            and whether or not encryption was actually used
+
+    Raises:
+        GSSError
+        OutputBufferTooSmallError: the output buffer is too small
+        BufferError: the output buffer is not writable
+    """
+
+    cdef int conf_req = confidential
+    cdef gss_qop_t qop_req = qop if qop is not None else GSS_C_QOP_DEFAULT
+
+    cdef Py_buffer out_view
+    cdef OM_uint32 available
+    cdef OM_uint32 max_input_size
+    cdef Py_ssize_t needed
+
+    cdef Py_buffer message_view
+    cdef gss_buffer_desc message_buffer
+
+    cdef int conf_used
+    # GSS_C_EMPTY_BUFFER
+    cdef gss_buffer_desc output_buffer = gss_buffer_desc(0, NULL)
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    _get_out_view(out_buffer, &out_view, headroom)
+    try:
+        if check_size:
+            if out_view.len - headroom > 0xffffffff:
+                available = 0xffffffff
+            else:
+                available = <OM_uint32>(out_view.len - headroom)
+
+            with nogil:
+                maj_stat = gss_wrap_size_limit(&min_stat, context.raw_ctx,
+                                               conf_req, qop_req, available,
+                                               &max_input_size)
+            if maj_stat != GSS_S_COMPLETE:
+                raise GSSError(maj_stat, min_stat)
+
+        c_get_buffer(message, &message_view, &message_buffer)
+        if check_size and message_buffer.length > max_input_size:
+            PyBuffer_Release(&message_view)
+            raise OutputBufferTooSmallError(
+                "The output buffer is too small: at most {0} bytes may be "
+                "wrapped into the {1} bytes available, but the message is "
+                "{2} bytes".format(max_input_size, available,
+                                   message_buffer.length))
+
+        with nogil:
+            maj_stat = gss_wrap(&min_stat, context.raw_ctx, conf_req,
+                                qop_req, &message_buffer, &conf_used,
+                                &output_buffer)
+        PyBuffer_Release(&message_view)
+
+        if maj_stat != GSS_S_COMPLETE:
+            raise GSSError(maj_stat, min_stat)
+
+        try:
+            if out_view.len - headroom < <Py_ssize_t>output_buffer.length:
+                needed = headroom + <Py_ssize_t>output_buffer.length
+                raise OutputBufferTooSmallError(
+                    "The output buffer is too small: {0} bytes are needed, "
+                    "but only {1} are available".format(needed,
+                                                        out_view.len),
+                    token=c_make_buffer(&output_buffer, False))
+
+            length = _copy_into(&output_buffer, &out_view, headroom)
+        finally:
+            gss_release_buffer(&min_stat, &output_buffer)
+    finally:
+        PyBuffer_Release(&out_view)
+
+    return WrapIntoResult(length, <bint>conf_used)
+
+
+def unwrap_into(SecurityContext context not None, message, out_buffer):
+    """
+    Unwrap/Decrypt a message into an existing buffer.
+
+    This method works like :func:`unwrap`, except that the unwrapped
+    message is copied directly into the start of the given writable buffer
+    (such as a :class:`bytearray` or writable :class:`memoryview`),
+    instead of into a new :class:`bytes` object.
+
+    Since the size of the unwrapped message is not known until it has
+    been unwrapped (which consumes it), the output buffer must be at least
+    as large as the wrapped message (an unwrapped message is never larger
+    than the wrapped message), and this is checked before unwrapping it.
+
+    Args:
+        context (SecurityContext): the current security context
+        message (bytes): the message to unwrap/decrypt
+        out_buffer (bytearray): the writable buffer to place the unwrapped
+            message in
+
+    Returns:
+        UnwrapIntoResult: the number of bytes written, whether or not
+            encryption was used, and the QoP used
+
+    Raises:
+        GSSError
+        ValueError: the output buffer is smaller than the wrapped message
+        BufferError: the output buffer is not writable
+    """
+
+    cdef Py_buffer out_view
+
+    cdef Py_buffer input_view
+    cdef gss_buffer_desc input_buffer
+
+    # GSS_C_EMPTY_BUFFER
+    cdef gss_buffer_desc output_buffer = gss_buffer_desc(0, NULL)
+    cdef int conf_state
+    cdef gss_qop_t qop_state
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    _get_out_view(out_buffer, &out_view, 0)
+    try:
+        c_get_buffer(message, &input_view, &input_buffer)
+        try:
+            _check_room(&out_view, 0, <Py_ssize_t>input_buffer.length)
+        except:
+            PyBuffer_Release(&input_view)
+            raise
+
+        with nogil:
+            maj_stat = gss_unwrap(&min_stat, context.raw_ctx, &input_buffer,
+                                  &output_buffer, &conf_state, &qop_state)
+        PyBuffer_Release(&input_view)
+
+        if maj_stat != GSS_S_COMPLETE:
+            raise GSSError(maj_stat, min_stat)
+
+        try:
+            length = _copy_into(&output_buffer, &out_view, 0)
+        finally:
+            gss_release_buffer(&min_stat, &output_buffer)
+    finally:
+        PyBuffer_Release(&out_view)
+
+    return UnwrapIntoResult(length, <bint>conf_state, qop_state)
+
+
+def wrap_many(SecurityContext context not None, messages, confidential=True,
+              qop=None):
+    """
+    Wrap/Encrypt a batch of messages.
+
+    This method wraps or encrypts each of the given messages, exactly
+    as :func:`wrap` would, but performs all the GSSAPI calls while
+    releasing the GIL only once.  The messages are wrapped in order.
+
+    Errors in wrapping one message do not stop the rest of the batch:
+    the result for that message is the corresponding :class:`GSSError`,
+    which is returned instead of being raised.
+
+    Args:
+        context (SecurityContext): the current security context
+        messages ([bytes]): the messages to wrap or encrypt
+        confidential (bool): whether or not to encrypt the messages (True),
+            or just wrap them with a MIC (False)
+        qop (int): the desired Quality of Protection
+            (or None for the default QoP)
+
+    Returns:
+        [WrapResult]: the result of wrapping each message (or the
+            GSSError for messages which could not be wrapped)
+    """
+
+    cdef int conf_req = confidential
+    cdef gss_qop_t qop_req = qop if qop is not None else GSS_C_QOP_DEFAULT
+
+    messages = list(messages)
+    cdef Py_ssize_t count = len(messages)
+    if not count:
+        return []
+
+    cdef Py_buffer *views
+    cdef _BatchOp *ops = _alloc_batch(count, &views)
+    cdef gss_ctx_id_t ctx = context.raw_ctx
+    cdef Py_ssize_t i
+
+    try:
+        for i in range(count):
+            c_get_buffer(messages[i], &views[i], &ops[i].input_buffer)
+
+        with nogil:
+            for i in range(count):
+                ops[i].maj_stat = gss_wrap(&ops[i].min_stat, ctx, conf_req,
+                                           qop_req, &ops[i].input_buffer,
+                                           &ops[i].conf_state,
+                                           &ops[i].output_buffer)
+
+        res = []
+        for i in range(count):
+            if ops[i].maj_stat == GSS_S_COMPLETE:
+                output_message = ops[i].output_buffer.value[
+                    :ops[i].output_buffer.length]
+                res.append(_tuple_new(WrapResult,
+                                      (output_message,
+                                       <bint>ops[i].conf_state)))
+            else:
+                res.append(GSSError(ops[i].maj_stat, ops[i].min_stat))
+
+        return res
+    finally:
+        _free_batch(ops, views, count)
+
+
+def unwrap_many(SecurityContext context not None, messages):
+    """
+    Unwrap/Decrypt a batch of messages.
+
+    This method unwraps or decrypts each of the given messages, exactly
+    as :func:`unwrap` would, but performs all the GSSAPI calls while
+    releasing the GIL only once.  The messages are unwrapped in order.
+
+    Errors in unwrapping one message do not stop the rest of the batch:
+    the result for that message is the corresponding :class:`GSSError`,
+    which is returned instead of being raised.
+
+    Args:
+        context (SecurityContext): the current security context
+        messages ([bytes]): the messages to unwrap/decrypt
+
+    Returns:
+        [UnwrapResult]: the result of unwrapping each message (or the
+            GSSError for messages which could not be unwrapped)
+    """
+
+    messages = list(messages)
+    cdef Py_ssize_t count = len(messages)
+    if not count:
+        return []
+
+    cdef Py_buffer *views
+    cdef _BatchOp *ops = _alloc_batch(count, &views)
+    cdef gss_ctx_id_t ctx = context.raw_ctx
+    cdef Py_ssize_t i
+
+    try:
+        for i in range(count):
+            c_get_buffer(messages[i], &views[i], &ops[i].input_buffer)
+
+        with nogil:
+            for i in range(count):
+                ops[i].maj_stat = gss_unwrap(&ops[i].min_stat, ctx,
+                                             &ops[i].input_buffer,
+                                             &ops[i].output_buffer,
+                                             &ops[i].conf_state,
+                                             &ops[i].qop_state)
+
+        res = []
+        for i in range(count):
+            if ops[i].maj_stat == GSS_S_COMPLETE:
+                output_message = ops[i].output_buffer.value[
+                    :ops[i].output_buffer.length]
+                res.append(_tuple_new(UnwrapResult,
+                                      (output_message,
+                                       <bint>ops[i].conf_state,
+                                       ops[i].qop_state)))
+            else:
+                res.append(GSSError(ops[i].maj_stat, ops[i].min_stat))
+
+        return res
+    finally:
+        _free_batch(ops, views, count)
+
+
+def get_mic_batch(operations):
+    """
+    Generate MICs for a batch of messages across security contexts.
+
+    This method generates a MIC token for each of the given messages,
+    exactly as :func:`get_mic` would, but performs all the GSSAPI calls
+    while releasing the GIL only once.  Each message may use a different
+    security context.
+
+    Errors do not stop the rest of the batch, and are not raised.
+    Instead, the status codes for each message are returned, and
+    the token for a failed message is None.
+
+    Args:
+        operations ([(SecurityContext, bytes)]): the context and
+            message for each MIC to generate, optionally followed by
+            the requested QoP
+
+    Returns:
+        GetMICBatchResult: the MIC tokens, and arrays of the major and
+            minor status codes for each message
+    """
+
+    operations = list(operations)
+    cdef Py_ssize_t count = len(operations)
+
+    cdef array.array maj_stats = array.clone(_STATUS_ARRAY_TEMPLATE, count,
+                                             zero=False)
+    cdef array.array min_stats = array.clone(_STATUS_ARRAY_TEMPLATE, count,
+                                             zero=False)
+    if not count:
+        return GetMICBatchResult([], maj_stats, min_stats)
+
+    cdef Py_buffer *views
+    cdef _BatchOp *ops = _alloc_batch(count, &views)
+    cdef Py_ssize_t i
+    cdef SecurityContext context
+
+    try:
+        for i in range(count):
+            op = operations[i]
+            context = op[0]
+            if context is None:
+                raise TypeError("Each operation must have a security context")
+
+            ops[i].context = context.raw_ctx
+            if len(op) > 2 and op[2] is not None:
+                ops[i].qop_state = op[2]
+            else:
+                ops[i].qop_state = GSS_C_QOP_DEFAULT
+
+            c_get_buffer(op[1], &views[i], &ops[i].input_buffer)
+
+        with nogil:
+            for i in range(count):
+                ops[i].maj_stat = gss_get_mic(&ops[i].min_stat,
+                                              ops[i].context,
+                                              ops[i].qop_state,
+                                              &ops[i].input_buffer,
+                                              &ops[i].output_buffer)
+
+        tokens = []
+        for i in range(count):
+            maj_stats.data.as_uints[i] = ops[i].maj_stat
+            min_stats.data.as_uints[i] = ops[i].min_stat
+            if ops[i].maj_stat == GSS_S_COMPLETE:
+                tokens.append(ops[i].output_buffer.value[
+                    :ops[i].output_buffer.length])
+            else:
+                tokens.append(None)
+
+        return GetMICBatchResult(tokens, maj_stats, min_stats)
+    finally:
+        _free_batch(ops, views, count)
+
+
+def verify_mic_batch(operations):
+    """
+    Verify MICs for a batch of messages across security contexts.
+
+    This method verifies the MIC token for each of the given messages,
+    exactly as :func:`verify_mic` would, but performs all the GSSAPI
+    calls while releasing the GIL only once.  Each message may use a
+    different security context.
+
+    Invalid MICs do not stop the rest of the batch, and no errors are
+    raised.  Instead, the status codes for each message are returned,
+    so that invalid MICs may be rejected without constructing a
+    :class:`GSSError` for each.  A MIC is valid if its major status
+    code is zero (GSS_S_COMPLETE).
+
+    Args:
+        operations ([(SecurityContext, bytes, bytes)]): the context,
+            message and MIC token for each MIC to verify
+
+    Returns:
+        VerifyMICBatchResult: arrays of the major and minor status codes,
+            and of the QoPs used, for each message
+    """
+
+    operations = list(operations)
+    cdef Py_ssize_t count = len(operations)
+
+    cdef array.array maj_stats = array.clone(_STATUS_ARRAY_TEMPLATE, count,
+                                             zero=False)
+    cdef array.array min_stats = array.clone(_STATUS_ARRAY_TEMPLATE, count,
+                                             zero=False)
+    cdef array.array qops = array.clone(_STATUS_ARRAY_TEMPLATE, count,
+                                        zero=False)
+    if not count:
+        return VerifyMICBatchResult(maj_stats, min_stats, qops)
+
+    cdef Py_buffer *views
+    cdef _BatchOp *ops = _alloc_batch(count, &views, 2)
+    cdef Py_ssize_t i
+    cdef SecurityContext context
+
+    try:
+        for i in range(count):
+            (context, message, token) = operations[i]
+            if context is None:
+                raise TypeError("Each operation must have a security context")
+
+            ops[i].context = context.raw_ctx
+            c_get_buffer(message, &views[2 * i], &ops[i].input_buffer)
+            c_get_buffer(token, &views[2 * i + 1], &ops[i].token_buffer)
+
+        with nogil:
+            for i in range(count):
+                ops[i].maj_stat = gss_verify_mic(&ops[i].min_stat,
+                                                 ops[i].context,
+                                                 &ops[i].input_buffer,
+                                                 &ops[i].token_buffer,
+                                                 &ops[i].qop_state)
+
+        for i in range(count):
+            maj_stats.data.as_uints[i] = ops[i].maj_stat
+            min_stats.data.as_uints[i] = ops[i].min_stat
+            if ops[i].maj_stat == GSS_S_COMPLETE:
+                qops.data.as_uints[i] = ops[i].qop_state
+            else:
+                qops.data.as_uints[i] = 0
+
+        return VerifyMICBatchResult(maj_stats, min_stats, qops)
+    finally:
+        _free_batch(ops, views, count, 2)
@@ -18,18 +18,18 @@ cdef extern from "gssapi.h":
                                  int status_type,
                                  const gss_OID mech_type,
                                  OM_uint32 *message_context,
-                                 gss_buffer_t status_string)
+                                 gss_buffer_t status_string) nogil
 
     OM_uint32 gss_indicate_mechs(OM_uint32 *minor_status,
-                                 gss_OID_set *mech_set)
+                                 gss_OID_set *mech_set) nogil
 
     OM_uint32 gss_inquire_names_for_mech(OM_uint32 *minor_status,
                                          const gss_OID mech_type,
-                                         gss_OID_set *name_types)
+                                         gss_OID_set *name_types) nogil
 
     OM_uint32 gss_inquire_mechs_for_name(OM_uint32 *minor_status,
                                          const gss_name_t input_name,
-                                         gss_OID_set *mech_types)
+                                         gss_OID_set *mech_types) nogil
 
 
 def indicate_mechs():
@@ -44,7 +44,8 @@ def indicate_mechs():
 
     cdef OM_uint32 maj_stat, min_stat
 
-    maj_stat = gss_indicate_mechs(&min_stat, &mech_set)
+    with nogil:
+        maj_stat = gss_indicate_mechs(&min_stat, &mech_set)
 
     if maj_stat == GSS_S_COMPLETE:
         return c_create_oid_set(mech_set)
@@ -72,8 +73,9 @@ def inquire_names_for_mech(OID mech not None):
 
     cdef OM_uint32 maj_stat, min_stat
 
-    maj_stat = gss_inquire_names_for_mech(&min_stat, &mech.raw_oid,
-                                          &name_types)
+    with nogil:
+        maj_stat = gss_inquire_names_for_mech(&min_stat, &mech.raw_oid,
+                                              &name_types)
 
     if maj_stat == GSS_S_COMPLETE:
         return c_create_oid_set(name_types)
@@ -101,8 +103,9 @@ def inquire_mechs_for_name(Name name not None):
 
     cdef OM_uint32 maj_stat, min_stat
 
-    maj_stat = gss_inquire_mechs_for_name(&min_stat, name.raw_name,
-                                          &mech_types)
+    with nogil:
+        maj_stat = gss_inquire_mechs_for_name(&min_stat, name.raw_name,
+                                              &mech_types)
 
     if maj_stat == GSS_S_COMPLETE:
         return c_create_oid_set(mech_types)
@@ -157,8 +160,9 @@ def _display_status(unsigned int error_code, bint is_major_code,
     cdef OM_uint32 msg_ctx_out = message_context
     cdef gss_buffer_desc msg_buff
 
-    maj_stat = gss_display_status(&min_stat, error_code, status_type,
-                                  c_mech_type, &msg_ctx_out, &msg_buff)
+    with nogil:
+        maj_stat = gss_display_status(&min_stat, error_code, status_type,
+                                      c_mech_type, &msg_ctx_out, &msg_buff)
 
     if maj_stat == GSS_S_COMPLETE:
         call_again = bool(msg_ctx_out)
@@ -48,6 +48,13 @@ InitSecContextResult = namedtuple('InitSecContextResult',
                                    'lifetime', 'more_steps'])
 
 
+AcceptStepResult = namedtuple('AcceptStepResult',
+                              ['token', 'more_steps', 'delegated_creds'])
+
+
+InitStepResult = namedtuple('InitStepResult', ['token', 'more_steps'])
+
+
 InquireContextResult = namedtuple('InquireContextResult',
                                   ['initiator_name', 'target_name',
                                    'lifetime', 'mech', 'flags',
@@ -55,3 +62,31 @@ InquireContextResult = namedtuple('InquireContextResult',
 
 StoreCredResult = namedtuple('StoreCredResult',
                              ['mechs', 'usage'])
+
+
+IOVUnwrapResult = namedtuple('IOVUnwrapResult',
+                             ['encrypted', 'qop'])
+
+
+IOVBuffer = namedtuple('IOVBuffer',
+                       ['type', 'allocate', 'value'])
+
+
+GetMICBatchResult = namedtuple('GetMICBatchResult',
+                               ['tokens', 'major_statuses',
+                                'minor_statuses'])
+
+
+VerifyMICBatchResult = namedtuple('VerifyMICBatchResult',
+                                  ['major_statuses', 'minor_statuses',
+                                   'qops'])
+
+
+WrapIntoResult = namedtuple('WrapIntoResult', ['length', 'encrypted'])
+
+
+UnwrapIntoResult = namedtuple('UnwrapIntoResult',
+                              ['length', 'encrypted', 'qop'])
+
+
+PreparedContext = namedtuple('PreparedContext', ['context', 'token'])
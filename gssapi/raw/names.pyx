@@ -1,6 +1,10 @@
 GSSAPI="BASE"  # this ensures that a full module is generated by Cython
 
+from cpython.buffer cimport PyBuffer_Release
+
 from gssapi.raw.cython_types cimport *
+from gssapi.raw.buffers cimport c_make_buffer
+from gssapi.raw.cython_converters cimport c_get_buffer
 from gssapi.raw.oids cimport OID
 
 from gssapi.raw.misc import GSSError
@@ -59,7 +63,8 @@ cdef class Name:
         # methods
         cdef OM_uint32 maj_stat, min_stat
         if self.raw_name is not GSS_C_NO_NAME:
-            maj_stat = gss_release_name(&min_stat, &self.raw_name)
+            with nogil:
+                maj_stat = gss_release_name(&min_stat, &self.raw_name)
             if maj_stat != GSS_S_COMPLETE:
                 raise GSSError(maj_stat, min_stat)
             self.raw_name = NULL
@@ -89,18 +94,18 @@ def import_name(name not None, OID name_type=None):
     else:
         nt = &name_type.raw_oid
 
-    # GSS_C_EMPTY_BUFFER
-    cdef gss_buffer_desc name_buffer = gss_buffer_desc(0, NULL)
-    name_buffer.length = len(name)
-    name_buffer.value = name
+    cdef Py_buffer name_view
+    cdef gss_buffer_desc name_buffer
 
     cdef gss_name_t output_name
 
     cdef OM_uint32 maj_stat, min_stat
 
+    c_get_buffer(name, &name_view, &name_buffer)
     with nogil:
         maj_stat = gss_import_name(&min_stat, &name_buffer,
                                    nt, &output_name)
+    PyBuffer_Release(&name_view)
 
     cdef Name on = Name()
     if maj_stat == GSS_S_COMPLETE:
@@ -141,8 +146,9 @@ def display_name(Name name not None, name_type=True):
 
     cdef OM_uint32 maj_stat, min_stat
 
-    maj_stat = gss_display_name(&min_stat, name.raw_name,
-                                &output_buffer, output_name_type_ptr)
+    with nogil:
+        maj_stat = gss_display_name(&min_stat, name.raw_name,
+                                    &output_buffer, output_name_type_ptr)
 
     cdef OID py_name_type
     if maj_stat == GSS_S_COMPLETE:
@@ -191,8 +197,9 @@ def compare_name(Name name1=None, Name name2=None):
 
     cdef OM_uint32 maj_stat, min_stat
 
-    maj_stat = gss_compare_name(&min_stat, name1.raw_name,
-                                name2.raw_name, &is_equal)
+    with nogil:
+        maj_stat = gss_compare_name(&min_stat, name1.raw_name,
+                                    name2.raw_name, &is_equal)
 
     if maj_stat == GSS_S_COMPLETE:
         return <bint>is_equal
@@ -200,7 +207,7 @@ def compare_name(Name name1=None, Name name2=None):
         raise GSSError(maj_stat, min_stat)
 
 
-def export_name(Name name not None):
+def export_name(Name name not None, as_buffer=False):
     """
     Export a GSSAPI Mechanim Name.
 
@@ -216,9 +223,11 @@ def export_name(Name name not None):
 
     Args:
         name (Name): the name to export
+        as_buffer (bool): whether to return the exported name as a
+            :class:`GSSBuffer` instead of copying it to a bytes object
 
     Returns:
-        bytes: the exported name
+        bytes: the exported name (a GSSBuffer if `as_buffer` is set)
 
     Raises:
         GSSError
@@ -229,14 +238,11 @@ def export_name(Name name not None):
 
     cdef OM_uint32 maj_stat, min_stat
 
-    maj_stat = gss_export_name(&min_stat, name.raw_name, &exported_name)
+    with nogil:
+        maj_stat = gss_export_name(&min_stat, name.raw_name, &exported_name)
 
     if maj_stat == GSS_S_COMPLETE:
-        # force conversion to a python string with the specified length
-        # (we use the slice to tell cython that we know the length already)
-        res = exported_name.value[:exported_name.length]
-        gss_release_buffer(&min_stat, &exported_name)
-        return res
+        return c_make_buffer(&exported_name, as_buffer)
     else:
         raise GSSError(maj_stat, min_stat)
 
@@ -296,7 +302,8 @@ def duplicate_name(Name name not None):
 
     cdef OM_uint32 maj_stat, min_stat
 
-    maj_stat = gss_duplicate_name(&min_stat, name.raw_name, &new_name)
+    with nogil:
+        maj_stat = gss_duplicate_name(&min_stat, name.raw_name, &new_name)
 
     cdef Name on = Name()
     if maj_stat == GSS_S_COMPLETE:
@@ -318,7 +325,8 @@ def release_name(Name name not None):
     """
 
     cdef OM_uint32 maj_stat, min_stat
-    maj_stat = gss_release_name(&min_stat, &name.raw_name)
+    with nogil:
+        maj_stat = gss_release_name(&min_stat, &name.raw_name)
     if maj_stat != GSS_S_COMPLETE:
         raise GSSError(maj_stat, min_stat)
     name.raw_name = NULL
@@ -1,9 +1,11 @@
 GSSAPI="BASE"  # This ensures that a full module is generated by Cython
 
-from libc.stdlib cimport free
+from cpython.buffer cimport PyBuffer_Release
 
 from gssapi.raw.cython_types cimport *
+from gssapi.raw.buffers cimport c_make_buffer
 from gssapi.raw.cython_converters cimport c_py_ttl_to_c, c_c_ttl_to_py
+from gssapi.raw.cython_converters cimport c_get_buffer
 from gssapi.raw.creds cimport Creds
 from gssapi.raw.names cimport Name
 from gssapi.raw.oids cimport OID
@@ -12,10 +14,17 @@ from gssapi.raw.chan_bindings cimport ChannelBindings
 from gssapi.raw.types import MechType, RequirementFlag, IntEnumFlagSet
 from gssapi.raw.misc import GSSError
 from gssapi.raw.named_tuples import AcceptSecContextResult
+from gssapi.raw.named_tuples import AcceptStepResult
 from gssapi.raw.named_tuples import InitSecContextResult
+from gssapi.raw.named_tuples import InitStepResult
 from gssapi.raw.named_tuples import InquireContextResult
 
 
+# calling tuple.__new__ directly skips the namedtuple constructors'
+# Python-level argument handling
+cdef object _tuple_new = tuple.__new__
+
+
 cdef extern from "gssapi.h":
     OM_uint32 gss_init_sec_context(OM_uint32 *min_stat,
                                    const gss_cred_id_t initiator_creds,
@@ -100,14 +109,96 @@ cdef class SecurityContext:
         cdef OM_uint32 maj_stat, min_stat
         if self.raw_ctx is not GSS_C_NO_CONTEXT:
             # local deletion only
-            maj_stat = gss_delete_sec_context(&min_stat, &self.raw_ctx,
-                                              GSS_C_NO_BUFFER)
+            with nogil:
+                maj_stat = gss_delete_sec_context(&min_stat, &self.raw_ctx,
+                                                  GSS_C_NO_BUFFER)
             if maj_stat != GSS_S_COMPLETE:
                 raise GSSError(maj_stat, min_stat)
 
             self.raw_ctx = NULL
 
 
+cdef object _init_sec_context(SecurityContext context, Name target_name,
+                              Creds creds, OID mech, flags, lifetime,
+                              ChannelBindings channel_bindings,
+                              input_token, gss_OID *actual_mech_type,
+                              OM_uint32 *ret_flags, OM_uint32 *output_ttl,
+                              bint *more_steps):
+    """Call gss_init_sec_context, returning the output token
+
+    The actual mech, flags and lifetime are optional outputs, and are
+    skipped entirely when NULL is passed for them.
+    """
+
+    cdef gss_OID mech_oid
+    if mech is not None:
+        mech_oid = &mech.raw_oid
+    else:
+        mech_oid = GSS_C_NO_OID
+
+    # TODO(directxman12): should we default to this?
+    cdef OM_uint32 req_flags = IntEnumFlagSet(RequirementFlag, flags or [
+        RequirementFlag.mutual_authentication,
+        RequirementFlag.out_of_sequence_detection])
+
+    cdef gss_channel_bindings_t bdng
+    if channel_bindings is not None:
+        bdng = channel_bindings.__cvalue__()
+    else:
+        bdng = GSS_C_NO_CHANNEL_BINDINGS
+
+    cdef gss_buffer_desc input_token_buffer = gss_buffer_desc(0, NULL)
+
+    cdef OM_uint32 input_ttl = c_py_ttl_to_c(lifetime)
+
+    cdef gss_cred_id_t act_cred
+    if creds is not None:
+        act_cred = creds.raw_creds
+    else:
+        act_cred = GSS_C_NO_CREDENTIAL
+
+    cdef Py_buffer input_token_view
+
+    cdef gss_buffer_desc output_token_buffer = gss_buffer_desc(0, NULL)
+
+    cdef OM_uint32 maj_stat, min_stat
+
+    if input_token is not None:
+        try:
+            c_get_buffer(input_token, &input_token_view, &input_token_buffer)
+        except:
+            if channel_bindings is not None:
+                channel_bindings.__release_cvalue__(bdng)
+            raise
+
+    with nogil:
+        maj_stat = gss_init_sec_context(&min_stat, act_cred,
+                                        &context.raw_ctx,
+                                        target_name.raw_name,
+                                        mech_oid, req_flags, input_ttl,
+                                        bdng, &input_token_buffer,
+                                        actual_mech_type,
+                                        &output_token_buffer,
+                                        ret_flags, output_ttl)
+
+    if input_token is not None:
+        PyBuffer_Release(&input_token_view)
+
+    output_token = None
+    if output_token_buffer.length:
+        output_token = output_token_buffer.value[:output_token_buffer.length]
+    gss_release_buffer(&min_stat, &output_token_buffer)
+
+    if channel_bindings is not None:
+        channel_bindings.__release_cvalue__(bdng)
+
+    if maj_stat == GSS_S_COMPLETE or maj_stat == GSS_S_CONTINUE_NEEDED:
+        more_steps[0] = maj_stat == GSS_S_CONTINUE_NEEDED
+        return output_token
+    else:
+        raise GSSError(maj_stat, min_stat, token=output_token)
+
+
 # TODO(directxman12): figure out whether GSS_C_NO_NAME can be passed in here
 def init_sec_context(Name target_name not None, Creds creds=None,
                      SecurityContext context=None,
@@ -155,16 +246,95 @@ def init_sec_context(Name target_name not None, Creds creds=None,
         GSSError
     """
 
-    cdef gss_OID mech_oid
-    if mech is not None:
-        mech_oid = &mech.raw_oid
-    else:
-        mech_oid = GSS_C_NO_OID
+    cdef SecurityContext output_context = context
+    if output_context is None:
+        output_context = SecurityContext()
 
-    # TODO(directxman12): should we default to this?
-    cdef OM_uint32 req_flags = IntEnumFlagSet(RequirementFlag, flags or [
-        RequirementFlag.mutual_authentication,
-        RequirementFlag.out_of_sequence_detection])
+    cdef gss_OID actual_mech_type
+    cdef OM_uint32 ret_flags
+    cdef OM_uint32 output_ttl
+    cdef bint more_steps
+
+    output_token = _init_sec_context(output_context, target_name, creds,
+                                     mech, flags, lifetime,
+                                     channel_bindings, input_token,
+                                     &actual_mech_type, &ret_flags,
+                                     &output_ttl, &more_steps)
+
+    cdef OID output_mech_type = OID()
+    output_mech_type.raw_oid = actual_mech_type[0]
+    return _tuple_new(InitSecContextResult,
+                      (output_context, output_mech_type,
+                       IntEnumFlagSet(RequirementFlag, ret_flags),
+                       output_token, c_c_ttl_to_py(output_ttl), more_steps))
+
+
+def init_step(SecurityContext context not None, Name target_name not None,
+              input_token=None, Creds creds=None, OID mech=None,
+              flags=None, lifetime=None,
+              ChannelBindings channel_bindings=None):
+    """
+    Perform a single initiator negotiation step.
+
+    This method works like :func:`init_sec_context`, except that it only
+    returns the output token and whether or not more steps are needed.
+    The actual mechanism, flags and lifetime are not requested from the
+    GSSAPI implementation (and no Python objects are created for them),
+    which makes it cheaper to call on every step of a negotiation.  They
+    may be retrieved with :func:`inquire_context` once they are needed.
+
+    Warning:
+        This changes the input context!
+
+    Args:
+        context (SecurityContext): the security context to update (which may
+            be a new, empty :class:`SecurityContext` object)
+        target_name (Name): the target for the security context
+        input_token (bytes): the token to use to update the security context,
+            or None if you are creating a new context
+        creds (Creds): the credentials to use to initiate the context,
+            or None to use the default credentials
+        mech (MechType): the mechanism type for this security context,
+            or None for the default mechanism type
+        flags ([RequirementFlag]): the flags to request for the security
+            context, or None to use the default set: mutual_authentication and
+            out_of_sequence_detection
+        lifetime (int): the request lifetime of the security context (a value
+            of 0 or None means indefinite)
+        channel_bindings (ChannelBindings): The channel bindings (or None for
+            no channel bindings)
+
+    Returns:
+        InitStepResult: the output token to send to the acceptor, and whether
+        or not more calls are needed to finish the initiation.
+
+    Raises:
+        GSSError
+    """
+
+    cdef bint more_steps
+
+    output_token = _init_sec_context(context, target_name, creds, mech,
+                                     flags, lifetime, channel_bindings,
+                                     input_token, NULL, NULL, NULL,
+                                     &more_steps)
+
+    return _tuple_new(InitStepResult, (output_token, more_steps))
+
+
+cdef object _accept_sec_context(SecurityContext context, input_token,
+                                Creds acceptor_creds,
+                                ChannelBindings channel_bindings,
+                                gss_name_t *initiator_name,
+                                gss_OID *mech_type, OM_uint32 *ret_flags,
+                                OM_uint32 *output_ttl,
+                                gss_cred_id_t *delegated_cred,
+                                bint *more_steps):
+    """Call gss_accept_sec_context, returning the output token
+
+    The initiator name, mech, flags and lifetime are optional outputs, and
+    are skipped entirely when NULL is passed for them.
+    """
 
     cdef gss_channel_bindings_t bdng
     if channel_bindings is not None:
@@ -172,40 +342,37 @@ def init_sec_context(Name target_name not None, Creds creds=None,
     else:
         bdng = GSS_C_NO_CHANNEL_BINDINGS
 
-    cdef gss_buffer_desc input_token_buffer = gss_buffer_desc(0, NULL)
-
-    cdef OM_uint32 input_ttl = c_py_ttl_to_c(lifetime)
-
-    cdef SecurityContext output_context = context
-    if output_context is None:
-        output_context = SecurityContext()
+    cdef Py_buffer input_token_view
+    cdef gss_buffer_desc input_token_buffer
 
-    cdef gss_cred_id_t act_cred
-    if creds is not None:
-        act_cred = creds.raw_creds
+    cdef gss_cred_id_t act_acceptor_cred
+    if acceptor_creds is not None:
+        act_acceptor_cred = acceptor_creds.raw_creds
     else:
-        act_cred = GSS_C_NO_CREDENTIAL
-
-    if input_token is not None:
-        input_token_buffer.value = input_token
-        input_token_buffer.length = len(input_token)
+        act_acceptor_cred = GSS_C_NO_CREDENTIAL
 
-    cdef gss_OID actual_mech_type
+    # GSS_C_EMPTY_BUFFER
     cdef gss_buffer_desc output_token_buffer = gss_buffer_desc(0, NULL)
-    cdef OM_uint32 ret_flags
-    cdef OM_uint32 output_ttl
 
     cdef OM_uint32 maj_stat, min_stat
 
+    try:
+        c_get_buffer(input_token, &input_token_view, &input_token_buffer)
+    except:
+        if channel_bindings is not None:
+            channel_bindings.__release_cvalue__(bdng)
+        raise
+
     with nogil:
-        maj_stat = gss_init_sec_context(&min_stat, act_cred,
-                                        &output_context.raw_ctx,
-                                        target_name.raw_name,
-                                        mech_oid, req_flags, input_ttl,
-                                        bdng, &input_token_buffer,
-                                        &actual_mech_type,
-                                        &output_token_buffer,
-                                        &ret_flags, &output_ttl)
+        maj_stat = gss_accept_sec_context(&min_stat, &context.raw_ctx,
+                                          act_acceptor_cred,
+                                          &input_token_buffer, bdng,
+                                          initiator_name, mech_type,
+                                          &output_token_buffer,
+                                          ret_flags, output_ttl,
+                                          delegated_cred)
+
+    PyBuffer_Release(&input_token_view)
 
     output_token = None
     if output_token_buffer.length:
@@ -213,17 +380,11 @@ def init_sec_context(Name target_name not None, Creds creds=None,
     gss_release_buffer(&min_stat, &output_token_buffer)
 
     if channel_bindings is not None:
-        free(bdng)
+        channel_bindings.__release_cvalue__(bdng)
 
-    cdef OID output_mech_type = OID()
     if maj_stat == GSS_S_COMPLETE or maj_stat == GSS_S_CONTINUE_NEEDED:
-        output_mech_type.raw_oid = actual_mech_type[0]
-        res = InitSecContextResult(output_context, output_mech_type,
-                                   IntEnumFlagSet(RequirementFlag, ret_flags),
-                                   output_token,
-                                   c_c_ttl_to_py(output_ttl),
-                                   maj_stat == GSS_S_CONTINUE_NEEDED)
-        return res
+        more_steps[0] = maj_stat == GSS_S_CONTINUE_NEEDED
+        return output_token
     else:
         raise GSSError(maj_stat, min_stat, token=output_token)
 
@@ -263,83 +424,95 @@ def accept_sec_context(input_token not None, Creds acceptor_creds=None,
         GSSError
     """
 
-    cdef gss_channel_bindings_t bdng
-    if channel_bindings is not None:
-        bdng = channel_bindings.__cvalue__()
-    else:
-        bdng = GSS_C_NO_CHANNEL_BINDINGS
-
-    cdef gss_buffer_desc input_token_buffer = gss_buffer_desc(len(input_token),
-                                                              input_token)
-
     cdef SecurityContext output_context = context
     if output_context is None:
         output_context = SecurityContext()
 
-    cdef gss_cred_id_t act_acceptor_cred
-    if acceptor_creds is None:
-        act_acceptor_cred = acceptor_creds.raw_creds
-    else:
-        act_acceptor_cred = GSS_C_NO_CREDENTIAL
-
     cdef gss_name_t initiator_name
-    cdef gss_OID mech_type
-    # GSS_C_EMPTY_BUFFER
-    cdef gss_buffer_desc output_token_buffer = gss_buffer_desc(0, NULL)
+    cdef gss_OID mech_type = NULL
     cdef OM_uint32 ret_flags
     cdef OM_uint32 output_ttl
-    cdef gss_cred_id_t delegated_cred
-
-    cdef OM_uint32 maj_stat, min_stat
-
-    with nogil:
-        maj_stat = gss_accept_sec_context(&min_stat, &output_context.raw_ctx,
-                                          act_acceptor_cred,
-                                          &input_token_buffer, bdng,
-                                          &initiator_name,
-                                          &mech_type, &output_token_buffer,
-                                          &ret_flags, &output_ttl,
-                                          &delegated_cred)
-
-    output_token = None
-    if output_token_buffer.length:
-        output_token = output_token_buffer.value[:output_token_buffer.length]
-    gss_release_buffer(&min_stat, &output_token_buffer)
+    cdef gss_cred_id_t delegated_cred = GSS_C_NO_CREDENTIAL
+    cdef bint more_steps
 
-    if channel_bindings is not None:
-        free(bdng)
+    output_token = _accept_sec_context(output_context, input_token,
+                                       acceptor_creds, channel_bindings,
+                                       &initiator_name, &mech_type,
+                                       &ret_flags, &output_ttl,
+                                       &delegated_cred, &more_steps)
 
     cdef Name on = Name()
+    on.raw_name = initiator_name
+
     cdef Creds oc = None
+    if delegated_cred is not GSS_C_NO_CREDENTIAL:
+        oc = Creds()
+        oc.raw_creds = delegated_cred
+
     cdef OID py_mech_type
-    if maj_stat == GSS_S_COMPLETE or maj_stat == GSS_S_CONTINUE_NEEDED:
-        if output_ttl == GSS_C_INDEFINITE:
-            output_ttl_py = None
-        else:
-            output_ttl_py = output_ttl
+    if mech_type is not NULL:
+        py_mech_type = OID()
+        py_mech_type.raw_oid = mech_type[0]
+    else:
+        py_mech_type = None
 
-        on.raw_name = initiator_name
+    return _tuple_new(AcceptSecContextResult,
+                      (output_context, on, py_mech_type, output_token,
+                       IntEnumFlagSet(RequirementFlag, ret_flags),
+                       c_c_ttl_to_py(output_ttl), oc, more_steps))
 
-        if delegated_cred is not NULL:
-            oc = Creds()
-            oc.raw_creds = delegated_cred
 
-        if mech_type is not NULL:
-            py_mech_type = OID()
-            py_mech_type.raw_oid = mech_type[0]
-        else:
-            py_mech_type = None
+def accept_step(SecurityContext context not None, input_token not None,
+                Creds acceptor_creds=None,
+                ChannelBindings channel_bindings=None):
+    """
+    Perform a single acceptor negotiation step.
 
-        res = AcceptSecContextResult(output_context, on, py_mech_type,
-                                     output_token,
-                                     IntEnumFlagSet(RequirementFlag,
-                                                    ret_flags),
-                                     output_ttl_py, oc,
-                                     maj_stat == GSS_S_CONTINUE_NEEDED)
-        gss_release_buffer(&min_stat, &output_token_buffer)
-        return res
-    else:
-        raise GSSError(maj_stat, min_stat, token=output_token)
+    This method works like :func:`accept_sec_context`, except that it only
+    returns the output token, whether or not more steps are needed, and any
+    delegated credentials.  The initiator name, mechanism, flags and
+    lifetime are not requested from the GSSAPI implementation (and no
+    Python objects are created for them), which makes it cheaper to call on
+    every step of a negotiation (such as the intermediate legs of SPNEGO).
+    They may be retrieved with :func:`inquire_context` once they are needed.
+
+    Warning:
+        This changes the input context!
+
+    Args:
+        context (SecurityContext): the security context to update (which may
+            be a new, empty :class:`SecurityContext` object)
+        input_token (bytes): the token sent by the context initiator
+        acceptor_creds (Creds): the credentials to be used to accept the
+            context (or None to use the default credentials)
+        channel_bindings (ChannelBindings): The channel bindings (or None for
+            no channel bindings)
+
+    Returns:
+        AcceptStepResult: the output token, whether or not further token
+            exchanges are needed to finalize the security context, and the
+            delegated credentials (or None if no credentials were delegated)
+
+    Raises:
+        GSSError
+    """
+
+    cdef gss_cred_id_t delegated_cred = GSS_C_NO_CREDENTIAL
+    cdef bint more_steps
+
+    # the delegated credentials are still requested, since GSSAPI would
+    # otherwise discard them
+    output_token = _accept_sec_context(context, input_token,
+                                       acceptor_creds, channel_bindings,
+                                       NULL, NULL, NULL, NULL,
+                                       &delegated_cred, &more_steps)
+
+    cdef Creds oc = None
+    if delegated_cred is not GSS_C_NO_CREDENTIAL:
+        oc = Creds()
+        oc.raw_creds = delegated_cred
+
+    return _tuple_new(AcceptStepResult, (output_token, more_steps, oc))
 
 
 def inquire_context(SecurityContext context not None, initiator_name=True,
@@ -404,10 +577,11 @@ def inquire_context(SecurityContext context not None, initiator_name=True,
 
     cdef OM_uint32 maj_stat, min_stat
 
-    maj_stat = gss_inquire_context(&min_stat, context.raw_ctx, init_name_ptr,
-                                   target_name_ptr, ttl_ptr, mech_type_ptr,
-                                   flags_ptr, locally_init_ptr,
-                                   is_complete_ptr)
+    with nogil:
+        maj_stat = gss_inquire_context(&min_stat, context.raw_ctx,
+                                       init_name_ptr, target_name_ptr,
+                                       ttl_ptr, mech_type_ptr, flags_ptr,
+                                       locally_init_ptr, is_complete_ptr)
 
     cdef Name sn
     cdef OID py_mech_type
@@ -479,7 +653,8 @@ def context_time(SecurityContext context not None):
 
     cdef OM_uint32 maj_stat, min_stat
 
-    maj_stat = gss_context_time(&min_stat, context.raw_ctx, &ttl)
+    with nogil:
+        maj_stat = gss_context_time(&min_stat, context.raw_ctx, &ttl)
 
     if maj_stat == GSS_S_COMPLETE:
         return ttl
@@ -507,13 +682,16 @@ def process_context_token(SecurityContext context not None, token):
         GSSError
     """
 
-    cdef gss_buffer_desc token_buffer = gss_buffer_desc(len(token), token)
+    cdef Py_buffer token_view
+    cdef gss_buffer_desc token_buffer
 
     cdef OM_uint32 maj_stat, min_stat
 
+    c_get_buffer(token, &token_view, &token_buffer)
     with nogil:
         maj_stat = gss_process_context_token(&min_stat, context.raw_ctx,
                                              &token_buffer)
+    PyBuffer_Release(&token_view)
 
     if maj_stat != GSS_S_COMPLETE:
         raise GSSError(maj_stat, min_stat)
@@ -527,14 +705,17 @@ def import_sec_context(token not None):
     by reading the specified token which was output by exportSecContext.
     """
 
-    cdef gss_buffer_desc token_buffer = gss_buffer_desc(len(token), token)
+    cdef Py_buffer token_view
+    cdef gss_buffer_desc token_buffer
 
     cdef gss_ctx_id_t ctx
 
     cdef OM_uint32 maj_stat, min_stat
 
+    c_get_buffer(token, &token_view, &token_buffer)
     with nogil:
         maj_stat = gss_import_sec_context(&min_stat, &token_buffer, &ctx)
+    PyBuffer_Release(&token_view)
 
     if maj_stat == GSS_S_COMPLETE:
         res = SecurityContext()
@@ -544,7 +725,7 @@ def import_sec_context(token not None):
         raise GSSError(maj_stat, min_stat)
 
 
-def export_sec_context(SecurityContext context not None):
+def export_sec_context(SecurityContext context not None, as_buffer=False):
     """
     Export a context for use in another process
 
@@ -556,9 +737,12 @@ def export_sec_context(SecurityContext context not None):
 
     Args:
         context (SecurityContext): the context to send to another process
+        as_buffer (bool): whether to return the output token as a
+            :class:`GSSBuffer` instead of copying it to a bytes object
 
     Returns:
-        bytes: the output token to be imported
+        bytes: the output token to be imported (a GSSBuffer if `as_buffer`
+            is set)
 
     Raises:
         GSSError
@@ -573,9 +757,7 @@ def export_sec_context(SecurityContext context not None):
                                           &output_token)
 
     if maj_stat == GSS_S_COMPLETE:
-        res_token = output_token.value[:output_token.length]
-        gss_release_buffer(&min_stat, &output_token)
-        return res_token
+        return c_make_buffer(&output_token, as_buffer)
     else:
         raise GSSError(maj_stat, min_stat)
 
@@ -606,11 +788,13 @@ def delete_sec_context(SecurityContext context not None, local_only=True):
     # GSS_C_EMPTY_BUFFER
     cdef gss_buffer_desc output_token = gss_buffer_desc(0, NULL)
     if not local_only:
-        maj_stat = gss_delete_sec_context(&min_stat, &context.raw_ctx,
-                                          &output_token)
+        with nogil:
+            maj_stat = gss_delete_sec_context(&min_stat, &context.raw_ctx,
+                                              &output_token)
     else:
-        maj_stat = gss_delete_sec_context(&min_stat, &context.raw_ctx,
-                                          GSS_C_NO_BUFFER)
+        with nogil:
+            maj_stat = gss_delete_sec_context(&min_stat, &context.raw_ctx,
+                                              GSS_C_NO_BUFFER)
 
     if maj_stat == GSS_S_COMPLETE:
         res = output_token.value[:output_token.length]
@@ -10,6 +10,10 @@ from gssapi import _utils
 from gssapi.names import Name
 from gssapi.creds import Credentials
 
+rmessage_dce = _utils.import_gssapi_extension('dce')
+rmessage_aead = _utils.import_gssapi_extension('dce_aead')
+rmessage_iov_mic = _utils.import_gssapi_extension('iov_mic')
+
 
 @six.add_metaclass(_utils.CheckLastError)
 class SecurityContext(rsec_contexts.SecurityContext):
@@ -25,6 +29,13 @@ class SecurityContext(rsec_contexts.SecurityContext):
     This class may be pickled an unpickled.
     """
 
+    # servers may keep huge numbers of idle contexts around, so avoid a
+    # per-instance __dict__
+    __slots__ = ('__weakref__', '_last_err', '_last_tb', '_wrap_sizes',
+                 '_snapshot', 'usage', '_target_name', '_mech',
+                 '_desired_flags', '_desired_lifetime', '_channel_bindings',
+                 '_creds', '_delegated_creds')
+
     def __new__(cls, base=None, token=None,
                 name=None, creds=None, lifetime=None, flags=None,
                 mech=None, channel_bindings=None, usage=None):
@@ -66,6 +77,16 @@ class SecurityContext(rsec_contexts.SecurityContext):
         # NB(directxman12): _last_err must be set first
         self._last_err = None
 
+        # the memoized results of get_wrap_size_limit and predicted_wrap_size
+        # (created on first use)
+        self._wrap_sizes = None
+
+        # the context attributes which are fixed once it is complete
+        self._snapshot = None
+
+        # the raw delegated credentials, until they are first accessed
+        self._delegated_creds = None
+
         # determine the usage ('initiate' vs 'accept')
         if base is None and token is None:
             # this will be a new context
@@ -106,8 +127,6 @@ class SecurityContext(rsec_contexts.SecurityContext):
             self._channel_bindings = channel_bindings
             self._creds = creds
 
-            self.delegated_creds = None
-
         else:
             # we already have a context in progress, just inspect it
             if self.locally_initiated:
@@ -158,6 +177,72 @@ class SecurityContext(rsec_contexts.SecurityContext):
 
         return rmessage.verify_mic(self, message, mic)
 
+    def get_signature_iov(self, messages):
+        """Calculate the signature for a message made of several buffers
+
+        This method calculates the signature (called a MIC) for the
+        message formed by the given buffers, as if they had been joined
+        together, but without actually copying them.  The signature may
+        then be verified with :meth:`verify_signature_iov`, or with
+        :meth:`verify_signature` on the joined message.
+
+        Args:
+            messages ([bytes]): the buffers making up the input message
+                (any objects supporting the buffer protocol)
+
+        Returns:
+            bytes: the message signature
+
+        Raises:
+            NotImplementedError: your GSSAPI implementation does not have
+                support for IOV MICs
+        """
+
+        if rmessage_iov_mic is None:
+            raise NotImplementedError("Your GSSAPI implementation does not "
+                                      "have support for IOV MICs")
+
+        buffs = list(messages)
+        buffs.append((rmessage_dce.IOVBufferType.mic_token, True))
+
+        iov = rmessage_dce.IOV(*buffs, std_layout=False)
+        rmessage_iov_mic.get_mic_iov(self, iov)
+
+        return iov[-1].value
+
+    def verify_signature_iov(self, messages, mic):
+        """Verify the signature for a message made of several buffers
+
+        This method verifies that a signature (generated by
+        :meth:`get_signature_iov` or :meth:`get_signature`) is valid for
+        the message formed by the given buffers, as if they had been
+        joined together, but without actually copying them.
+
+        If the signature is valid, the method will return.
+        Otherwise, it will raise an error.
+
+        Args:
+            messages ([bytes]): the buffers making up the message
+                (any objects supporting the buffer protocol)
+            mic (bytes): the signature to verify
+
+        Raises:
+            BadMICError: the signature was not valid
+            NotImplementedError: your GSSAPI implementation does not have
+                support for IOV MICs
+        """
+
+        if rmessage_iov_mic is None:
+            raise NotImplementedError("Your GSSAPI implementation does not "
+                                      "have support for IOV MICs")
+
+        buffs = list(messages)
+        buffs.append((rmessage_dce.IOVBufferType.mic_token, False, mic))
+
+        iov = rmessage_dce.IOV(*buffs, std_layout=False)
+
+        return rmessage_iov_mic.verify_mic_iov(self, iov)
+
     def wrap(self, message, encrypt):
         """Wrap a message, optionally with encryption
 
@@ -191,6 +276,63 @@ class SecurityContext(rsec_contexts.SecurityContext):
 
         return rmessage.unwrap(self, message)
 
+    def wrap_aead(self, message, associated=None, encrypt=True):
+        """Wrap a message together with associated data
+
+        This method works like :meth:`wrap`, except that the given
+        associated data (such as a cleartext header) is protected along
+        with the message, without being encrypted or included in the
+        wrapped message.  The same associated data must then be passed
+        to :meth:`unwrap_aead` to unwrap the message.
+
+        Args:
+            message (bytes): the message to wrap
+            associated (bytes): the associated data
+                (or None for no associated data)
+            encrypt (bool): whether or not to encrypt the message
+
+        Returns:
+            WrapResult: the wrapped message and details about it
+                (e.g. whether encryption was used succesfully)
+
+        Raises:
+            NotImplementedError: your GSSAPI implementation does not have
+                support for AEAD
+        """
+
+        if rmessage_aead is None:
+            raise NotImplementedError("Your GSSAPI implementation does not "
+                                      "have support for AEAD wrapping")
+
+        return rmessage_aead.wrap_aead(self, message, associated, encrypt)
+
+    def unwrap_aead(self, message, associated=None):
+        """Unwrap a message wrapped together with associated data
+
+        This method unwraps/unencrypts a message wrapped by
+        :meth:`wrap_aead`, verifying the signature of both the message
+        and the associated data along the way.
+
+        Args:
+            message (bytes): the message to unwrap/decrypt
+            associated (bytes): the associated data
+                (or None for no associated data)
+
+        Returns:
+            UnwrapResult: the unwrapped message and details about it
+                (e.g. wheter encryption was used)
+
+        Raises:
+            NotImplementedError: your GSSAPI implementation does not have
+                support for AEAD
+        """
+
+        if rmessage_aead is None:
+            raise NotImplementedError("Your GSSAPI implementation does not "
+                                      "have support for AEAD wrapping")
+
+        return rmessage_aead.unwrap_aead(self, message, associated)
+
     def encrypt(self, message):
         """Encrypt a message
 
@@ -246,12 +388,35 @@ class SecurityContext(rsec_contexts.SecurityContext):
 
         return res.message
 
+    # the maximum number of memoized wrap sizes kept per context
+    _WRAP_SIZE_CACHE_SIZE = 128
+
+    def _memoized_wrap_size(self, key):
+        if self._wrap_sizes is None:
+            return None
+
+        return self._wrap_sizes.get(key)
+
+    def _memoize_wrap_size(self, key, value):
+        # the sizes may change until the context is complete, so only memoize
+        # them after that
+        if not self.complete:
+            return
+
+        if self._wrap_sizes is None:
+            self._wrap_sizes = {}
+        elif len(self._wrap_sizes) >= self._WRAP_SIZE_CACHE_SIZE:
+            self._wrap_sizes.clear()
+
+        self._wrap_sizes[key] = value
+
     def get_wrap_size_limit(self, desired_output_size,
                             encrypted=True):
         """Get the maximum message size for a given wrapped message size
 
         This method calculates the maximum input message size for a given
-        wrapped/encrypted message size.
+        wrapped/encrypted message size.  Once the context is complete,
+        the results are memoized.
 
         Args:
             desired_output_size (int): the maximum output message size
@@ -262,8 +427,173 @@ class SecurityContext(rsec_contexts.SecurityContext):
             int: the maximum input message size
         """
 
-        return rmessage.wrap_size_limit(self, desired_output_size,
-                                        encrypted)
+        key = ('limit', desired_output_size, bool(encrypted))
+        res = self._memoized_wrap_size(key)
+        if res is not None:
+            return res
+
+        res = rmessage.wrap_size_limit(self, desired_output_size,
+                                       encrypted)
+        self._memoize_wrap_size(key, res)
+
+        return res
+
+    def predicted_wrap_size(self, input_size, encrypted=True):
+        """Get the wrapped message size for a given message size
+
+        This method calculates the size of the wrapped/encrypted message
+        for a given input message size, i.e. the reverse of
+        :meth:`get_wrap_size_limit`.  The result is an upper bound (and
+        is normally exact), so it can be used to preallocate buffers for
+        wrapping.  Once the context is complete, the results are memoized.
+
+        Args:
+            input_size (int): the input message size
+            encrypted (bool): whether or not encryption should be taken
+                into account
+
+        Returns:
+            int: the (maximum) wrapped/encrypted message size
+
+        Raises:
+            ValueError: the input message size is too large to be wrapped
+        """
+
+        key = ('prediction', input_size, bool(encrypted))
+        res = self._memoized_wrap_size(key)
+        if res is not None:
+            return res
+
+        def size_limit(output_size):
+            return rmessage.wrap_size_limit(self, output_size, encrypted)
+
+        # wrapping an empty message can't take more room than wrapping a single
+        # byte
+        target = max(input_size, 1)
+
+        # the size limit grows with the output size, so find the smallest
+        # output size which fits the input size
+        max_output_size = 2 ** 32 - 1
+        low = target
+        high = min(target + 64, max_output_size)
+        while size_limit(high) < target:
+            if high == max_output_size:
+                raise ValueError("The input size is too large to be wrapped")
+
+            low = high + 1
+            high = min(high * 2, max_output_size)
+
+        while low < high:
+            mid = (low + high) // 2
+            if size_limit(mid) >= target:
+                high = mid
+            else:
+                low = mid + 1
+
+        self._memoize_wrap_size(key, high)
+
+        return high
+
+    def wrap_stream(self, source, max_token_size, encrypt=True):
+        """Wrap a stream of data, optionally with encryption
+
+        This method splits the given data into chunks small enough to fit
+        in tokens of at most `max_token_size` bytes (as calculated by
+        :meth:`get_wrap_size_limit`), and wraps each chunk in turn, so
+        that arbitrarily large data can be wrapped in constant memory.
+
+        Each wrapped token is framed by a 4-byte big-endian length prefix,
+        and may be unwrapped with :meth:`unwrap_stream`.  The framed tokens
+        are :python:`memoryview` slices of a reused buffer, so each token
+        is only valid until the next one is requested.
+
+        Args:
+            source: a file-like object (with a :python:`readinto` method),
+                or an iterable of byte strings
+            max_token_size (int): the maximum size of each wrapped token,
+                not including its length prefix
+            encrypt (bool): whether or not to encrypt the data
+
+        Yields:
+            memoryview: each framed, wrapped token
+
+        Raises:
+            EncryptionNotUsed: encryption was requested, but not used
+            ValueError: `max_token_size` is too small to hold any data
+        """
+
+        chunk_size = self.get_wrap_size_limit(max_token_size, encrypt)
+        if chunk_size <= 0:
+            raise ValueError("The maximum token size is too small to hold "
+                             "any data")
+
+        header_size = _utils.FRAME_HEADER.size
+        out_buffer = bytearray(header_size + max_token_size)
+        out_view = memoryview(out_buffer)
+
+        for chunk in _utils.iter_chunks(source, chunk_size):
+            res = rmessage.wrap_into(self, chunk, out_buffer, encrypt,
+                                     headroom=header_size)
+            if encrypt and not res.encrypted:
+                raise excs.EncryptionNotUsed("Wrapped message was not "
+                                             "encrypted")
+
+            _utils.FRAME_HEADER.pack_into(out_buffer, 0, res.length)
+            yield out_view[:header_size + res.length]
+
+    def unwrap_stream(self, source,
+                      max_token_size=_utils.DEFAULT_MAX_FRAME_SIZE):
+        """Unwrap a stream of wrapped data
+
+        This method unwraps the framed tokens produced by
+        :meth:`wrap_stream`, one token at a time, so that arbitrarily
+        large data can be unwrapped in constant memory.
+
+        As with :meth:`decrypt`, an exception will be raised if encryption
+        was used by the context, but not by a token.  The unwrapped chunks
+        are :python:`memoryview` slices of a reused buffer, so each chunk
+        is only valid until the next one is requested.
+
+        Args:
+            source: a file-like object (with a :python:`readinto` method),
+                or an iterable of byte strings
+            max_token_size (int): the maximum size of each wrapped token,
+                not including its length prefix (larger tokens are
+                rejected before any memory is allocated for them)
+
+        Yields:
+            memoryview: each unwrapped chunk of data
+
+        Raises:
+            EncryptionNotUsed: encryption was expected, but not used
+            ValueError: the stream ended partway through a token, or a
+                token was larger than `max_token_size`
+        """
+
+        out_buffer = bytearray()
+        check_conf = None
+
+        for token in _utils.iter_frames(source, max_token_size):
+            if len(out_buffer) < len(token):
+                # the previous chunk may still be in use, so replace the buffer
+                # rather than resize it
+                out_buffer = bytearray(len(token))
+
+            res = rmessage.unwrap_into(self, token, out_buffer)
+
+            if not res.encrypted:
+                if check_conf is None:
+                    check_conf = bool(self.actual_flags &
+                                      RequirementFlag.confidentiality)
+
+                if check_conf:
+                    raise excs.EncryptionNotUsed("The context was "
+                                                 "established with "
+                                                 "encryption, but an "
+                                                 "unwrapped token was not "
+                                                 "encrypted")
+
+            yield memoryview(out_buffer)[:res.length]
 
     def process_token(self, token):
         """Process an output token asynchronously
@@ -292,6 +622,10 @@ class SecurityContext(rsec_contexts.SecurityContext):
     _INQUIRE_ARGS = ('initiator_name', 'target_name', 'lifetime',
                      'mech', 'flags', 'locally_init', 'complete')
 
+    # the inquire results which cannot change once the context is complete
+    _SNAPSHOT_ARGS = ('initiator_name', 'target_name', 'mech', 'flags',
+                      'locally_init')
+
     @_utils.check_last_err
     def _inquire(self, **kwargs):
         """Inspect the security context for information
@@ -302,6 +636,10 @@ class SecurityContext(rsec_contexts.SecurityContext):
         is returned.  Otherwise, only the keyword arguments that
         are passed and set to `True` are returned.
 
+        Once the context is complete, everything but the lifetime is
+        snapshotted on the first inquiry, and later inquiries are answered
+        from the snapshot.
+
         Args:
             initiator_name (bool): get the initiator name for this context
             target_name (bool): get the target name for this context
@@ -324,24 +662,58 @@ class SecurityContext(rsec_contexts.SecurityContext):
         for arg in self._INQUIRE_ARGS:
             kwargs[arg] = kwargs.get(arg, default_val)
 
-        res = rsec_contexts.inquire_context(self, **kwargs)
+        if self._snapshot is None:
+            if any(kwargs[arg] for arg in self._SNAPSHOT_ARGS):
+                # inquire about everything which can be snapshotted at once, in
+                # case the context turns out to be complete
+                live_kwargs = dict(kwargs)
+                for arg in self._SNAPSHOT_ARGS:
+                    live_kwargs[arg] = True
+                live_kwargs['complete'] = True
+            else:
+                live_kwargs = kwargs
 
-        if (kwargs.get('initiator_name', False) and
-                res.initiator_name is not None):
-            init_name = Name(res.initiator_name)
-        else:
-            init_name = None
+            res = rsec_contexts.inquire_context(self, **live_kwargs)
 
-        if (kwargs.get('target_name', False) and
-                res.target_name is not None):
-            target_name = Name(res.target_name)
-        else:
-            target_name = None
+            if (live_kwargs['initiator_name'] and
+                    res.initiator_name is not None):
+                init_name = Name(res.initiator_name)
+            else:
+                init_name = None
 
-        return tuples.InquireContextResult(init_name, target_name,
-                                           res.lifetime, res.mech,
-                                           res.flags, res.locally_init,
-                                           res.complete)
+            if (live_kwargs['target_name'] and
+                    res.target_name is not None):
+                target_name = Name(res.target_name)
+            else:
+                target_name = None
+
+            res = tuples.InquireContextResult(init_name, target_name,
+                                              res.lifetime, res.mech,
+                                              res.flags, res.locally_init,
+                                              res.complete)
+
+            if live_kwargs is not kwargs and res.complete:
+                self._snapshot = res._replace(lifetime=None,
+                                              flags=int(res.flags))
+        else:
+            res = self._snapshot
+            if kwargs['lifetime']:
+                # inquire about the lifetime alone (rather than using
+                # context_time), so that indefinite and expired lifetimes
+                # are reported as None and 0, as they are for live inquiries
+                lifetime = rsec_contexts.inquire_context(
+                    self, initiator_name=False, target_name=False,
+                    lifetime=True, mech=False, flags=False,
+                    locally_init=False, complete=False).lifetime
+                res = res._replace(lifetime=lifetime)
+            if kwargs['flags']:
+                # flag sets are mutable, so hand out a copy
+                res = res._replace(flags=IntEnumFlagSet(RequirementFlag,
+                                                        res.flags))
+
+        return tuples.InquireContextResult(*[
+            getattr(res, arg) if kwargs[arg] else None
+            for arg in tuples.InquireContextResult._fields])
 
     @property
     def lifetime(self):
@@ -359,11 +731,25 @@ class SecurityContext(rsec_contexts.SecurityContext):
     locally_initiated = _utils.inquire_property(
         'locally_init', 'Get whether this context was locally intiated')
 
+    @property
+    def delegated_creds(self):
+        """Get the credentials delegated by the initiator (or None)"""
+
+        # the raw credentials are only wrapped when accessed, since most
+        # acceptors never use them
+        creds = self._delegated_creds
+        if creds is not None and not isinstance(creds, Credentials):
+            creds = self._delegated_creds = Credentials(base=creds)
+
+        return creds
+
     @property
     @_utils.check_last_err
     def complete(self):
         """Get whether negotiation for this context has been completed"""
-        if self._started:
+        if self._snapshot is not None:
+            return True
+        elif self._started:
             return self._inquire(complete=True).complete
         else:
             return False
@@ -402,25 +788,72 @@ class SecurityContext(rsec_contexts.SecurityContext):
         else:
             return self._initiator_step(token=token)
 
+    def astep(self, token=None):
+        """Perform a negotiation step without blocking the event loop
+
+        This method is an :mod:`asyncio` version of :meth:`step`, which
+        runs steps that may block on the network (such as the first
+        initiator step) in a bounded thread pool.  See
+        :func:`gssapi.aio.establish` to perform all of the steps.
+
+        This method requires Python 3.5 or newer.
+
+        Args:
+            token (bytes): the input token from the other participant's step
+
+        Returns:
+            awaitable: an awaitable for the output token to send to the
+                other participant
+        """
+
+        # gssapi.aio uses Python 3.5+ syntax, so it may only be imported when
+        # actually used
+        from gssapi import aio
+
+        return aio.step(self, token)
+
     def _acceptor_step(self, token):
-        res = rsec_contexts.accept_sec_context(token, self._creds,
-                                               self, self._channel_bindings)
+        # the step functions skip the initiator name, mech, flags, and
+        # lifetime, which are fetched (and snapshotted) by _inquire when needed
+        res = rsec_contexts.accept_step(self, token, self._creds,
+                                        self._channel_bindings)
+
+        # Credentials(None) would acquire the default credentials, so keep None
+        # (or the raw credentials, which are wrapped on access)
+        self._delegated_creds = res.delegated_creds
 
-        self.delegated_creds = Credentials(res.delegated_creds)
+        if not res.more_steps:
+            self._release_handshake_state()
 
         return res.token
 
     def _initiator_step(self, token=None):
-        res = rsec_contexts.init_sec_context(self._target_name, self._creds,
-                                             self, self._mech,
-                                             self._desired_flags,
-                                             self._desired_lifetime,
-                                             self._channel_bindings,
-                                             token)
+        res = rsec_contexts.init_step(self, self._target_name, token,
+                                      self._creds, self._mech,
+                                      self._desired_flags,
+                                      self._desired_lifetime,
+                                      self._channel_bindings)
+
+        if not res.more_steps:
+            self._release_handshake_state()
 
         return res.token
 
+    def _release_handshake_state(self):
+        # the arguments to the negotiation steps aren't needed once the
+        # context is complete, so don't keep them alive
+        self._target_name = None
+        self._mech = None
+        self._desired_flags = None
+        self._desired_lifetime = None
+        self._channel_bindings = None
+        self._creds = None
+
     # pickle protocol support
     def __reduce__(self):
         # the unpickle arguments to new are (base=None, token=self.export())
-        return (type(self), (None, self.export()))
+        # export first, since it raises any deferred error (switching the
+        # object back to its original class), so that the class of a pending
+        # error is never pickled
+        token = self.export()
+        return (type(self), (None, token))
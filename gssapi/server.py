@@ -0,0 +1,421 @@
+"""Non-blocking Acceptance of Many Security Contexts
+
+This module drives the acceptor side of many security context
+handshakes at once from a single :mod:`selectors`-based loop, instead of
+running a :meth:`~gssapi.sec_contexts.SecurityContext.step` loop in
+a thread for each connection.
+
+Tokens are exchanged over each connection as length-prefixed frames
+(each token is prefixed by its length as a 4-byte big-endian integer,
+the same framing used by
+:meth:`~gssapi.sec_contexts.SecurityContext.wrap_stream`).  The engine
+handles partial reads and writes, enforces a timeout on each handshake,
+and runs the actual negotiation steps in a bounded thread pool, so that
+the loop itself never blocks on GSSAPI.
+
+.. code-block:: python
+
+    def on_complete(sock, ctx, data):
+        ...  # the handshake is complete, hand off the connection
+
+    def on_error(sock, exc):
+        sock.close()
+
+    engine = AcceptorEngine(creds=server_creds)
+    engine.add(sock, on_complete, on_error)
+    engine.run()
+
+This module requires Python 3.4 or newer.
+"""
+
+import collections
+import concurrent.futures
+import heapq
+import itertools
+import selectors
+import socket
+import time
+
+from gssapi.raw.misc import GSSError
+
+from gssapi import _utils
+from gssapi.sec_contexts import SecurityContext
+
+
+# the default maximum number of steps run in the thread pool at once
+DEFAULT_MAX_WORKERS = 16
+# the default number of seconds a handshake may take
+DEFAULT_TIMEOUT = 30.0
+# the default maximum size of a single incoming token
+DEFAULT_MAX_TOKEN_SIZE = 64 * 1024
+
+# the amount of data read from a connection at once
+_RECV_SIZE = 16 * 1024
+
+
+class _Connection(object):
+    """The state of a single in-progress handshake"""
+
+    __slots__ = ('sock', 'context', 'on_complete', 'on_error', 'recv_buf',
+                 'send_buf', 'events', 'busy', 'complete', 'error', 'done')
+
+    def __init__(self, sock, context, on_complete, on_error):
+        self.sock = sock
+        self.context = context
+        self.on_complete = on_complete
+        self.on_error = on_error
+
+        self.recv_buf = bytearray()
+        self.send_buf = bytearray()
+        self.events = selectors.EVENT_READ
+
+        # whether a step is currently running in the thread pool
+        self.busy = False
+        # whether the last step completed the context
+        self.complete = False
+        # the error deferred by the last step, raised once its token is sent
+        self.error = None
+        # whether the connection has been handed back (or failed)
+        self.done = False
+
+
+def _step(context, token):
+    # this runs in the thread pool.  Errors in accepting are deferred by the
+    # high-level context, so that the error token may be sent to the initiator
+    # before the error is reported.
+    out_token = context.step(token)
+    try:
+        return (out_token, context.complete, None)
+    except GSSError as e:
+        return (out_token, False, e)
+
+
+class AcceptorEngine(object):
+    """Accept security contexts on many connections at once
+
+    Each connection added with :meth:`add` is registered with the
+    engine's selector.  Incoming tokens are read from the connection and
+    passed to a new accepting
+    :class:`~gssapi.sec_contexts.SecurityContext` in the thread pool,
+    and the resulting tokens are written back to the connection.
+
+    Once the context is complete (and the final token has been sent),
+    the connection is unregistered and `on_complete` is called with the
+    socket, the complete context, and any data received after the final
+    token.  If the handshake fails or times out, the connection is
+    unregistered and `on_error` is called with the socket and the
+    exception (or, if no `on_error` callback was given, the socket is
+    closed).  The callbacks are called from the thread running the loop.
+
+    The engine is not thread-safe: connections should be added from the
+    thread running the loop (e.g. from a callback) or before it is
+    started.  Only :meth:`stop` may be called from other threads.
+
+    Args:
+        creds (Credentials): the acceptor credentials to use
+            (or None to use the default credentials)
+        channel_bindings (ChannelBindings): the channel bindings to use
+            for every context (or None for no channel bindings)
+        timeout (float): the default number of seconds a handshake may take
+        max_token_size (int): the maximum size of an incoming token (this
+            also bounds the data buffered while a step is running)
+        max_workers (int): the maximum number of steps to run at once, if
+            no executor is given
+        executor (concurrent.futures.Executor): the executor used to run
+            the negotiation steps (or None to create a thread pool, which
+            is shut down when the engine is closed)
+        selector (selectors.BaseSelector): the selector to use
+            (or None to use the default selector)
+    """
+
+    def __init__(self, creds=None, channel_bindings=None,
+                 timeout=DEFAULT_TIMEOUT,
+                 max_token_size=DEFAULT_MAX_TOKEN_SIZE,
+                 max_workers=DEFAULT_MAX_WORKERS, executor=None,
+                 selector=None):
+        self.creds = creds
+        self.channel_bindings = channel_bindings
+        self.timeout = timeout
+        self.max_token_size = max_token_size
+
+        self._owns_executor = executor is None
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+        self._executor = executor
+
+        if selector is None:
+            selector = selectors.DefaultSelector()
+        self._selector = selector
+
+        self._connections = {}
+
+        # each entry is (deadline, sequence, connection), and entries for
+        # finished connections are skipped when they reach the top of the heap
+        self._deadlines = []
+        self._sequence = itertools.count()
+
+        # finished steps are passed back to the loop through this queue,
+        # and the loop is woken up by writing to the wakeup socket
+        self._results = collections.deque()
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+        self._selector.register(self._wakeup_recv, selectors.EVENT_READ)
+
+        self._stopping = False
+
+    def add(self, sock, on_complete, on_error=None, timeout=None):
+        """Start accepting a security context on a connection
+
+        The socket is switched to non-blocking mode.
+
+        Args:
+            sock (socket.socket): the connected socket
+            on_complete: a function taking the socket, the complete
+                :class:`~gssapi.sec_contexts.SecurityContext`, and any
+                data (bytes) received after the final token
+            on_error: a function taking the socket and the exception which
+                caused the handshake to fail (or None to close the socket)
+            timeout (float): the number of seconds the handshake may take
+                (or None to use the engine's default timeout)
+        """
+
+        if timeout is None:
+            timeout = self.timeout
+
+        context = SecurityContext(creds=self.creds, usage='accept',
+                                  channel_bindings=self.channel_bindings)
+
+        conn = _Connection(sock, context, on_complete, on_error)
+        sock.setblocking(False)
+        self._selector.register(sock, conn.events, conn)
+        self._connections[sock] = conn
+
+        heapq.heappush(self._deadlines, (time.monotonic() + timeout,
+                                         next(self._sequence), conn))
+
+    def run_once(self, timeout=None):
+        """Run a single iteration of the loop
+
+        This waits for at most `timeout` seconds (or until the next
+        handshake times out) for connections to become ready, and then
+        processes them.
+
+        Args:
+            timeout (float): the maximum number of seconds to wait
+                (or None to wait until a connection is ready)
+        """
+
+        if self._deadlines:
+            until_deadline = max(self._deadlines[0][0] - time.monotonic(), 0)
+            if timeout is None or until_deadline < timeout:
+                timeout = until_deadline
+
+        for key, mask in self._selector.select(timeout):
+            if key.fileobj is self._wakeup_recv:
+                self._drain_wakeup()
+                continue
+
+            conn = key.data
+            if mask & selectors.EVENT_READ:
+                self._on_readable(conn)
+            if mask & selectors.EVENT_WRITE and not conn.done:
+                self._flush(conn)
+
+        self._process_results()
+        self._expire(time.monotonic())
+
+    def run(self):
+        """Run the loop until :meth:`stop` is called"""
+
+        self._stopping = False
+        while not self._stopping:
+            self.run_once()
+
+    def stop(self):
+        """Stop the loop started by :meth:`run`
+
+        This may be called from any thread.
+        """
+
+        self._stopping = True
+        self._wakeup()
+
+    def close(self):
+        """Close the engine
+
+        Any in-progress handshakes are failed with
+        :class:`ConnectionAbortedError`.
+        """
+
+        for conn in list(self._connections.values()):
+            self._fail(conn, ConnectionAbortedError("The acceptor engine "
+                                                    "was closed"))
+
+        self._selector.unregister(self._wakeup_recv)
+        self._selector.close()
+        self._wakeup_recv.close()
+        self._wakeup_send.close()
+
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def __len__(self):
+        return len(self._connections)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def _wakeup(self):
+        try:
+            self._wakeup_send.send(b'\0')
+        except (BlockingIOError, OSError):
+            # the loop is already going to wake up (or the engine is closed)
+            pass
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_recv.recv(_RECV_SIZE):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _set_events(self, conn, events):
+        if conn.events != events:
+            conn.events = events
+            self._selector.modify(conn.sock, events, conn)
+
+    def _on_readable(self, conn):
+        try:
+            data = conn.sock.recv(_RECV_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._fail(conn, e)
+            return
+
+        if not data:
+            self._fail(conn, ConnectionResetError("The connection was closed "
+                                                  "during the handshake"))
+            return
+
+        conn.recv_buf += data
+        self._dispatch(conn)
+
+        # a peer which keeps sending while a step runs (or while it is not
+        # reading our reply) must not grow the buffer without bound
+        limit = _utils.FRAME_HEADER.size + self.max_token_size
+        if not conn.done and len(conn.recv_buf) > limit:
+            self._fail(conn, ValueError("More data was received than the "
+                                        "maximum token size ({0} bytes) "
+                                        "allows".format(self.max_token_size)))
+
+    def _dispatch(self, conn):
+        # start the next step, if a whole token has been received
+        if conn.busy or conn.done or conn.send_buf:
+            return
+
+        header_size = _utils.FRAME_HEADER.size
+        if len(conn.recv_buf) < header_size:
+            return
+
+        length = _utils.FRAME_HEADER.unpack_from(conn.recv_buf)[0]
+        if length > self.max_token_size:
+            self._fail(conn, ValueError("The incoming token ({0} bytes) is "
+                                        "larger than the maximum token size "
+                                        "({1} bytes)".format(
+                                            length, self.max_token_size)))
+            return
+
+        if len(conn.recv_buf) < header_size + length:
+            return
+
+        token = bytes(conn.recv_buf[header_size:header_size + length])
+        del conn.recv_buf[:header_size + length]
+
+        conn.busy = True
+        future = self._executor.submit(_step, conn.context, token)
+        future.add_done_callback(lambda future: self._step_done(conn, future))
+
+    def _step_done(self, conn, future):
+        # this runs in the thread pool
+        self._results.append((conn, future))
+        self._wakeup()
+
+    def _process_results(self):
+        while self._results:
+            conn, future = self._results.popleft()
+            conn.busy = False
+            if conn.done:
+                continue
+
+            try:
+                out_token, conn.complete, conn.error = future.result()
+            except Exception as e:
+                self._fail(conn, e)
+                continue
+
+            if out_token:
+                conn.send_buf += _utils.FRAME_HEADER.pack(len(out_token))
+                conn.send_buf += out_token
+
+            self._flush(conn)
+
+    def _flush(self, conn):
+        if conn.send_buf:
+            try:
+                sent = conn.sock.send(conn.send_buf)
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError as e:
+                self._fail(conn, e)
+                return
+
+            del conn.send_buf[:sent]
+            if conn.send_buf:
+                self._set_events(conn, selectors.EVENT_READ |
+                                 selectors.EVENT_WRITE)
+                return
+
+        self._set_events(conn, selectors.EVENT_READ)
+
+        if conn.error is not None:
+            self._fail(conn, conn.error)
+        elif conn.complete:
+            self._finish(conn)
+        else:
+            self._dispatch(conn)
+
+    def _release(self, conn):
+        conn.done = True
+        self._selector.unregister(conn.sock)
+        del self._connections[conn.sock]
+
+    def _finish(self, conn):
+        self._release(conn)
+        conn.on_complete(conn.sock, conn.context, bytes(conn.recv_buf))
+        self._clear(conn)
+
+    def _fail(self, conn, exc):
+        self._release(conn)
+        if conn.on_error is not None:
+            conn.on_error(conn.sock, exc)
+        else:
+            conn.sock.close()
+        self._clear(conn)
+
+    def _clear(self, conn):
+        # the connection may stay in the deadline heap until it would have
+        # timed out, so don't keep the socket and context alive until then
+        conn.sock = conn.context = None
+        conn.on_complete = conn.on_error = None
+        conn.recv_buf = conn.send_buf = None
+
+    def _expire(self, now):
+        while self._deadlines and self._deadlines[0][0] <= now:
+            conn = heapq.heappop(self._deadlines)[2]
+            if not conn.done:
+                self._fail(conn, TimeoutError("The handshake timed out"))
@@ -0,0 +1,516 @@
+"""Session Resumption for Security Contexts
+
+This module stores exported security contexts by session id, so that
+a peer which reconnects can resume its previous security context with
+a local call to :func:`~gssapi.raw.sec_contexts.import_sec_context`,
+instead of performing a full handshake (which, for Kerberos, may involve
+a round trip to the KDC).
+
+Stored contexts are encrypted and authenticated (by default with
+AES-256-GCM, which requires the :mod:`cryptography` package), and
+expire when the context itself would have (as reported by
+:attr:`~gssapi.sec_contexts.SecurityContext.lifetime` when the context
+was saved).  Two storage backends are provided: an in-memory LRU cache
+(:class:`MemoryBackend`), and a fixed-size memory-mapped file
+(:class:`MmapFileBackend`), which may be shared between runs of the
+same process.
+
+.. code-block:: python
+
+    store = SessionStore(key=secret_key)
+
+    # on disconnect
+    store.save(session_id, ctx)
+
+    # on reconnect
+    ctx = store.resume(session_id)
+    if ctx is None:
+        ...  # perform a full handshake
+"""
+
+import collections
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:
+    AESGCM = None
+
+from gssapi.sec_contexts import SecurityContext
+
+
+# the size of the secret key used to seal stored contexts
+KEY_SIZE = 32
+# the size of the random nonce prepended to each sealed context
+NONCE_SIZE = 12
+
+# the size of the GCM authentication tag appended to each sealed context
+_TAG_SIZE = 16
+_SEAL_OVERHEAD = NONCE_SIZE + _TAG_SIZE
+
+
+class AESGCMSealer(object):
+    """Encrypts and authenticates stored contexts with AES-256-GCM
+
+    The session id is authenticated along with each context, so that
+    a sealed context can't be moved to another session.  Each context is
+    sealed with a random nonce, so a single key should not be used to seal
+    more than about 2**32 contexts.
+
+    This class requires the :mod:`cryptography` package.
+
+    Args:
+        key (bytes): the secret key (:data:`KEY_SIZE` bytes long)
+
+    Raises:
+        ImportError: the :mod:`cryptography` package is not installed
+    """
+
+    def __init__(self, key):
+        if AESGCM is None:
+            raise ImportError("The cryptography package is required to "
+                              "seal stored security contexts")
+
+        if len(key) != KEY_SIZE:
+            raise ValueError("The key must be {0} bytes long".format(
+                KEY_SIZE))
+
+        self._aead = AESGCM(bytes(key))
+
+    def seal(self, session_id, plaintext):
+        """Encrypt and authenticate an exported context
+
+        Returns:
+            bytes: the sealed context
+        """
+
+        nonce = os.urandom(NONCE_SIZE)
+        return nonce + self._aead.encrypt(nonce, bytes(plaintext),
+                                          session_id)
+
+    def unseal(self, session_id, sealed):
+        """Decrypt and verify a sealed context
+
+        Returns:
+            bytes: the exported context, or None if the sealed context
+                could not be authenticated
+        """
+
+        sealed = bytes(sealed)
+        if len(sealed) < _SEAL_OVERHEAD:
+            return None
+
+        try:
+            return self._aead.decrypt(sealed[:NONCE_SIZE],
+                                      sealed[NONCE_SIZE:], session_id)
+        except InvalidTag:
+            return None
+
+
+class MemoryBackend(object):
+    """Stores sealed contexts in memory
+
+    The least recently used entries are evicted once the backend is full.
+
+    Args:
+        max_entries (int): the maximum number of stored contexts
+    """
+
+    def __init__(self, max_entries=1024):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+
+    def get(self, session_id):
+        """Get the expiry time and sealed context for a session id
+
+        Returns:
+            (float, bytes): the expiry time and sealed context,
+                or None if no context is stored for the session id
+        """
+
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._entries[session_id] = entry
+
+        return entry
+
+    def put(self, session_id, expires_at, sealed):
+        """Store a sealed context for a session id"""
+
+        self._entries.pop(session_id, None)
+        self._entries[session_id] = (expires_at, sealed)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, session_id):
+        """Remove any context stored for a session id"""
+
+        self._entries.pop(session_id, None)
+
+    def purge(self, now):
+        """Remove all contexts which expired before the given time
+
+        Returns:
+            int: the number of removed contexts
+        """
+
+        expired = [session_id for session_id, (expires_at, _)
+                   in self._entries.items() if expires_at <= now]
+        for session_id in expired:
+            del self._entries[session_id]
+
+        return len(expired)
+
+    def close(self):
+        """Release any resources used by the backend"""
+
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MmapFileBackend(object):
+    """Stores sealed contexts in a memory-mapped file
+
+    The file is divided into a fixed number of fixed-size slots.  Each
+    session id is stored in one of a few neighbouring slots picked by
+    a hash of the session id, replacing the entry which expires soonest
+    if they are all full.  The file is created if it does not exist (or
+    is empty).  An existing file is never overwritten: if it was not
+    created by this backend with the same parameters, an error is raised.
+
+    The backend does not lock the file, so it should only be used by one
+    process at a time.
+
+    Args:
+        path (str): the path to the file
+        num_slots (int): the number of slots
+        slot_size (int): the maximum size of each sealed context
+
+    Raises:
+        ValueError: the file exists, but is not a session store file with
+            the given parameters
+    """
+
+    _FILE_HEADER = struct.Struct('!8sII')
+    _SLOT_HEADER = struct.Struct('!16sdI')
+    _MAGIC = b'GSSSESS1'
+    _EMPTY_DIGEST = b'\x00' * 16
+    # the number of slots which may hold a given session id
+    _PROBE_LENGTH = 4
+
+    def __init__(self, path, num_slots=1024, slot_size=4096):
+        if num_slots <= 0 or slot_size <= 0:
+            raise ValueError("num_slots and slot_size must be positive")
+
+        self.path = path
+        self.num_slots = num_slots
+        self.slot_size = slot_size
+
+        self._stride = self._SLOT_HEADER.size + slot_size
+        size = self._FILE_HEADER.size + num_slots * self._stride
+        header = self._FILE_HEADER.pack(self._MAGIC, num_slots, slot_size)
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            existing_size = os.fstat(fd).st_size
+            if not existing_size:
+                os.ftruncate(fd, size)
+                os.write(fd, header)
+            elif (existing_size != size or
+                    os.read(fd, self._FILE_HEADER.size) != header):
+                raise ValueError("{0} is not a session store file with {1} "
+                                 "slots of {2} bytes".format(path, num_slots,
+                                                             slot_size))
+
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def _offset(self, index):
+        return self._FILE_HEADER.size + index * self._stride
+
+    def _probe(self, session_id):
+        digest = hashlib.sha256(session_id).digest()[:16]
+        start = struct.unpack_from('!Q', digest)[0]
+        offsets = [self._offset((start + i) % self.num_slots)
+                   for i in range(min(self._PROBE_LENGTH, self.num_slots))]
+        return (digest, offsets)
+
+    def _find(self, session_id):
+        digest, offsets = self._probe(session_id)
+        for offset in offsets:
+            if self._SLOT_HEADER.unpack_from(self._map, offset)[0] == digest:
+                return offset
+
+        return None
+
+    def get(self, session_id):
+        """Get the expiry time and sealed context for a session id
+
+        Returns:
+            (float, bytes): the expiry time and sealed context,
+                or None if no context is stored for the session id
+        """
+
+        offset = self._find(session_id)
+        if offset is None:
+            return None
+
+        _, expires_at, length = self._SLOT_HEADER.unpack_from(self._map,
+                                                              offset)
+        data_start = offset + self._SLOT_HEADER.size
+        return (expires_at, self._map[data_start:data_start + length])
+
+    def put(self, session_id, expires_at, sealed):
+        """Store a sealed context for a session id
+
+        Raises:
+            ValueError: the sealed context is larger than a slot
+        """
+
+        if len(sealed) > self.slot_size:
+            raise ValueError("The sealed context ({0} bytes) is larger than "
+                             "the slot size ({1} bytes)".format(
+                                 len(sealed), self.slot_size))
+
+        digest, offsets = self._probe(session_id)
+
+        # reuse the session id's slot if it has one, or else an empty slot,
+        # or else the slot which expires soonest
+        offset = None
+        soonest = None
+        for candidate in offsets:
+            stored_digest, stored_expiry, _ = self._SLOT_HEADER.unpack_from(
+                self._map, candidate)
+            if stored_digest == digest:
+                offset = candidate
+                break
+            elif stored_digest == self._EMPTY_DIGEST:
+                stored_expiry = float('-inf')
+
+            if soonest is None or stored_expiry < soonest:
+                offset = candidate
+                soonest = stored_expiry
+
+        data_start = offset + self._SLOT_HEADER.size
+        self._map[data_start:data_start + len(sealed)] = sealed
+        self._SLOT_HEADER.pack_into(self._map, offset, digest, expires_at,
+                                    len(sealed))
+
+    def delete(self, session_id):
+        """Remove any context stored for a session id"""
+
+        offset = self._find(session_id)
+        if offset is not None:
+            self._clear_slot(offset)
+
+    def _clear_slot(self, offset):
+        self._SLOT_HEADER.pack_into(self._map, offset, self._EMPTY_DIGEST,
+                                    0, 0)
+
+    def purge(self, now):
+        """Remove all contexts which expired before the given time
+
+        Returns:
+            int: the number of removed contexts
+        """
+
+        purged = 0
+        for index in range(self.num_slots):
+            offset = self._offset(index)
+            digest, expires_at, _ = self._SLOT_HEADER.unpack_from(self._map,
+                                                                  offset)
+            if digest != self._EMPTY_DIGEST and expires_at <= now:
+                self._clear_slot(offset)
+                purged += 1
+
+        return purged
+
+    def close(self):
+        """Flush the file and release the mapping"""
+
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+
+    def __len__(self):
+        count = 0
+        for index in range(self.num_slots):
+            offset = self._offset(index)
+            if self._map[offset:offset + 16] != self._EMPTY_DIGEST:
+                count += 1
+
+        return count
+
+
+class SessionStore(object):
+    """Stores exported security contexts for later resumption
+
+    Saving a context exports it, so the context may no longer be used
+    afterwards.  Resuming a context removes it from the store, since
+    a context may only be imported once (importing it twice would reuse
+    its sequence numbers).
+
+    Stored contexts are sealed by `sealer`, or else by an
+    :class:`AESGCMSealer` using `key`.  If neither is given, a random key
+    is generated, so the stored contexts may only be resumed by this store
+    object (a key must be given to resume contexts stored in
+    a :class:`MmapFileBackend` by another store object).  Stored contexts
+    are never kept unsealed: if no sealer is given and the
+    :mod:`cryptography` package is not installed, the store can't be
+    created.
+
+    Args:
+        backend: the storage backend (by default, a :class:`MemoryBackend`)
+        key (bytes): the secret key (:data:`KEY_SIZE` bytes long) used to
+            seal the stored contexts
+        sealer: an object with `seal(session_id, plaintext)` and
+            `unseal(session_id, sealed)` methods (where `unseal` returns
+            None if the sealed context can't be authenticated), used
+            instead of an :class:`AESGCMSealer`
+
+    Raises:
+        ImportError: no sealer was given, and the :mod:`cryptography`
+            package is not installed
+    """
+
+    def __init__(self, backend=None, key=None, sealer=None):
+        if sealer is None:
+            if key is None:
+                key = os.urandom(KEY_SIZE)
+
+            sealer = AESGCMSealer(key)
+        elif key is not None:
+            raise ValueError("A key may not be given along with a sealer")
+
+        if backend is None:
+            backend = MemoryBackend()
+
+        self.backend = backend
+        self._sealer = sealer
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _session_id(session_id):
+        if not isinstance(session_id, bytes):
+            session_id = session_id.encode('utf-8')
+
+        return session_id
+
+    def save(self, session_id, context):
+        """Export and store a security context
+
+        The context expires after its remaining lifetime.  Contexts which
+        have already expired are not stored.
+
+        Args:
+            session_id (bytes): the session id (text session ids are
+                encoded as UTF-8)
+            context (SecurityContext): the complete security context
+
+        Returns:
+            bool: whether or not the context was stored
+
+        Raises:
+            ValueError: the exported context is too large for the backend
+            ~gssapi.exceptions.GSSError
+        """
+
+        session_id = self._session_id(session_id)
+
+        # the lifetime must be fetched before exporting, since exporting
+        # invalidates the context
+        lifetime = context.lifetime
+        if not lifetime:
+            return False
+
+        expires_at = time.time() + lifetime
+        sealed = self._sealer.seal(session_id, context.export())
+
+        with self._lock:
+            self.backend.put(session_id, expires_at, sealed)
+
+        return True
+
+    def resume(self, session_id):
+        """Remove and import the security context stored for a session id
+
+        Args:
+            session_id (bytes): the session id (text session ids are
+                encoded as UTF-8)
+
+        Returns:
+            SecurityContext: the resumed security context, or None if no
+                unexpired context was stored for the session id (or if it
+                could not be unsealed with this store's key)
+
+        Raises:
+            ~gssapi.exceptions.GSSError
+        """
+
+        session_id = self._session_id(session_id)
+
+        with self._lock:
+            entry = self.backend.get(session_id)
+            if entry is None:
+                return None
+
+            self.backend.delete(session_id)
+
+        expires_at, sealed = entry
+        if expires_at <= time.time():
+            return None
+
+        token = self._sealer.unseal(session_id, sealed)
+        if token is None:
+            return None
+
+        return SecurityContext(token=token)
+
+    def discard(self, session_id):
+        """Remove any security context stored for a session id
+
+        Args:
+            session_id (bytes): the session id (text session ids are
+                encoded as UTF-8)
+        """
+
+        with self._lock:
+            self.backend.delete(self._session_id(session_id))
+
+    def purge_expired(self):
+        """Remove all expired security contexts
+
+        Returns:
+            int: the number of removed contexts
+        """
+
+        with self._lock:
+            return self.backend.purge(time.time())
+
+    def close(self):
+        """Close the backend"""
+
+        with self._lock:
+            self.backend.close()
+
+    def __len__(self):
+        with self._lock:
+            return len(self.backend)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
@@ -1,8 +1,13 @@
 import copy
+import hashlib
 import os
 import socket
 import sys
+import threading
+import time
 import pickle
+import re
+import weakref
 
 import should_be.all  # noqa
 import six
@@ -14,6 +19,12 @@ from gssapi import sec_contexts as gssctx
 from gssapi import raw as gb
 from gssapi import _utils as gssutils
 from gssapi import exceptions as excs
+from gssapi import expiry as gssexpiry
+from gssapi import file as gssfile
+from gssapi import handoff as gsshandoff
+from gssapi import pool as gsspool
+from gssapi import session_store as gssstore
+from gssapi import tls as gsstls
 from gssapi.tests._utils import _extension_test
 from gssapi.tests import k5test as kt
 
@@ -171,7 +182,8 @@ class CredsTestCase(_GSSAPIKerberosTestCase):
         server_ctx.step(client_token)
 
         deleg_creds = server_ctx.delegated_creds
-        deleg_creds.shouldnt_be_none()
+        deleg_creds.should_be_a(gsscreds.Credentials)
+        server_ctx.delegated_creds.should_be(deleg_creds)
 
         store_res = deleg_creds.store(usage='initiate', set_default=True)
         store_res.usage.should_be('initiate')
@@ -536,6 +548,280 @@ class SecurityContextTestCase(_GSSAPIKerberosTestCase):
         client_ctx.locally_initiated.should_be_true()
         client_ctx.complete.should_be_true()
 
+    def test_no_delegated_creds(self):
+        client_ctx, server_ctx = self._create_completed_contexts()
+
+        server_ctx.delegated_creds.should_be_none()
+        client_ctx.delegated_creds.should_be_none()
+
+    def test_compact_layout(self):
+        client_ctx, server_ctx = self._create_completed_contexts()
+
+        for ctx in (client_ctx, server_ctx):
+            hasattr(ctx, '__dict__').should_be_false()
+
+            # the handshake-only state is released once complete
+            ctx._creds.should_be_none()
+            ctx._channel_bindings.should_be_none()
+
+        client_ctx._target_name.should_be_none()
+        client_ctx.target_name.should_be(self.target_name)
+
+        # contexts can still be weakly referenced
+        weakref.ref(client_ctx)().should_be(client_ctx)
+
+    def test_snapshot_attributes_once_complete(self):
+        client_ctx, server_ctx = self._create_completed_contexts()
+
+        client_ctx.target_name.should_be(self.target_name)
+        client_ctx._snapshot.shouldnt_be_none()
+
+        # the snapshot is reused, but the flags are still copied
+        flags = client_ctx.actual_flags
+        flags.should_be_a(gb.IntEnumFlagSet)
+        flags.add(gb.RequirementFlag.anonymity)
+        client_ctx.actual_flags.shouldnt_include(gb.RequirementFlag.anonymity)
+
+        client_ctx.initiator_name.should_be(server_ctx.initiator_name)
+        client_ctx.mech.should_be(server_ctx.mech)
+        client_ctx.locally_initiated.should_be_true()
+        client_ctx.complete.should_be_true()
+
+        # the lifetime is still live
+        client_ctx.lifetime.should_be_at_most(400)
+        client_ctx._inquire(lifetime=True).lifetime.should_be_at_most(400)
+        client_ctx._inquire(mech=True).lifetime.should_be_none()
+
+        # and is reported the same way as by a live inquiry
+        live_lifetime = gb.inquire_context(client_ctx).lifetime
+        snapshot_lifetime = client_ctx._inquire(lifetime=True).lifetime
+        snapshot_lifetime.should_be_an_integer()
+        abs(live_lifetime - snapshot_lifetime).should_be_at_most(1)
+
+    def test_async_establish(self):
+        if sys.version_info < (3, 5):
+            self.skipTest("asyncio coroutines require Python 3.5+")
+
+        import asyncio
+        from gssapi import aio
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            client_ctx = self._create_client_ctx(lifetime=400)
+            server_ctx = gssctx.SecurityContext(creds=self.server_creds)
+
+            client_queue = asyncio.Queue()
+            server_queue = asyncio.Queue()
+
+            client_res, server_res = loop.run_until_complete(asyncio.gather(
+                aio.establish(client_ctx, server_queue.put, client_queue.get),
+                aio.establish(server_ctx, client_queue.put, server_queue.get)))
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+        client_res.should_be(client_ctx)
+        server_res.should_be(server_ctx)
+        client_ctx.complete.should_be_true()
+        server_ctx.complete.should_be_true()
+
+        server_ctx.initiator_name.should_be(client_ctx.initiator_name)
+
+    def test_acceptor_engine(self):
+        if sys.version_info < (3, 4):
+            self.skipTest("The acceptor engine requires Python 3.4+")
+
+        from gssapi import server as gssserver
+
+        header = gssutils.FRAME_HEADER
+        completed = []
+        failed = []
+
+        def on_complete(sock, ctx, data):
+            completed.append((ctx, data))
+            sock.close()
+
+        def on_error(sock, exc):
+            failed.append(exc)
+            sock.close()
+
+        with gssserver.AcceptorEngine(creds=self.server_creds) as engine:
+            clients = []
+            for i in range(3):
+                server_sock, client_sock = socket.socketpair()
+                engine.add(server_sock, on_complete, on_error)
+
+                client_ctx = self._create_client_ctx(lifetime=400)
+                token = client_ctx.step()
+                client_sock.sendall(header.pack(len(token)) + token +
+                                    b'extra')
+                clients.append((client_sock, client_ctx))
+
+            len(engine).should_be(3)
+            for i in range(100):
+                if len(completed) == len(clients):
+                    break
+                engine.run_once(0.1)
+
+            failed.should_be_empty()
+            len(completed).should_be(len(clients))
+            len(engine).should_be(0)
+
+            for ctx, data in completed:
+                ctx.complete.should_be_true()
+                data.should_be(b'extra')
+
+            for client_sock, client_ctx in clients:
+                with client_sock.makefile('rb') as client_file:
+                    length = header.unpack(client_file.read(header.size))[0]
+                    client_ctx.step(client_file.read(length))
+                client_sock.close()
+
+                client_ctx.complete.should_be_true()
+
+            # handshakes which take too long are failed
+            server_sock, client_sock = socket.socketpair()
+            engine.add(server_sock, on_complete, on_error, timeout=0)
+            engine.run_once(0.1)
+
+            len(failed).should_be(1)
+            # TimeoutError is not a builtin on Python 2, where this is skipped
+            failed[0].should_be_a(six.moves.builtins.TimeoutError)
+            client_sock.close()
+
+    def test_acceptor_engine_limits_buffered_data(self):
+        if sys.version_info < (3, 4):
+            self.skipTest("The acceptor engine requires Python 3.4+")
+
+        import concurrent.futures
+        from gssapi import server as gssserver
+
+        class StalledExecutor(object):
+            # keeps every step running, so the connections stay busy
+            def submit(self, fn, *args):
+                return concurrent.futures.Future()
+
+        header = gssutils.FRAME_HEADER
+        failed = []
+
+        def on_complete(sock, ctx, data):
+            sock.close()
+
+        def on_error(sock, exc):
+            failed.append(exc)
+            sock.close()
+
+        with gssserver.AcceptorEngine(creds=self.server_creds,
+                                      max_token_size=16,
+                                      executor=StalledExecutor()) as engine:
+            # a token larger than the maximum token size
+            server_sock, client_sock = socket.socketpair()
+            engine.add(server_sock, on_complete, on_error)
+            client_sock.sendall(header.pack(17) + b'x' * 17)
+            engine.run_once(0.1)
+
+            len(failed).should_be(1)
+            failed[0].should_be_a(ValueError)
+            len(engine).should_be(0)
+            client_sock.close()
+
+            # a peer which keeps sending while its step is running
+            server_sock, client_sock = socket.socketpair()
+            engine.add(server_sock, on_complete, on_error)
+            client_sock.sendall(header.pack(4) + b'abcd')
+            engine.run_once(0.1)
+            len(engine).should_be(1)
+
+            for i in range(10):
+                if failed[1:]:
+                    break
+                client_sock.sendall(b'y' * 8)
+                engine.run_once(0.1)
+
+            len(failed).should_be(2)
+            failed[1].should_be_a(ValueError)
+            len(engine).should_be(0)
+            client_sock.close()
+
+    def test_context_pool(self):
+        with gsspool.ContextPool(size=2) as pool:
+            pool.warm(self.target_name, lifetime=400)
+            for i in range(100):
+                if len(pool) == 2:
+                    break
+                time.sleep(0.05)
+
+            len(pool).should_be(2)
+
+            for i in range(3):
+                client_ctx, client_token = pool.get(self.target_name,
+                                                    lifetime=400)
+                client_ctx.should_be_a(gssctx.SecurityContext)
+                client_token.should_be_a(bytes)
+
+                server_ctx = gssctx.SecurityContext(creds=self.server_creds)
+                client_ctx.step(server_ctx.step(client_token))
+                client_ctx.complete.should_be_true()
+
+                client_ctx.encrypt(b'test').should_be_a(bytes)
+
+        # old contexts are discarded, but get still prepares a new context
+        with gsspool.ContextPool(size=1, max_age=0) as pool:
+            client_ctx, client_token = pool.get(self.target_name)
+            server_ctx = gssctx.SecurityContext(creds=self.server_creds)
+            client_ctx.step(server_ctx.step(client_token))
+            client_ctx.complete.should_be_true()
+
+    def test_expiry_scheduler(self):
+        client_ctx, server_ctx = self._create_completed_contexts()
+
+        fired = []
+        done = threading.Event()
+
+        def on_expiry(obj):
+            fired.append(obj)
+            if len(fired) == 2:
+                done.set()
+
+        with gssexpiry.ExpiryScheduler(margin=10 ** 6) as scheduler:
+            # expires well after the margin, so this won't fire
+            late = scheduler.register(server_ctx, on_expiry, margin=0)
+            late.fire_at.should_be(late.expires_at)
+
+            # less than the margin remains, so these fire right away
+            ctx_entry = scheduler.register(client_ctx, on_expiry)
+            ctx_entry.fire_at.should_be_less_than(ctx_entry.expires_at)
+            scheduler.register(self.client_creds, on_expiry)
+
+            done.wait(5).should_be_true()
+
+            len(fired).should_be(2)
+            fired.should_include(client_ctx)
+            fired.should_include(self.client_creds)
+            len(scheduler).should_be(1)
+
+            late.cancel()
+            len(scheduler).should_be(0)
+
+    def test_expiry_scheduler_drops_collected_objects(self):
+        class LongLived(object):
+            lifetime = 10 ** 6
+
+        with gssexpiry.ExpiryScheduler(margin=0) as scheduler:
+            kept = LongLived()
+            kept_entry = scheduler.register(kept, lambda obj: None)
+
+            # registrations for collected objects are cancelled, and don't
+            # pile up in the heap until they would have fired
+            for i in range(100):
+                entry = scheduler.register(LongLived(), lambda obj: None)
+                entry.cancelled.should_be_true()
+
+            len(scheduler).should_be(1)
+            len(scheduler._heap).should_be_at_most(3)
+            kept_entry.cancelled.should_be_false()
+
     def test_channel_bindings(self):
         bdgs = gb.ChannelBindings(application_data=b'abcxyz',
                                   initiator_address_type=gb.AddressType.ip,
@@ -572,6 +858,29 @@ class SecurityContextTestCase(_GSSAPIKerberosTestCase):
                                             channel_bindings=bdgs)
         server_ctx.step.should_raise(gb.BadChannelBindingsError, client_token)
 
+    def test_tls_server_end_point_channel_bindings(self):
+        # a minimal DER-encoded certificate signed with sha384WithRSA
+        sig_alg = b'\x30\x0b\x06\x09\x2a\x86\x48\x86\xf7\x0d\x01\x01\x0c'
+        cert = b'\x30\x13\x30\x00' + sig_alg + b'\x03\x02\x00\x00'
+
+        bdgs = gsstls.tls_server_end_point(cert)
+        bdgs.should_be_a(gb.FrozenChannelBindings)
+        bdgs.application_data.should_be(
+            gsstls.TLS_SERVER_END_POINT_PREFIX +
+            hashlib.sha384(cert).digest())
+
+        # the bindings are cached per certificate
+        gsstls.tls_server_end_point(cert).should_be(bdgs)
+
+        gsstls.tls_server_end_point.should_raise(ValueError, cert[:10])
+
+        client_ctx = self._create_client_ctx(lifetime=400,
+                                             channel_bindings=bdgs)
+        server_ctx = gssctx.SecurityContext(creds=self.server_creds,
+                                            channel_bindings=bdgs)
+        client_ctx.step(server_ctx.step(client_ctx.step()))
+        client_ctx.complete.should_be_true()
+
     def test_export_create_from_token(self):
         client_ctx, server_ctx = self._create_completed_contexts()
         token = client_ctx.export()
@@ -583,6 +892,56 @@ class SecurityContextTestCase(_GSSAPIKerberosTestCase):
         imported_ctx.usage.should_be('initiate')
         imported_ctx.target_name.should_be(self.target_name)
 
+    def test_pack_import_contexts(self):
+        pairs = [self._create_completed_contexts() for i in range(3)]
+
+        bundle_data = gsshandoff.pack_contexts(
+            [client_ctx for client_ctx, server_ctx in pairs])
+
+        with gsshandoff.import_contexts(bundle_data) as bundle:
+            len(bundle).should_be(3)
+
+            for imported_ctx, (client_ctx, server_ctx) in zip(bundle, pairs):
+                imported_ctx.should_be_a(gssctx.SecurityContext)
+                imported_ctx.usage.should_be('initiate')
+                imported_ctx.target_name.should_be(self.target_name)
+
+                token = imported_ctx.encrypt(b'test message')
+                server_ctx.decrypt(token).should_be(b'test message')
+
+            # contexts are only imported once
+            bundle[0].should_be(bundle[0])
+
+            # slices import each context in the range
+            sliced = bundle[1:]
+            len(sliced).should_be(2)
+            for imported_ctx in sliced:
+                imported_ctx.should_be_a(gssctx.SecurityContext)
+            sliced[0].should_be(bundle[1])
+            bundle[-1].should_be(sliced[1])
+
+        gsshandoff.import_contexts.should_raise(ValueError, b'not a bundle')
+
+    def test_export_import_contexts_shared_memory(self):
+        if sys.version_info < (3, 8):
+            self.skipTest("Shared memory requires Python 3.8+")
+
+        pairs = [self._create_completed_contexts() for i in range(3)]
+
+        shm = gsshandoff.export_contexts(
+            [server_ctx for client_ctx, server_ctx in pairs])
+        shm.close()
+
+        bundle = gsshandoff.import_contexts(shm.name)
+        try:
+            for imported_ctx, (client_ctx, server_ctx) in zip(bundle, pairs):
+                imported_ctx.usage.should_be('accept')
+
+                token = client_ctx.encrypt(b'test message')
+                imported_ctx.decrypt(token).should_be(b'test message')
+        finally:
+            bundle.close(unlink=True)
+
     def test_pickle_unpickle(self):
         client_ctx, server_ctx = self._create_completed_contexts()
         pickled_ctx = pickle.dumps(client_ctx)
@@ -628,6 +987,219 @@ class SecurityContextTestCase(_GSSAPIKerberosTestCase):
         unwrap_res.message.should_be(b'test message')
         unwrap_res.encrypted.should_be_true()
 
+    @_extension_test('dce_aead', 'DCE (AEAD)')
+    def test_wrap_unwrap_aead(self):
+        client_ctx, server_ctx = self._create_completed_contexts()
+
+        wrap_res = client_ctx.wrap_aead(b'test message', b'some header')
+        wrap_res.should_be_a(gb.WrapResult)
+        wrap_res.encrypted.should_be_true()
+        wrap_res.message.should_be_a(bytes)
+
+        unwrap_res = server_ctx.unwrap_aead(wrap_res.message, b'some header')
+        unwrap_res.should_be_a(gb.UnwrapResult)
+        unwrap_res.message.should_be(b'test message')
+        unwrap_res.encrypted.should_be_true()
+
+        wrap_res = client_ctx.wrap_aead(b'test message', b'some header')
+        server_ctx.unwrap_aead.should_raise(gb.GSSError, wrap_res.message,
+                                            b'other header')
+
+    def test_wrap_unwrap_stream(self):
+        client_ctx, server_ctx = self._create_completed_contexts()
+
+        data = os.urandom(5000)
+        tokens = [bytes(token) for token in
+                  client_ctx.wrap_stream(six.BytesIO(data), 512)]
+
+        len(tokens).should_be_greater_than(1)
+        for token in tokens:
+            len(token).should_be_at_most(512 + 4)
+
+        # the framing must not depend on how the stream is split up
+        split_stream = b''.join(tokens)
+        pieces = [split_stream[i:i + 100]
+                  for i in range(0, len(split_stream), 100)]
+
+        unwrapped = b''.join(bytes(chunk) for chunk in
+                             server_ctx.unwrap_stream(pieces))
+        unwrapped.should_be(data)
+
+        # iterables can be wrapped too, and files can be unwrapped
+        tokens = [bytes(token) for token in
+                  client_ctx.wrap_stream([data[:10], data[10:]], 512)]
+
+        unwrapped = b''.join(bytes(chunk) for chunk in
+                             server_ctx.unwrap_stream(
+                                 six.BytesIO(b''.join(tokens))))
+        unwrapped.should_be(data)
+
+        # fresh tokens are needed, since replayed tokens would be rejected
+        # by the context before the truncation is noticed
+        tokens = [bytes(token) for token in
+                  client_ctx.wrap_stream(six.BytesIO(data), 512)]
+
+        # oversized tokens are rejected before anything is unwrapped
+        oversized = six.BytesIO(b''.join(tokens))
+        consume = lambda: list(server_ctx.unwrap_stream(  # noqa
+            oversized, max_token_size=100))
+        consume.should_raise(ValueError)
+
+        truncated = six.BytesIO(b''.join(tokens)[:-1])
+        consume = lambda: list(server_ctx.unwrap_stream(truncated))  # noqa
+        consume.should_raise(ValueError)
+
+    def test_protect_unprotect_file(self):
+        if six.PY2:
+            self.skipTest("Memory-mapped files require Python 3")
+
+        client_ctx, server_ctx = self._create_completed_contexts()
+
+        plain_path = os.path.join(self.realm.tmpdir, 'plain.dat')
+        protected_path = os.path.join(self.realm.tmpdir, 'protected.dat')
+        unprotected_path = os.path.join(self.realm.tmpdir, 'unprotected.dat')
+
+        data = os.urandom(5000)
+        with open(plain_path, 'wb') as plain_file:
+            plain_file.write(data)
+
+        protected_size = gssfile.protect_file(client_ctx, plain_path,
+                                              protected_path, 512)
+        protected_size.should_be_greater_than(len(data))
+        os.path.getsize(protected_path).should_be(protected_size)
+
+        # protected files use the same format as wrap_stream
+        with open(protected_path, 'rb') as protected_file:
+            unwrapped = b''.join(bytes(chunk) for chunk in
+                                 server_ctx.unwrap_stream(protected_file))
+        unwrapped.should_be(data)
+
+        gssfile.protect_file(client_ctx, plain_path, protected_path, 512)
+        gssfile.unprotect_file(server_ctx, protected_path,
+                               unprotected_path).should_be(len(data))
+
+        with open(unprotected_path, 'rb') as unprotected_file:
+            unprotected_file.read().should_be(data)
+
+    def test_file_main(self):
+        if six.PY2:
+            self.skipTest("Memory-mapped files require Python 3")
+
+        client_ctx, server_ctx = self._create_completed_contexts()
+
+        tmpdir = self.realm.tmpdir
+        client_ctx_path = os.path.join(tmpdir, 'client.ctx')
+        server_ctx_path = os.path.join(tmpdir, 'server.ctx')
+        plain_path = os.path.join(tmpdir, 'plain.dat')
+        protected_path = os.path.join(tmpdir, 'protected.dat')
+        unprotected_path = os.path.join(tmpdir, 'unprotected.dat')
+
+        with open(client_ctx_path, 'wb') as ctx_file:
+            ctx_file.write(client_ctx.export())
+        with open(server_ctx_path, 'wb') as ctx_file:
+            ctx_file.write(server_ctx.export())
+
+        data = os.urandom(5000)
+        with open(plain_path, 'wb') as plain_file:
+            plain_file.write(data)
+
+        def run_main(argv):
+            saved_stderr = sys.stderr
+            sys.stderr = six.StringIO()
+            try:
+                status = gssfile.main(argv)
+                return (status, sys.stderr.getvalue())
+            finally:
+                sys.stderr = saved_stderr
+
+        status, report = run_main(['protect', plain_path, protected_path,
+                                   '--context', client_ctx_path,
+                                   '--record-size', '512'])
+        status.should_be(0)
+        protected_size = os.path.getsize(protected_path)
+        re.match(r'protected 5000 bytes into {0} bytes in [0-9.]+s '
+                 r'\((?:[0-9.]+|inf) MB/s\)$'.format(protected_size),
+                 report).shouldnt_be_none()
+
+        status, report = run_main(['unprotect', protected_path,
+                                   unprotected_path,
+                                   '--context', server_ctx_path])
+        status.should_be(0)
+        re.match(r'unprotected {0} bytes into 5000 bytes in [0-9.]+s '
+                 r'\((?:[0-9.]+|inf) MB/s\)$'.format(protected_size),
+                 report).shouldnt_be_none()
+
+        with open(unprotected_path, 'rb') as unprotected_file:
+            unprotected_file.read().should_be(data)
+
+    def test_session_store(self):
+        if gssstore.AESGCM is None:
+            self.skipTest("Sealing stored contexts requires the "
+                          "cryptography package")
+
+        store_path = os.path.join(self.realm.tmpdir, 'sessions.db')
+        key = os.urandom(gssstore.KEY_SIZE)
+
+        for backend in (gssstore.MemoryBackend(),
+                        gssstore.MmapFileBackend(store_path)):
+            client_ctx, server_ctx = self._create_completed_contexts()
+
+            with gssstore.SessionStore(backend, key) as store:
+                store.save(b'client', client_ctx).should_be_true()
+                store.save(u'server', server_ctx).should_be_true()
+                len(store).should_be(2)
+
+                resumed_client = store.resume(u'client')
+                resumed_server = store.resume(b'server')
+                len(store).should_be(0)
+
+                resumed_client.should_be_a(gssctx.SecurityContext)
+                resumed_client.usage.should_be('initiate')
+                resumed_client.target_name.should_be(self.target_name)
+                resumed_server.usage.should_be('accept')
+
+                token = resumed_client.encrypt(b'test message')
+                resumed_server.decrypt(token).should_be(b'test message')
+
+                # contexts may only be resumed once
+                store.resume(b'client').should_be_none()
+
+        # contexts in a file may be resumed by another store with the key
+        client_ctx, server_ctx = self._create_completed_contexts()
+        with gssstore.SessionStore(gssstore.MmapFileBackend(store_path),
+                                   key) as store:
+            store.save(b'client', client_ctx)
+
+        other_key = os.urandom(gssstore.KEY_SIZE)
+        with gssstore.SessionStore(gssstore.MmapFileBackend(store_path),
+                                   other_key) as store:
+            store.resume(b'client').should_be_none()
+
+        client_ctx, server_ctx = self._create_completed_contexts()
+        with gssstore.SessionStore(gssstore.MmapFileBackend(store_path),
+                                   key) as store:
+            store.save(b'client', client_ctx)
+
+        with gssstore.SessionStore(gssstore.MmapFileBackend(store_path),
+                                   key) as store:
+            store.resume(b'client').should_be_a(gssctx.SecurityContext)
+
+        # existing files with other parameters are left alone
+        with open(store_path, 'rb') as store_file:
+            store_data = store_file.read()
+
+        gssstore.MmapFileBackend.should_raise(ValueError, store_path,
+                                              num_slots=16)
+
+        with open(store_path, 'rb') as store_file:
+            store_file.read().should_be(store_data)
+
+        other_path = os.path.join(self.realm.tmpdir, 'not-sessions.db')
+        with open(other_path, 'wb') as other_file:
+            other_file.write(b'some other data')
+
+        gssstore.MmapFileBackend.should_raise(ValueError, other_path)
+
     def test_get_wrap_size_limit(self):
         client_ctx, server_ctx = self._create_completed_contexts()
 
@@ -640,6 +1212,22 @@ class SecurityContextTestCase(_GSSAPIKerberosTestCase):
         with_conf.should_be_at_most(100)
         without_conf.should_be_at_most(100)
 
+        # the results are memoized once the context is complete
+        client_ctx.get_wrap_size_limit(100).should_be(with_conf)
+        client_ctx._wrap_sizes.should_include(('limit', 100, True))
+
+    def test_predicted_wrap_size(self):
+        client_ctx, server_ctx = self._create_completed_contexts()
+
+        for size in (0, 1, 100, 1000):
+            predicted = client_ctx.predicted_wrap_size(size)
+            predicted.should_be_an_integer()
+
+            wrapped = client_ctx.wrap(b'x' * size, True).message
+            len(wrapped).should_be_at_most(predicted)
+
+            client_ctx.get_wrap_size_limit(predicted).should_be_at_least(size)
+
     def test_get_signature(self):
         client_ctx, server_ctx = self._create_completed_contexts()
         mic_token = client_ctx.get_signature(b'some message')
@@ -647,6 +1235,26 @@ class SecurityContextTestCase(_GSSAPIKerberosTestCase):
         mic_token.should_be_a(bytes)
         mic_token.shouldnt_be_empty()
 
+    @_extension_test('iov_mic', 'IOV MIC')
+    def test_get_verify_signature_iov(self):
+        client_ctx, server_ctx = self._create_completed_contexts()
+        pieces = [b'some header', bytearray(b' and '), b'some body']
+
+        mic_token = client_ctx.get_signature_iov(pieces)
+        mic_token.should_be_a(bytes)
+        mic_token.shouldnt_be_empty()
+
+        server_ctx.verify_signature_iov(pieces, mic_token)
+
+        # the signature covers the joined message (a new signature is
+        # needed for each check, since the contexts detect replays)
+        mic_token = client_ctx.get_signature_iov(pieces)
+        server_ctx.verify_signature(b''.join(pieces), mic_token)
+
+        mic_token = client_ctx.get_signature_iov(pieces)
+        server_ctx.verify_signature_iov.should_raise(
+            gb.GSSError, [b'some other message'], mic_token)
+
     def test_verify_signature_raise(self):
         client_ctx, server_ctx = self._create_completed_contexts()
         mic_token = client_ctx.get_signature(b'some message')
@@ -669,8 +1277,60 @@ class SecurityContextTestCase(_GSSAPIKerberosTestCase):
         server_ctx = gssctx.SecurityContext(creds=self.server_creds,
                                             channel_bindings=bdgs)
         server_ctx.step(client_token).should_be_a(bytes)
+        server_ctx.should_be_a(gssctx.SecurityContext)
         server_ctx.encrypt.should_raise(gb.BadChannelBindingsError, b'test')
 
+        # the error is only raised once
+        type(server_ctx).should_be(gssctx.SecurityContext)
+        server_ctx._last_err.should_be_none()
+
+    def _create_deferred_error_ctx(self):
+        gssctx.SecurityContext.__DEFER_STEP_ERRORS__ = True
+        bdgs = gb.ChannelBindings(application_data=b'abcxyz')
+        client_ctx = self._create_client_ctx(lifetime=400,
+                                             channel_bindings=bdgs)
+        client_token = client_ctx.step()
+
+        bdgs.application_data = b'defuvw'
+        server_ctx = gssctx.SecurityContext(creds=self.server_creds,
+                                            channel_bindings=bdgs)
+        server_ctx.step(client_token).should_be_a(bytes)
+        return server_ctx
+
+    def test_defer_step_error_twice(self):
+        server_ctx = self._create_deferred_error_ctx()
+        pending_cls = type(server_ctx)
+        pending_cls.shouldnt_be(gssctx.SecurityContext)
+
+        # deferring another error reuses the same pending class, rather
+        # than creating a pending class of the pending class
+        pending_cls._pending_error_class().should_be(pending_cls)
+        pending_cls._checked_class.should_be(gssctx.SecurityContext)
+
+        server_ctx.encrypt.should_raise(gb.BadChannelBindingsError, b'test')
+        type(server_ctx).should_be(gssctx.SecurityContext)
+
+    def test_defer_step_error_on_pickle(self):
+        server_ctx = self._create_deferred_error_ctx()
+
+        # pickling raises the deferred error, like any other method
+        pickle.dumps.should_raise(gb.BadChannelBindingsError, server_ctx)
+        type(server_ctx).should_be(gssctx.SecurityContext)
+        server_ctx._last_err.should_be_none()
+
+    def test_defer_step_error_on_pack_contexts(self):
+        server_ctx = self._create_deferred_error_ctx()
+        client_ctx, other_ctx = self._create_completed_contexts()
+
+        # the deferred error is raised before anything is exported
+        gsshandoff.pack_contexts.should_raise(gb.BadChannelBindingsError,
+                                              [client_ctx, server_ctx])
+        type(server_ctx).should_be(gssctx.SecurityContext)
+        server_ctx._last_err.should_be_none()
+
+        token = client_ctx.encrypt(b'test message')
+        other_ctx.decrypt(token).should_be(b'test message')
+
     def test_defer_step_error_on_complete_property_access(self):
         gssctx.SecurityContext.__DEFER_STEP_ERRORS__ = True
         bdgs = gb.ChannelBindings(application_data=b'abcxyz')
@@ -622,6 +622,21 @@ class TestInitContext(_GSSAPIKerberosTestCase):
 
         gb.delete_sec_context(ctx)
 
+    def test_init_step(self):
+        ctx = gb.SecurityContext()
+        step_resp = gb.init_step(ctx, self.target_name)
+        step_resp.should_be_a(gb.InitStepResult)
+
+        out_token, cont_needed = step_resp
+
+        out_token.shouldnt_be_empty()
+        cont_needed.should_be_a(bool)
+
+        ctx.shouldnt_be_none()
+        gb.inquire_context(ctx).mech.should_be(gb.MechType.kerberos)
+
+        gb.delete_sec_context(ctx)
+
 
 class TestAcceptContext(_GSSAPIKerberosTestCase):
 
@@ -677,6 +692,41 @@ class TestAcceptContext(_GSSAPIKerberosTestCase):
 
         cont_needed.should_be_a(bool)
 
+    def test_accept_context_uses_acceptor_creds(self):
+        # initiate-only credentials can't accept a context, so this only
+        # fails if the given credentials are actually used
+        client_creds = gb.acquire_cred(None, usage='initiate').creds
+        gb.accept_sec_context.should_raise(gb.GSSError, self.client_token,
+                                           acceptor_creds=client_creds)
+        gb.release_cred(client_creds)
+
+        # without credentials, the default credentials are used
+        server_resp = gb.accept_sec_context(self.client_token)
+        self.server_ctx = server_resp.context
+        server_resp.token.shouldnt_be_empty()
+
+    def test_accept_step(self):
+        self.server_ctx = gb.SecurityContext()
+        step_resp = gb.accept_step(self.server_ctx, self.client_token,
+                                   acceptor_creds=self.server_creds)
+        step_resp.should_be_a(gb.AcceptStepResult)
+
+        out_token, cont_needed, delegated_cred = step_resp
+
+        out_token.shouldnt_be_empty()
+        cont_needed.should_be_false()
+        delegated_cred.should_be_none()
+
+        # the details skipped by the step are available through an inquiry
+        inq_resp = gb.inquire_context(self.server_ctx)
+        inq_resp.initiator_name.should_be_a(gb.Name)
+        inq_resp.mech.should_be(gb.MechType.kerberos)
+        inq_resp.complete.should_be_true()
+
+        # the initiator may be completed with the same fast path
+        gb.init_step(self.client_ctx, self.target_name,
+                     out_token).more_steps.should_be_false()
+
     def test_channel_bindings(self):
         bdgs = gb.ChannelBindings(application_data=b'abcxyz',
                                   initiator_address_type=gb.AddressType.ip,
@@ -726,6 +776,45 @@ class TestAcceptContext(_GSSAPIKerberosTestCase):
                                            acceptor_creds=self.server_creds,
                                            channel_bindings=bdgs)
 
+    def test_frozen_channel_bindings(self):
+        bdgs = gb.ChannelBindings(application_data=b'abcxyz',
+                                  initiator_address_type=gb.AddressType.ip,
+                                  initiator_address=b'127.0.0.1',
+                                  acceptor_address_type=gb.AddressType.ip,
+                                  acceptor_address=b'127.0.0.1').freeze()
+
+        bdgs.should_be_a(gb.FrozenChannelBindings)
+        bdgs.freeze().should_be(bdgs)
+        bdgs.application_data.should_be(b'abcxyz')
+
+        def set_attr():
+            bdgs.acceptor_address = b'127.0.1.0'
+
+        set_attr.should_raise(AttributeError)
+        bdgs.__init__.should_raise(AttributeError)
+
+        self.target_name = gb.import_name(TARGET_SERVICE_NAME,
+                                          gb.NameType.hostbased_service)
+        self.server_name = gb.import_name(SERVICE_PRINCIPAL,
+                                          gb.NameType.kerberos_principal)
+        self.server_creds = gb.acquire_cred(self.server_name)[0]
+
+        # the same frozen channel bindings may be used repeatedly
+        for i in range(2):
+            ctx_resp = gb.init_sec_context(self.target_name,
+                                           channel_bindings=bdgs)
+            server_resp = gb.accept_sec_context(
+                ctx_resp.token, acceptor_creds=self.server_creds,
+                channel_bindings=bdgs)
+            server_resp.context.shouldnt_be_none()
+
+        other_bdgs = gb.FrozenChannelBindings(application_data=b'abcxyz')
+        ctx_resp = gb.init_sec_context(self.target_name,
+                                       channel_bindings=bdgs)
+        gb.accept_sec_context.should_raise(gb.GSSError, ctx_resp.token,
+                                           acceptor_creds=self.server_creds,
+                                           channel_bindings=other_bdgs)
+
 
 class TestWrapUnwrap(_GSSAPIKerberosTestCase):
     def setUp(self):
@@ -820,6 +909,315 @@ class TestWrapUnwrap(_GSSAPIKerberosTestCase):
         unwrapped_message.shouldnt_be_empty()
         unwrapped_message.should_be(b'test message')
 
+    def test_wrap_unwrap_as_buffer(self):
+        (wrapped_message, conf) = gb.wrap(self.client_ctx, b'test message',
+                                          as_buffer=True)
+
+        wrapped_message.should_be_a(gb.GSSBuffer)
+        len(wrapped_message).should_be_greater_than(len(b'test message'))
+
+        view = memoryview(wrapped_message)
+        view.readonly.should_be_true()
+        len(view).should_be(len(wrapped_message))
+        del view
+
+        # the buffer can be passed straight back in as an input
+        (unwrapped_message, conf, qop) = gb.unwrap(self.server_ctx,
+                                                   wrapped_message,
+                                                   as_buffer=True)
+        unwrapped_message.should_be_a(gb.GSSBuffer)
+        unwrapped_message.__bytes__().should_be(b'test message')
+
+        mic_token = gb.get_mic(self.client_ctx, b'some message',
+                               as_buffer=True)
+        mic_token.should_be_a(gb.GSSBuffer)
+        gb.verify_mic(self.server_ctx, b'some message',
+                      mic_token).should_be_an_integer()
+
+    def test_wrap_unwrap_bytes(self):
+        wrapped_message = gb.wrap_bytes(self.client_ctx, b'test message')
+        wrapped_message.should_be_a(bytes)
+        wrapped_message.should_be_longer_than('test message')
+
+        unwrapped_message = gb.unwrap_bytes(self.server_ctx, wrapped_message)
+        unwrapped_message.should_be_a(bytes)
+        unwrapped_message.should_be(b'test message')
+
+        wrapped_message = gb.wrap_bytes(self.client_ctx, b'test message',
+                                        confidential=False)
+        gb.unwrap_bytes(self.server_ctx,
+                        wrapped_message).should_be(b'test message')
+
+        wrapped_message = gb.wrap_bytes(self.client_ctx, b'test message')
+        gb.unwrap_checked(self.server_ctx,
+                          wrapped_message).should_be(b'test message')
+
+    def test_unwrap_checked_requires_conf(self):
+        wrapped_message = gb.wrap_bytes(self.client_ctx, b'test message',
+                                        confidential=False)
+        gb.unwrap_checked.should_raise(gb.EncryptionNotUsedError,
+                                       self.server_ctx, wrapped_message)
+
+        wrapped_message = gb.wrap_bytes(self.client_ctx, b'test message',
+                                        confidential=False)
+        gb.unwrap_checked(self.server_ctx, wrapped_message,
+                          require_conf=False).should_be(b'test message')
+
+    def test_buffer_protocol_inputs(self):
+        recv_buffer = bytearray(b'xxtest messagexx')
+        message = memoryview(recv_buffer)[2:-2]
+
+        (wrapped_message, conf) = gb.wrap(self.client_ctx, message)
+        wrapped_message.should_be_a(bytes)
+
+        (unwrapped_message, conf, qop) = gb.unwrap(
+            self.server_ctx, bytearray(wrapped_message))
+        unwrapped_message.should_be(b'test message')
+
+        mic_token = gb.get_mic(self.client_ctx, message)
+        gb.verify_mic(self.server_ctx, message, memoryview(mic_token))
+
+        gb.wrap.should_raise(TypeError, self.client_ctx, object())
+
+    def test_wrap_unwrap_many(self):
+        messages = [b'message one', b'', bytearray(b'message three')]
+
+        wrap_results = gb.wrap_many(self.client_ctx, messages)
+        wrap_results.should_have_length(3)
+        for res in wrap_results:
+            res.should_be_a(gb.WrapResult)
+            res.encrypted.should_be_true()
+
+        tokens = [res.message for res in wrap_results]
+        tokens[1] = b'some invalid token'
+
+        unwrap_results = gb.unwrap_many(self.server_ctx, tokens)
+        unwrap_results.should_have_length(3)
+
+        unwrap_results[0].should_be_a(gb.UnwrapResult)
+        unwrap_results[0].message.should_be(b'message one')
+
+        # the bad token is reported in place, rather than failing the batch
+        unwrap_results[1].should_be_a(gb.GSSError)
+
+        # the batch goes on after it, so the next token is unwrapped too,
+        # and reported in place as a sequence gap (the contexts use sequence
+        # detection, and the bad token skipped a sequence number)
+        unwrap_results[2].should_be_a(gb.TokenOutOfSequenceError)
+
+        gb.wrap_many(self.client_ctx, []).should_be([])
+
+    def test_wrap_unwrap_into(self):
+        # when checking the size, rejected output buffers are caught before
+        # anything is wrapped, so no sequence numbers are used up
+        gb.wrap_into.should_raise(gb.OutputBufferTooSmallError,
+                                  self.client_ctx, b'test message',
+                                  bytearray(4), check_size=True)
+        gb.wrap_into.should_raise(BufferError, self.client_ctx,
+                                  b'test message', b'read-only bytes')
+
+        # otherwise, the wrapped message is handed back with the error
+        with self.assertRaises(gb.OutputBufferTooSmallError) as cm:
+            gb.wrap_into(self.client_ctx, b'test message', bytearray(4))
+
+        cm.exception.token.should_be_a(bytes)
+        gb.unwrap(self.server_ctx,
+                  cm.exception.token).message.should_be(b'test message')
+
+        out_buffer = bytearray(1024)
+        out_buffer[:4] = b'\xff' * 4
+
+        wrap_res = gb.wrap_into(self.client_ctx, b'test message', out_buffer,
+                                headroom=4)
+        wrap_res.should_be_a(gb.WrapIntoResult)
+        wrap_res.length.should_be_greater_than(0)
+        wrap_res.encrypted.should_be_true()
+
+        # the headroom is left alone
+        out_buffer[:4].should_be(bytearray(b'\xff' * 4))
+
+        token = bytes(out_buffer[4:4 + wrap_res.length])
+
+        # likewise, the token is not consumed if the buffer is rejected
+        gb.unwrap_into.should_raise(ValueError, self.server_ctx, token,
+                                    bytearray(len(token) - 1))
+
+        msg_buffer = bytearray(len(token))
+        unwrap_res = gb.unwrap_into(self.server_ctx, token,
+                                    memoryview(msg_buffer))
+        unwrap_res.should_be_a(gb.UnwrapIntoResult)
+        unwrap_res.length.should_be(len(b'test message'))
+        unwrap_res.encrypted.should_be_true()
+        unwrap_res.qop.should_be_an_integer()
+        msg_buffer[:unwrap_res.length].should_be(bytearray(b'test message'))
+
+        # a buffer that is big enough passes the size check
+        wrap_res = gb.wrap_into(self.client_ctx, b'test message', out_buffer,
+                                check_size=True)
+        token = bytes(out_buffer[:wrap_res.length])
+        gb.unwrap(self.server_ctx, token).message.should_be(b'test message')
+
+    def test_get_verify_mic_batch(self):
+        messages = [b'message one', bytearray(b'message two'), b'three']
+
+        mic_res = gb.get_mic_batch([(self.client_ctx, msg)
+                                    for msg in messages])
+        mic_res.should_be_a(gb.GetMICBatchResult)
+        mic_res.tokens.should_have_length(3)
+        list(mic_res.major_statuses).should_be([0, 0, 0])
+        for token in mic_res.tokens:
+            token.should_be_a(bytes)
+            token.shouldnt_be_empty()
+
+        # the bad MIC comes from a second pair of contexts, so that it doesn't
+        # cause a sequence gap on the first pair (the contexts use sequence
+        # detection)
+        other_resp = gb.init_sec_context(self.target_name)
+        other_server_resp = gb.accept_sec_context(
+            other_resp.token, acceptor_creds=self.server_creds)
+        other_client_ctx = gb.init_sec_context(
+            self.target_name, context=other_resp.context,
+            input_token=other_server_resp.token).context
+        other_mic = gb.get_mic(other_client_ctx, b'other message')
+
+        ops = [(self.server_ctx, msg, token)
+               for msg, token in zip(messages, mic_res.tokens)]
+        ops.insert(1, (other_server_resp.context, b'some other message',
+                       other_mic))
+
+        verify_res = gb.verify_mic_batch(ops)
+        verify_res.should_be_a(gb.VerifyMICBatchResult)
+        verify_res.major_statuses.should_have_length(4)
+        verify_res.minor_statuses.should_have_length(4)
+        verify_res.qops.should_have_length(4)
+
+        # the bad MIC is reported in place, rather than failing the batch,
+        # and the MICs after it are still verified
+        verify_res.major_statuses[0].should_be(0)
+        verify_res.major_statuses[1].shouldnt_be(0)
+        verify_res.major_statuses[2].should_be(0)
+        verify_res.major_statuses[3].should_be(0)
+
+        list(gb.verify_mic_batch([]).major_statuses).should_be([])
+
+    @_extension_test('dce_aead', 'DCE (AEAD)')
+    def test_basic_aead_wrap_unwrap(self):
+        assoc = b'some sig data'
+        (wrapped_message, conf) = gb.wrap_aead(self.client_ctx,
+                                               b'test message', assoc)
+        conf.should_be_a(bool)
+        conf.should_be_true()
+
+        wrapped_message.should_be_a(bytes)
+        wrapped_message.shouldnt_be_empty()
+        wrapped_message.should_be_longer_than('test message')
+
+        (unwrapped_message, conf, qop) = gb.unwrap_aead(self.server_ctx,
+                                                        wrapped_message,
+                                                        assoc)
+        conf.should_be_a(bool)
+        conf.should_be_true()
+
+        qop.should_be_an_integer()
+        qop.should_be_at_least(0)
+
+        unwrapped_message.should_be_a(bytes)
+        unwrapped_message.should_be(b'test message')
+
+    @_extension_test('dce_aead', 'DCE (AEAD)')
+    def test_basic_aead_wrap_unwrap_bad_assoc_raises_error(self):
+        (wrapped_message, conf) = gb.wrap_aead(self.client_ctx,
+                                               b'test message',
+                                               b'some sig data')
+
+        gb.unwrap_aead.should_raise(gb.BadMICError, self.server_ctx,
+                                    wrapped_message, b'some other sig data')
+
+    @_extension_test('iov_mic', 'IOV MIC')
+    def test_get_mic_iov(self):
+        init_message = gb.IOV(b'some data',
+                              (gb.IOVBufferType.sign_only, b'some sig data'),
+                              (gb.IOVBufferType.mic_token, True),
+                              std_layout=False)
+
+        gb.get_mic_iov(self.client_ctx, init_message)
+
+        init_message[2].type.should_be(gb.IOVBufferType.mic_token)
+        init_message[2].value.shouldnt_be_empty()
+
+        recv_message = gb.IOV(b'some data',
+                              (gb.IOVBufferType.sign_only, b'some sig data'),
+                              (gb.IOVBufferType.mic_token, False,
+                               init_message[2].value),
+                              std_layout=False)
+
+        qop = gb.verify_mic_iov(self.server_ctx, recv_message)
+        qop.should_be_an_integer()
+
+    @_extension_test('iov_mic', 'IOV MIC')
+    def test_get_mic_iov_length(self):
+        message = gb.IOV(b'some data', (gb.IOVBufferType.mic_token, False),
+                         std_layout=False)
+
+        gb.get_mic_iov_length(self.client_ctx, message)
+
+        message[1].type.should_be(gb.IOVBufferType.mic_token)
+        message[1].value.should_be_a(bytearray)
+        message[1].value.shouldnt_be_empty()
+
+    @_extension_test('dce', 'DCE (IOV)')
+    def test_basic_iov_wrap_unwrap_in_place(self):
+        init_data = bytearray(b'some encrypted data')
+        init_signed_info = b'some sig data'
+
+        init_message = gb.IOV((gb.IOVBufferType.sign_only, init_signed_info),
+                              init_data, std_layout=True)
+
+        conf = gb.wrap_iov(self.client_ctx, init_message)
+
+        conf.should_be_a(bool)
+        conf.should_be_true()
+
+        init_message[0].type.should_be(gb.IOVBufferType.header)
+        init_message[0].value.shouldnt_be_empty()
+
+        # the data buffer is encrypted in place
+        init_message[2].value.should_be(init_data)
+        init_data.shouldnt_be(bytearray(b'some encrypted data'))
+
+        header = init_message[0].value
+        trailer = init_message[4].value
+
+        recv_data = bytearray(init_data)
+        recv_message = gb.IOV((gb.IOVBufferType.header, False,
+                               bytearray(header)),
+                              (gb.IOVBufferType.sign_only, init_signed_info),
+                              recv_data,
+                              (gb.IOVBufferType.trailer, False,
+                               bytearray(trailer)),
+                              std_layout=False)
+
+        (conf, qop) = gb.unwrap_iov(self.server_ctx, recv_message)
+
+        conf.should_be_a(bool)
+        conf.should_be_true()
+
+        qop.should_be_an_integer()
+
+        recv_data.should_be(bytearray(b'some encrypted data'))
+
+    @_extension_test('dce', 'DCE (IOV)')
+    def test_iov_wrap_length_and_read_only_data(self):
+        message = gb.IOV(b'some data', std_layout=True, auto_alloc=False)
+
+        gb.wrap_iov.should_raise(TypeError, self.client_ctx, message)
+
+        conf = gb.wrap_iov_length(self.client_ctx, message)
+        conf.should_be_true()
+
+        message[0].value.should_be_a(bytearray)
+        message[0].value.shouldnt_be_empty()
+
 
 TEST_OIDS = {'SPNEGO': {'bytes': b'\053\006\001\005\005\002',
                         'string': '1.3.6.1.5.5.2'},
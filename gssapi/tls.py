@@ -0,0 +1,151 @@
+"""TLS Channel Bindings
+
+This module computes the channel bindings defined in :rfc:`5929` for
+GSSAPI security contexts established over TLS connections, as
+:class:`~gssapi.raw.chan_bindings.FrozenChannelBindings` objects.
+
+The ``tls-server-end-point`` bindings only depend on the server's
+certificate, so they are cached per certificate, and the same channel
+bindings object is returned for every connection using that certificate.
+"""
+
+import collections
+import hashlib
+import ssl
+import threading
+
+from gssapi.raw.chan_bindings import FrozenChannelBindings
+
+
+# the number of tls-server-end-point bindings which are cached
+ENDPOINT_CACHE_SIZE = 64
+
+TLS_SERVER_END_POINT_PREFIX = b'tls-server-end-point:'
+TLS_UNIQUE_PREFIX = b'tls-unique:'
+
+_ENDPOINT_CACHE = collections.OrderedDict()
+_ENDPOINT_CACHE_LOCK = threading.Lock()
+
+# RFC 5929 uses the certificate's signature hash algorithm, except that MD5 and
+# SHA-1 are replaced by SHA-256 (as are algorithms without a single hash)
+_SIGNATURE_HASHES = {
+    # sha256WithRSAEncryption
+    b'\x2a\x86\x48\x86\xf7\x0d\x01\x01\x0b': 'sha256',
+    # sha384WithRSAEncryption
+    b'\x2a\x86\x48\x86\xf7\x0d\x01\x01\x0c': 'sha384',
+    # sha512WithRSAEncryption
+    b'\x2a\x86\x48\x86\xf7\x0d\x01\x01\x0d': 'sha512',
+    # sha224WithRSAEncryption
+    b'\x2a\x86\x48\x86\xf7\x0d\x01\x01\x0e': 'sha224',
+    # ecdsa-with-SHA256
+    b'\x2a\x86\x48\xce\x3d\x04\x03\x02': 'sha256',
+    # ecdsa-with-SHA384
+    b'\x2a\x86\x48\xce\x3d\x04\x03\x03': 'sha384',
+    # ecdsa-with-SHA512
+    b'\x2a\x86\x48\xce\x3d\x04\x03\x04': 'sha512',
+    # ecdsa-with-SHA224
+    b'\x2a\x86\x48\xce\x3d\x04\x03\x01': 'sha224',
+}
+_DEFAULT_HASH = 'sha256'
+
+
+def _read_tlv(data, pos):
+    # returns the tag, the start of the value, and the end of the value
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        num_bytes = length & 0x7f
+        length = 0
+        for byte in data[pos:pos + num_bytes]:
+            length = (length << 8) | byte
+        pos += num_bytes
+
+    if pos + length > len(data):
+        raise ValueError("Truncated DER-encoded certificate")
+
+    return (tag, pos, pos + length)
+
+
+def _signature_hash(certificate):
+    # Certificate ::= SEQUENCE { tbsCertificate, signatureAlgorithm, ... }
+    # AlgorithmIdentifier ::= SEQUENCE { algorithm OBJECT IDENTIFIER, ... }
+    data = bytearray(certificate)
+    try:
+        _, cert_start, _ = _read_tlv(data, 0)
+        _, _, tbs_end = _read_tlv(data, cert_start)
+        _, alg_start, _ = _read_tlv(data, tbs_end)
+        tag, oid_start, oid_end = _read_tlv(data, alg_start)
+    except IndexError:
+        raise ValueError("Truncated DER-encoded certificate")
+
+    if tag != 0x06:
+        raise ValueError("Malformed DER-encoded certificate")
+
+    return _SIGNATURE_HASHES.get(bytes(data[oid_start:oid_end]),
+                                 _DEFAULT_HASH)
+
+
+def tls_server_end_point(certificate):
+    """Get the tls-server-end-point channel bindings for a certificate
+
+    The returned channel bindings are cached per certificate.
+
+    Args:
+        certificate: the server's DER-encoded certificate (bytes), or
+            an :class:`ssl.SSLSocket` connected to the server (in which
+            case the peer's certificate is used)
+
+    Returns:
+        FrozenChannelBindings: the channel bindings
+
+    Raises:
+        ValueError: the certificate is not available or is malformed
+    """
+
+    if isinstance(certificate, ssl.SSLSocket):
+        certificate = certificate.getpeercert(binary_form=True)
+        if certificate is None:
+            raise ValueError("The peer did not provide a certificate")
+
+    with _ENDPOINT_CACHE_LOCK:
+        bindings = _ENDPOINT_CACHE.pop(certificate, None)
+        if bindings is not None:
+            _ENDPOINT_CACHE[certificate] = bindings
+            return bindings
+
+    cert_hash = hashlib.new(_signature_hash(certificate), certificate)
+    bindings = FrozenChannelBindings(
+        application_data=TLS_SERVER_END_POINT_PREFIX + cert_hash.digest())
+
+    with _ENDPOINT_CACHE_LOCK:
+        _ENDPOINT_CACHE[certificate] = bindings
+        while len(_ENDPOINT_CACHE) > ENDPOINT_CACHE_SIZE:
+            _ENDPOINT_CACHE.popitem(last=False)
+
+    return bindings
+
+
+def tls_unique(sock):
+    """Get the tls-unique channel bindings for a TLS connection
+
+    The tls-unique channel bindings differ for each TLS handshake, so
+    they are not cached.  Note that TLS 1.3 does not define tls-unique.
+
+    Args:
+        sock (ssl.SSLSocket): the connected socket
+
+    Returns:
+        FrozenChannelBindings: the channel bindings
+
+    Raises:
+        ValueError: the channel bindings are not available (e.g. the
+            handshake has not been completed)
+    """
+
+    data = sock.get_channel_binding('tls-unique')
+    if data is None:
+        raise ValueError("tls-unique channel bindings are not available "
+                         "for this connection")
+
+    return FrozenChannelBindings(application_data=TLS_UNIQUE_PREFIX + data)
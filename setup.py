@@ -187,17 +187,23 @@ setup(
         main_file('oids'),
         main_file('cython_converters'),
         main_file('chan_bindings'),
+        main_file('buffers'),
         extension_file('s4u', 'gss_acquire_cred_impersonate_name'),
         extension_file('cred_store', 'gss_store_cred_into'),
         extension_file('rfc5588', 'gss_store_cred'),
         extension_file('cred_imp_exp', 'gss_import_cred'),
+        extension_file('dce', 'gss_wrap_iov'),
+        extension_file('dce_aead', 'gss_wrap_aead'),
+        extension_file('iov_mic', 'gss_get_mic_iov'),
     ]),
     keywords=['gssapi', 'security'],
     install_requires=[
         'enum34',
-        'decorator',
         'six'
     ],
+    extras_require={
+        'session_store': ['cryptography'],
+    },
     tests_require=[
         'tox'
     ]